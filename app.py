@@ -19,13 +19,14 @@ logger = logging.getLogger(__name__)
 
 def start_fastapi_server():
     try:
-        logger.info("Starting FastAPI backend server on port 8000...")
+        from config import Config
+        logger.info(f"Starting FastAPI backend server on port {Config.app.API_PORT}...")
         from main import app
 
         uvicorn.run(
             app,
             host="0.0.0.0",
-            port=8000,
+            port=Config.app.API_PORT,
             log_level="info",
             access_log=True
         )
@@ -34,28 +35,47 @@ def start_fastapi_server():
         logger.error(f"Failed to start FastAPI server: {e}")
         raise
 
-def wait_for_api_server(max_retries=20, delay=4):
+def wait_for_api_server(timeout=None, poll_interval=None):
     import requests
+    from config import Config
 
-    for i in range(max_retries):
+    # /readyz only answers 200 once models are loaded and warmed up and Qdrant is reachable
+    url = f"http://localhost:{Config.app.API_PORT}/readyz"
+    timeout = timeout if timeout is not None else Config.app.READINESS_TIMEOUT_SECONDS
+    poll_interval = poll_interval if poll_interval is not None else Config.app.READINESS_POLL_SECONDS
+    started = time.time()
+    last_log = 0.0
+
+    while time.time() - started < timeout:
         try:
-            response = requests.get("http://localhost:8000/docs", timeout=5)
+            response = requests.get(url, timeout=2)
             if response.status_code == 200:
-                logger.info("✅ FastAPI server is ready!")
+                logger.info(f"✅ FastAPI server is ready after {time.time() - started:.1f}s")
                 return True
-        except requests.exceptions.RequestException:
-            pass
+            status = response.json().get("checks", {})
+        except (requests.exceptions.RequestException, ValueError):
+            status = "not accepting connections"
 
-        logger.info(f"⏳ Waiting for FastAPI server... ({i+1}/{max_retries})")
-        time.sleep(delay)
+        if time.time() - last_log >= 5:
+            logger.info(f"⏳ Waiting for FastAPI server... ({status})")
+            last_log = time.time()
+        time.sleep(poll_interval)
 
-    logger.error("❌ FastAPI server failed to start within timeout")
+    logger.error("❌ FastAPI server failed to become ready within timeout")
     return False
 
-def create_gradio_app():
+def create_gradio_app(transport=None):
     try:
         from gradio_ui import RAGGradioUI
-        ui = RAGGradioUI()
+        from config import Config
+
+        client = None
+        if (transport or Config.app.UI_TRANSPORT) == "local":
+            # The API lives in this process, so skip the localhost HTTP round trip
+            from local_client import LocalRAGClient
+            client = LocalRAGClient()
+            logger.info("Gradio UI using in-process transport")
+        ui = RAGGradioUI(client)
         demo = ui.create_interface()
         return demo
 
@@ -82,10 +102,11 @@ def main():
         logger.info("Creating Gradio frontend...")
         demo = create_gradio_app()
 
-        logger.info("🎉 Launching Gradio UI on port 7860...")
+        from config import Config
+        logger.info(f"🎉 Launching Gradio UI on port {Config.app.GRADIO_PORT}...")
         demo.launch(
             server_name="0.0.0.0",
-            server_port=7860,
+            server_port=Config.app.GRADIO_PORT,
             share=False,
             debug=False,
             show_error=True,
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of the API client against a running backend.
+
+    python benchmarks/api_client_benchmark.py --base-url http://localhost:8000/api/v1 --calls 500
+
+Compares a fresh connection per call (plain requests.request, the previous
+client behaviour) with the pooled keep-alive RAGAPIClient, and the async
+client issuing the same calls with bounded concurrency. GET /collections is
+used because it is cheap on the server side, so the numbers are dominated by
+client and connection overhead.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from api_client import RAGAPIClient, AsyncRAGAPIClient
+
+
+def report(label: str, samples, wall_seconds: float):
+    samples_ms = np.asarray(samples) * 1000
+    print(
+        f"{label:<28} p50={np.percentile(samples_ms, 50):7.2f}ms p95={np.percentile(samples_ms, 95):7.2f}ms "
+        f"mean={samples_ms.mean():7.2f}ms  throughput={len(samples) / wall_seconds:8.1f} calls/s"
+    )
+
+
+def bench_unpooled(base_url: str, calls: int):
+    samples = []
+    started = time.perf_counter()
+    for _ in range(calls):
+        start = time.perf_counter()
+        requests.request("GET", f"{base_url}/collections").json()
+        samples.append(time.perf_counter() - start)
+    report("requests.request (no pool)", samples, time.perf_counter() - started)
+
+
+def bench_pooled(base_url: str, calls: int):
+    client = RAGAPIClient(base_url)
+    client.list_collections()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(calls):
+        start = time.perf_counter()
+        client.list_collections()
+        samples.append(time.perf_counter() - start)
+    report("RAGAPIClient (pooled)", samples, time.perf_counter() - started)
+    client.close()
+
+
+async def bench_async(base_url: str, calls: int, concurrency: int):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncRAGAPIClient(base_url, pool_size=concurrency) as client:
+        await client.list_collections()
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.list_collections()
+                samples.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(calls)))
+        report(f"AsyncRAGAPIClient (x{concurrency})", samples, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Per-call INFO logging in the client would otherwise dominate the measurement
+    logging.getLogger("api_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    bench_unpooled(args.base_url, args.calls)
+    bench_pooled(args.base_url, args.calls)
+    asyncio.run(bench_async(args.base_url, args.calls, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of exact vs IVF feedback lookup on synthetic query vectors.
+
+    python benchmarks/feedback_ann_benchmark.py --sizes 10000,100000,1000000 --dim 256
+
+Feedback vectors are drawn around a few thousand "topics" so that similar
+queries exist, as they do in real feedback logs. Recall is measured against
+the exact threshold search on the same data.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from repositories.feedback_repository import VectorMatrix, IvfIndex
+
+
+def make_vectors(rng, size: int, dim: int, topics: np.ndarray, noise: float) -> np.ndarray:
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, 65536):
+        end = min(size, start + 65536)
+        picks = topics[rng.integers(0, len(topics), end - start)]
+        batch = picks + noise * rng.standard_normal((end - start, dim)).astype(np.float32)
+        vectors[start:end] = batch / np.linalg.norm(batch, axis=1, keepdims=True)
+    return vectors
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run(size: int, dim: int, queries: int, threshold: float, nprobe: int, nlist: int, seed: int):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((max(16, size // 200), dim)).astype(np.float32)
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    noise = 0.4 / np.sqrt(dim)
+
+    matrix = VectorMatrix()
+    matrix.vectors = make_vectors(rng, size, dim, topics, noise)
+    matrix.size = size
+    query_vectors = make_vectors(rng, queries, dim, topics, noise)
+
+    start = time.perf_counter()
+    ivf = IvfIndex(matrix, nlist=nlist, nprobe=nprobe, min_train_size=0)
+    ivf.train()
+    build_seconds = time.perf_counter() - start
+
+    exact_times, ivf_times, recalls = [], [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        exact_rows, _ = matrix.search(query, threshold)
+        exact_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ivf_rows, _ = ivf.search(query, threshold)
+        ivf_times.append(time.perf_counter() - start)
+
+        if exact_rows.size:
+            recalls.append(np.intersect1d(exact_rows, ivf_rows).size / exact_rows.size)
+
+    print(
+        f"n={size:>9} nlist={len(ivf.centroids):>5} nprobe={nprobe:>3} build={build_seconds:7.2f}s | "
+        f"exact p50={percentile_ms(exact_times, 50):8.3f}ms p95={percentile_ms(exact_times, 95):8.3f}ms | "
+        f"ivf p50={percentile_ms(ivf_times, 50):8.3f}ms p95={percentile_ms(ivf_times, 95):8.3f}ms | "
+        f"recall={np.mean(recalls) if recalls else float('nan'):.4f} ({len(recalls)} queries with matches)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=256, help="1024 matches the BGE-large embedder but needs ~8GB at 1M")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = sqrt(n)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        run(size, args.dim, args.queries, args.threshold, args.nprobe, args.nlist, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Import-time check for the API process.
+
+    python benchmarks/import_time_check.py [--module main] [--budget-ms 1500] [--top 15]
+
+Imports the module in a fresh interpreter with `-X importtime`, prints the
+slowest imports by cumulative time, and exits non-zero if the total exceeds
+the budget or if a heavy dependency that should only load on first use
+(torch, sentence_transformers, gradio, pdfplumber, or an LLM SDK other than
+the configured LLM_PROVIDER) was imported.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Top-level packages that must not be imported just by importing the API
+DEFERRED_PACKAGES = {
+    "torch": "loaded with the models on first use or warm-up",
+    "sentence_transformers": "loaded with the models on first use or warm-up",
+    "gradio": "only needed by the UI process",
+    "pdfplumber": "imported on the first PDF upload",
+}
+PROVIDER_PACKAGES = {
+    "openai": "openai",
+    "gemini": "google.generativeai",
+}
+
+
+def parse_importtime(stderr: str):
+    """Return [(module, depth, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        # Nesting is shown as two spaces of indentation per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(cumulative_us)))
+    return rows
+
+
+def run_importtime(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check API import time and deferred heavy imports")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    result = run_importtime(f"import {args.module}")
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        print(f"FAIL: importing {args.module} raised")
+        sys.exit(1)
+
+    rows = parse_importtime(result.stderr)
+    # Interpreter startup (encodings, site, ...) is also reported at depth 0; leave it out
+    startup = {name for name, _, _ in parse_importtime(run_importtime("pass").stderr)}
+    # Only top-level entries add up to the total; nested ones are included in their parents
+    total_ms = sum(cumulative for name, depth, cumulative in rows if depth == 0 and name not in startup) / 1000
+    imported = {name for name, _, _ in rows}
+
+    print(f"Slowest imports for `import {args.module}` (cumulative):")
+    for name, _, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+    print(f"Total: {total_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+
+    sys.path.insert(0, str(SRC_DIR))
+    from config import Config
+    deferred = dict(DEFERRED_PACKAGES)
+    providers = {Config.llm.PROVIDER}
+    if Config.llm.LLM_FALLBACK_ENABLED:
+        # Configured fallback providers are built up front, so their SDKs load too
+        keys = {"openai": Config.llm.OPENAI_API_KEY, "gemini": Config.llm.GEMINI_API_KEY}
+        providers |= {provider for provider, key in keys.items() if key}
+    for provider, package in PROVIDER_PACKAGES.items():
+        if provider not in providers:
+            deferred[package] = f"LLM_PROVIDER is '{Config.llm.PROVIDER}'"
+
+    failures = [f"{package} was imported ({reason})" for package, reason in deferred.items() if package in imported]
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f}ms, over the {args.budget_ms:.0f}ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
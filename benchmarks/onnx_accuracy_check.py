@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Accuracy check of the ONNX Runtime backend against the PyTorch path.
+
+    python benchmarks/onnx_accuracy_check.py [--corpus texts.txt] [--no-quantize]
+
+Embeds a fixed corpus with SentenceTransformer and with OnnxSentenceEncoder
+and reports the per-text cosine similarity between the two, then scores
+query/passage pairs with CrossEncoder and OnnxCrossEncoder and reports the
+rank agreement of the rerankings. Exits non-zero when the minimum cosine or
+the mean top-k overlap falls below the thresholds. Models are the configured
+EMBEDDING_MODEL and RERANKER_MODEL unless overridden.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import Config
+from utils.onnx_backend import OnnxSentenceEncoder, OnnxCrossEncoder
+
+CORPUS = [
+    "Qdrant stores vectors together with a JSON payload for filtering.",
+    "The reranker scores each query and passage pair with a cross-encoder.",
+    "Dynamic quantization converts weights to int8 ahead of time.",
+    "Activation ranges are computed on the fly for every batch.",
+    "Cosine similarity compares the angle between two embeddings.",
+    "Uploads larger than the configured limit are rejected.",
+    "A PDF is converted to text page by page before it is indexed.",
+    "The critic grades how completely the answer covers the question.",
+    "Feedback from users nudges the ranking of documents over time.",
+    "Connection pooling avoids a TCP handshake for every API call.",
+    "Batching many queries together amortizes the model overhead.",
+    "The weather in the mountains changes quickly in the afternoon.",
+    "Bake the bread at a high temperature for a crisp crust.",
+    "The museum opens at nine and closes at five on weekdays.",
+    "Short sentence.",
+    "A considerably longer passage that keeps going so that the tokenizer has to produce a sequence "
+    "far longer than the others in the batch, which exercises padding and the attention mask during "
+    "pooling, and makes sure truncation behaves the same way on both backends when it is reached.",
+]
+QUERIES = [
+    "how are vectors filtered",
+    "what does the reranker do",
+    "how does int8 quantization work",
+    "when does the museum open",
+    "how is a pdf indexed",
+]
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def check_embedder(model_name: str, texts, quantize: bool, min_cosine: float) -> bool:
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(texts, convert_to_numpy=True)
+    candidate = OnnxSentenceEncoder(model_name, quantize=quantize).encode(texts)
+    cosines = cosine_rows(reference, candidate)
+
+    # Retrieval agreement: nearest neighbour of every text within the corpus
+    def neighbours(matrix):
+        normed = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        similarity = normed @ normed.T
+        np.fill_diagonal(similarity, -np.inf)
+        return similarity.argmax(axis=1)
+
+    agreement = float((neighbours(reference) == neighbours(candidate)).mean())
+    print(f"Embedder {model_name}: cosine min={cosines.min():.5f} mean={cosines.mean():.5f} "
+          f"nearest-neighbour agreement={agreement:.3f}")
+    return cosines.min() >= min_cosine
+
+
+def check_reranker(model_name: str, texts, quantize: bool, top_k: int, min_overlap: float) -> bool:
+    from sentence_transformers import CrossEncoder
+
+    reference_model = CrossEncoder(model_name, device="cpu")
+    candidate_model = OnnxCrossEncoder(model_name, quantize=quantize)
+
+    overlaps = []
+    max_diff = 0.0
+    for query in QUERIES:
+        pairs = [(query, text) for text in texts]
+        reference = np.asarray(reference_model.predict(pairs))
+        candidate = candidate_model.predict(pairs)
+        max_diff = max(max_diff, float(np.abs(reference - candidate).max()))
+        k = min(top_k, len(texts))
+        overlaps.append(len(set(np.argsort(-reference)[:k]) & set(np.argsort(-candidate)[:k])) / k)
+
+    print(f"Reranker {model_name}: max |score diff|={max_diff:.5f} mean top-{top_k} overlap={np.mean(overlaps):.3f}")
+    return float(np.mean(overlaps)) >= min_overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX Runtime outputs with the PyTorch models")
+    parser.add_argument("--embedding-model", default=Config.embedding.MODEL_NAME)
+    parser.add_argument("--reranker-model", default=Config.reranking.RERANKER_MODEL)
+    parser.add_argument("--corpus", help="text file with one passage per line (default: built-in corpus)")
+    parser.add_argument("--no-quantize", action="store_true", help="check the fp32 export instead of int8")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    parser.add_argument("--skip-reranker", action="store_true")
+    args = parser.parse_args()
+
+    texts = CORPUS
+    if args.corpus:
+        texts = [line.strip() for line in Path(args.corpus).read_text().splitlines() if line.strip()]
+    quantize = not args.no_quantize
+
+    passed = check_embedder(args.embedding_model, texts, quantize, args.min_cosine)
+    if not args.skip_reranker:
+        passed = check_reranker(args.reranker_model, texts, quantize, args.top_k, args.min_overlap) and passed
+
+    print("OK" if passed else "FAIL: ONNX outputs drifted beyond the thresholds")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+CPU throughput of the embedder and reranker on each inference backend.
+
+    python benchmarks/onnx_backend_benchmark.py --texts 512 --batch-size 32
+
+Times SentenceTransformer / CrossEncoder (PyTorch) against the ONNX Runtime
+export in fp32 and dynamically quantized int8, on synthetic passages of
+mixed length. Thread count follows INFERENCE_INTRA_OP_THREADS (or
+OMP_NUM_THREADS) for both backends so the comparison is like for like.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import Config
+from utils.inference_executor import configure_torch_threads
+from utils.onnx_backend import OnnxSentenceEncoder, OnnxCrossEncoder
+
+WORDS = (
+    "retrieval vector index query document passage model score rank answer context chunk embedding "
+    "cluster shard replica latency throughput batch token sequence attention layer weight cache"
+).split()
+
+
+def make_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 200))) for _ in range(count)]
+
+
+def timed(fn, repeats: int) -> float:
+    fn()  # warm-up: first call pays for session / graph initialisation
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX Runtime inference throughput")
+    parser.add_argument("--embedding-model", default=Config.embedding.MODEL_NAME)
+    parser.add_argument("--reranker-model", default=Config.reranking.RERANKER_MODEL)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-reranker", action="store_true")
+    args = parser.parse_args()
+
+    threads = Config.inference.INFERENCE_INTRA_OP_THREADS or int(os.environ.get("OMP_NUM_THREADS", "0"))
+    configure_torch_threads(threads, 1)
+    texts = make_texts(args.texts)
+    pairs = [("how do batch queries reduce latency", text) for text in texts]
+
+    from sentence_transformers import SentenceTransformer, CrossEncoder
+
+    print(f"{args.texts} texts, batch size {args.batch_size}, threads {threads or 'default'}")
+    embedders = [
+        ("torch fp32", SentenceTransformer(args.embedding_model, device="cpu")),
+        ("onnx fp32", OnnxSentenceEncoder(args.embedding_model, quantize=False)),
+        ("onnx int8", OnnxSentenceEncoder(args.embedding_model, quantize=True)),
+    ]
+    for label, model in embedders:
+        seconds = timed(lambda: model.encode(texts, batch_size=args.batch_size), args.repeats)
+        print(f"  embedder {label:<11} {args.texts / seconds:9.1f} texts/s  ({seconds * 1000:8.1f}ms per pass)")
+
+    if args.skip_reranker:
+        return
+    rerankers = [
+        ("torch fp32", CrossEncoder(args.reranker_model, device="cpu")),
+        ("onnx fp32", OnnxCrossEncoder(args.reranker_model, quantize=False)),
+        ("onnx int8", OnnxCrossEncoder(args.reranker_model, quantize=True)),
+    ]
+    for label, model in rerankers:
+        seconds = timed(lambda: model.predict(pairs, batch_size=args.batch_size), args.repeats)
+        print(f"  reranker {label:<11} {len(pairs) / seconds:9.1f} pairs/s  ({seconds * 1000:8.1f}ms per pass)")
+
+
+if __name__ == "__main__":
+    main()
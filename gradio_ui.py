@@ -47,13 +47,26 @@ custom_css = """
 """
 
 class RAGGradioUI:
-    def __init__(self):
+    def __init__(self, client=None):
+        # Any object with the RAGAPIClient methods: HTTP by default, or
+        # LocalRAGClient when the UI runs in the same process as the API
+        self.client = client or api_client
         self.current_files = []
         self.current_collections = []
+        # Local mirrors of the server listings, kept current from the change
+        # feed so a refresh only transfers what changed since the last one
+        self._files_by_id: Dict[str, Dict[str, Any]] = {}
+        self._files_cursor: Optional[str] = None
+        self._files_df: Optional[pd.DataFrame] = None
+        self._file_choices: Optional[List[str]] = None
+        self._collection_names: Dict[str, None] = {}
+        self._collections_cursor: Optional[str] = None
+        self._collections_df: Optional[pd.DataFrame] = None
         self.chat_history = []
         self.last_query = None
         self.last_collection = None
         self.last_doc_ids = []
+        self.last_query_ticket = None
 
     # Utility functions
     def _format_response(self, response: Dict[str, Any]) -> str:
@@ -64,41 +77,119 @@ class RAGGradioUI:
         else:
             return f"❌ {response['error']}"
 
-    def _update_file_list(self) -> pd.DataFrame:
-        response = api_client.list_files()
-        if response["success"]:
-            files_data = response["data"].get("body", {}).get("files", [])
-            self.current_files = files_data
-
-            if files_data:
-                df = pd.DataFrame(files_data)
+    def _sync_listing(self, list_fn, cursor: Optional[str], key: str, apply_change, reset):
+        """
+        Bring one cached listing up to date. Returns (cursor, changed) on
+        success or the error message when the backend call fails.
+        """
+        changed = False
+        offset = 0
+        while True:
+            response = list_fn(since=cursor, offset=offset)
+            if not response["success"]:
+                return response["error"]
+            if response["data"].get("status") == "FAILURE":
+                return response["data"].get("message", "Failed to list items")
+
+            body = response["data"].get("body", {})
+            if key in body:
+                # Full listing: the cursor was missing or rejected
+                if offset == 0:
+                    reset()
+                    next_cursor = body.get("cursor")
+                for item in body[key]:
+                    apply_change({"op": "upsert", "item": item, "key": None})
+                changed = True
+                offset += len(body[key])
+                if body.get("has_more") and body[key]:
+                    continue
+                return next_cursor, changed
+
+            for change in body.get("changes", []):
+                apply_change(change)
+                changed = True
+            cursor = body.get("cursor", cursor)
+            if not body.get("has_more"):
+                return cursor, changed
+
+    def _apply_file_change(self, change: Dict[str, Any]) -> None:
+        item = change.get("item")
+        if change.get("op") == "delete":
+            self._files_by_id.pop(change.get("key"), None)
+        elif item:
+            self._files_by_id[item["file_id"]] = item
+
+    def _apply_collection_change(self, change: Dict[str, Any]) -> None:
+        name = change.get("key") or change.get("item")
+        if change.get("op") == "delete":
+            self._collection_names.pop(name, None)
+        elif name:
+            self._collection_names[name] = None
+
+    def _invalidate_files(self) -> None:
+        self.current_files = sorted(self._files_by_id.values(), key=lambda file: file.get("upload_date", ""))
+        self._files_df = None
+        self._file_choices = None
+
+    def _invalidate_collections(self) -> None:
+        self.current_collections = sorted(self._collection_names)
+        self._collections_df = None
+
+    def _file_list_view(self) -> pd.DataFrame:
+        if self._files_df is None:
+            if self.current_files:
+                df = pd.DataFrame(self.current_files)
                 # Reorder columns for better display
                 df = df[["filename", "file_size", "upload_date", "file_id"]]
                 df["file_size"] = df["file_size"].apply(lambda x: f"{x:,} bytes")
                 df["upload_date"] = pd.to_datetime(df["upload_date"]).dt.strftime("%Y-%m-%d %H:%M")
-                return df
+                self._files_df = df
             else:
-                return pd.DataFrame({"Message": ["No files uploaded yet"]})
-        else:
-            return pd.DataFrame({"Error": [response["error"]]})
-
-    def _update_collection_list(self) -> pd.DataFrame:
-        response = api_client.list_collections()
-        if response["success"]:
-            collections_data = response["data"].get("body", {}).get("collections", [])
-            self.current_collections = collections_data
+                self._files_df = pd.DataFrame({"Message": ["No files uploaded yet"]})
+        return self._files_df
 
-            if collections_data:
-                df = pd.DataFrame({"Collection Name": collections_data})
-                return df
+    def _collection_list_view(self) -> pd.DataFrame:
+        if self._collections_df is None:
+            if self.current_collections:
+                self._collections_df = pd.DataFrame({"Collection Name": self.current_collections})
             else:
-                return pd.DataFrame({"Message": ["No collections created yet"]})
-        else:
-            return pd.DataFrame({"Error": [response["error"]]})
+                self._collections_df = pd.DataFrame({"Message": ["No collections created yet"]})
+        return self._collections_df
+
+    def _update_file_list(self) -> pd.DataFrame:
+        result = self._sync_listing(
+            self.client.list_files, self._files_cursor, "files", self._apply_file_change, self._files_by_id.clear
+        )
+        if isinstance(result, str):
+            # The cached listing may have missed changes; reload it in full next time
+            self._files_cursor = None
+            return pd.DataFrame({"Error": [result]})
+
+        self._files_cursor, changed = result
+        if changed:
+            self._invalidate_files()
+        return self._file_list_view()
+
+    def _update_collection_list(self) -> pd.DataFrame:
+        result = self._sync_listing(
+            self.client.list_collections, self._collections_cursor, "collections",
+            self._apply_collection_change, self._collection_names.clear
+        )
+        if isinstance(result, str):
+            # The cached listing may have missed changes; reload it in full next time
+            self._collections_cursor = None
+            return pd.DataFrame({"Error": [result]})
+
+        self._collections_cursor, changed = result
+        if changed:
+            self._invalidate_collections()
+        return self._collection_list_view()
 
     def _get_file_choices(self) -> List[str]:
-        if self.current_files:
-            return [f"{file['filename']} ({file['file_id'][:8]}...)" for file in self.current_files]
+        if self._file_choices is None:
+            self._file_choices = [f"{file['filename']} ({file['file_id'][:8]}...)" for file in self.current_files]
+        if self._file_choices:
+            return self._file_choices
         return ["No files available"]
 
     def _get_file_id_from_choice(self, choice: str) -> Optional[str]:
@@ -199,12 +290,12 @@ class RAGGradioUI:
 
     def upload_file(self, file) -> Tuple[str, pd.DataFrame, gr.Dropdown, gr.Dropdown]:
         if file is None:
-            return "⚠️ Please select a file to upload", self._update_file_list(), gr.Dropdown(choices=self._get_file_choices()), gr.Dropdown(choices=self._get_file_choices())
+            return "⚠️ Please select a file to upload", self._file_list_view(), gr.Dropdown(choices=self._get_file_choices()), gr.Dropdown(choices=self._get_file_choices())
 
         try:
             file_content = file.read() if hasattr(file, 'read') else open(file.name, 'rb').read()
             filename = file.name.split('/')[-1] if hasattr(file, 'name') else 'uploaded_file'
-            response = api_client.upload_file(file_content, filename)
+            response = self.client.upload_file(file_content, filename)
 
             updated_df = self._update_file_list()
             updated_choices = self._get_file_choices()
@@ -222,9 +313,9 @@ class RAGGradioUI:
 
         if not file_id:
             choices = self._get_file_choices()
-            return "⚠️ Please select a file to delete", self._update_file_list(), gr.Dropdown(choices=choices), gr.Dropdown(choices=choices, multiselect=True)
+            return "⚠️ Please select a file to delete", self._file_list_view(), gr.Dropdown(choices=choices), gr.Dropdown(choices=choices, multiselect=True)
 
-        response = api_client.delete_file(file_id)
+        response = self.client.delete_file(file_id)
 
         updated_df = self._update_file_list()
         updated_choices = self._get_file_choices()
@@ -248,10 +339,10 @@ class RAGGradioUI:
     def create_collection(self, collection_name: str) -> Tuple[str, pd.DataFrame, gr.Dropdown, gr.Dropdown, gr.Dropdown]:
         if not collection_name.strip():
             choices = self._get_collection_choices()
-            return ("⚠️ Please enter a collection name", self._update_collection_list(),
+            return ("⚠️ Please enter a collection name", self._collection_list_view(),
                     gr.Dropdown(choices=choices), gr.Dropdown(choices=choices), gr.Dropdown(choices=choices))
 
-        response = api_client.create_collection(collection_name.strip())
+        response = self.client.create_collection(collection_name.strip())
         updated_df = self._update_collection_list()
         updated_choices = self._get_collection_choices()
 
@@ -292,7 +383,7 @@ class RAGGradioUI:
         if not files_to_link:
             return "⚠️ No valid files to link"
 
-        response = api_client.link_content(collection_name, files_to_link)
+        response = self.client.link_content(collection_name, files_to_link)
 
         # Handle 207 multi-status response
         if response["success"] and response["status_code"] == 207:
@@ -313,7 +404,7 @@ class RAGGradioUI:
         if not file_ids:
             return "⚠️ Selected files not found"
 
-        response = api_client.unlink_content(collection_name, file_ids)
+        response = self.client.unlink_content(collection_name, file_ids)
 
         # Handle 207 multi-status response
         if response["success"] and response["status_code"] == 207:
@@ -330,7 +421,7 @@ class RAGGradioUI:
         if not query.strip():
             return "⚠️ Please enter a search query"
 
-        response = api_client.query_collection(collection_name, query.strip())
+        response = self.client.query_collection(collection_name, query.strip())
 
         if response["success"]:
             data = response.get("data", {})
@@ -366,7 +457,7 @@ class RAGGradioUI:
         # Auto-disable critic if structured output is OFF
         actual_enable_critic = enable_critic and structured_output
 
-        response = api_client.query_collection(collection_name, message.strip(), actual_enable_critic)
+        response = self.client.query_collection(collection_name, message.strip(), actual_enable_critic)
 
         if response["success"]:
             data = response.get("data", {})
@@ -376,14 +467,14 @@ class RAGGradioUI:
             self.last_collection = collection_name
             chunks = data.get("chunks", [])
             self.last_doc_ids = [chunk.get("source", "") for chunk in chunks if chunk.get("source")]
+            self.last_query_ticket = data.get("query_ticket")
 
             if structured_output:
-                if not actual_enable_critic and "critic" in data:
-                    data_copy = data.copy()
+                data_copy = data.copy()
+                data_copy.pop("query_ticket", None)
+                if not actual_enable_critic:
                     data_copy.pop("critic", None)
-                    history[-1][1] = self._format_structured_response(data_copy)
-                else:
-                    history[-1][1] = self._format_structured_response(data)
+                history[-1][1] = self._format_structured_response(data_copy)
             else:
                 answer = data.get("answer", "No answer")
                 history[-1][1] = answer
@@ -393,6 +484,7 @@ class RAGGradioUI:
             self.last_query = None
             self.last_collection = None
             self.last_doc_ids = []
+            self.last_query_ticket = None
 
         return history, ""
 
@@ -400,6 +492,7 @@ class RAGGradioUI:
         self.last_query = None
         self.last_collection = None
         self.last_doc_ids = []
+        self.last_query_ticket = None
         return []
 
     def submit_feedback(self, label: int) -> str:
@@ -407,11 +500,12 @@ class RAGGradioUI:
             return "❌ No recent query to rate"
 
         try:
-            response = api_client.submit_feedback(
+            response = self.client.submit_feedback(
                 self.last_query,
                 self.last_doc_ids,
                 label,
-                self.last_collection
+                self.last_collection,
+                self.last_query_ticket
             )
             if response["success"]:
                 rating_text = "👍 Good" if label == 1 else "👎 Bad"
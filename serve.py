@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Production entry point.
+
+The parent process imports the API (loading the embedding, reranker and
+critic models once), binds the listening socket and forks API_WORKERS uvicorn
+workers that share the loaded weights copy-on-write and accept on the same
+socket. Crashed workers are replaced. The Gradio UI runs as a separate
+process that talks to the API over HTTP.
+
+    python serve.py --workers 4 --threads 2
+    python serve.py --no-gradio
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from config import Config
+from utils.inference_executor import configure_torch_threads
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("serve")
+
+
+def threads_per_worker(workers: int, threads: int) -> int:
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def limit_native_threads(threads: int) -> None:
+    # Must run before torch / numpy are imported to take effect for OpenMP and BLAS pools
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(name, str(threads))
+    # HF tokenizers' own thread pool does not survive fork()
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    # An explicit IPPROTO_TCP lets asyncio recognise accepted connections as TCP
+    # and enable TCP_NODELAY on them; without it keep-alive requests stall on
+    # Nagle + delayed ACK for ~40ms each
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, threads: int) -> None:
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    configure_torch_threads(threads, 1)
+
+    config = uvicorn.Config(app, log_level="info", access_log=True)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        # spawn_worker leaves with os._exit, which skips atexit and multiprocessing's
+        # child cleanup; without this the embedding pool's processes outlive the worker
+        from utils.embedding_client import EmbeddingClient
+        EmbeddingClient.close_pool()
+
+
+def spawn_worker(app, sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            run_worker(app, sock, threads)
+        except BaseException as e:
+            logger.error(f"API worker failed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    logger.info(f"Started API worker {pid} ({threads} torch threads)")
+    return pid
+
+
+def start_gradio_process() -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "--gradio"])
+
+
+def run_gradio() -> None:
+    from app import wait_for_api_server, create_gradio_app
+
+    if not wait_for_api_server():
+        sys.exit(1)
+    # The UI process does not load the models; it always reaches the workers over HTTP
+    demo = create_gradio_app(transport="http")
+    demo.launch(
+        server_name="0.0.0.0",
+        server_port=Config.app.GRADIO_PORT,
+        share=False,
+        show_error=True,
+        show_api=False,
+        inbrowser=False
+    )
+
+
+def serve(host: str, port: int, workers: int, threads: int, with_gradio: bool) -> None:
+    limit_native_threads(threads)
+
+    logger.info("Loading API and models in the parent process...")
+    started = time.time()
+    from main import app
+    from utils.embedding_client import EmbeddingClient
+    from core.reranker import reranker
+    # Models load lazily; load the weights here so the workers share them
+    # copy-on-write. The first forward pass (and torch's thread pools) is left
+    # to each worker's warm-up, since forking after it is not safe
+    EmbeddingClient().load()
+    reranker.load()
+    # Move everything loaded so far out of the collector's reach, so GC passes
+    # in the workers do not touch (and thereby copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Models loaded in {time.time() - started:.1f}s")
+
+    sock = bind_socket(host, port)
+    logger.info(f"Listening on {host}:{port} with {workers} workers")
+
+    children = {}
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        children[spawn_worker(app, sock, threads)] = "api"
+
+    if with_gradio:
+        gradio = start_gradio_process()
+        children[gradio.pid] = "gradio"
+        logger.info(f"Started Gradio UI process {gradio.pid} on port {Config.app.GRADIO_PORT}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        role = children.pop(pid, None)
+        if role is None or stopping:
+            continue
+
+        logger.warning(f"{role} process {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+        if role == "api":
+            # Back off briefly so a worker that dies on startup does not spin
+            time.sleep(1)
+            children[spawn_worker(app, sock, threads)] = "api"
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RAG Engine API with pre-forked workers")
+    parser.add_argument("--host", default=Config.app.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.app.API_PORT)
+    parser.add_argument("--workers", type=int, default=Config.app.API_WORKERS)
+    parser.add_argument("--threads", type=int, default=Config.app.TORCH_THREADS_PER_WORKER,
+                        help="torch intra-op threads per worker (0 = CPU count / workers)")
+    parser.add_argument("--no-gradio", action="store_true", help="do not start the Gradio UI process")
+    parser.add_argument("--gradio", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gradio:
+        run_gradio()
+        return
+
+    workers = max(1, args.workers)
+    serve(args.host, args.port, workers, threads_per_worker(workers, args.threads), not args.no_gradio)
+
+
+if __name__ == "__main__":
+    main()
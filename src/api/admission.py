@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict
+from fastapi import HTTPException
+from config import Config
+from utils.metrics import metrics
+
+queue_wait_seconds = metrics.histogram(
+    "rag_admission_queue_wait_seconds", "Time a request waited for an admission slot", ["pool"]
+)
+
+
+class AdmissionController:
+    """
+    Bounded concurrency gate for an expensive endpoint family.
+
+    Up to max_concurrent requests run at once and up to max_queue more wait in
+    FIFO order. A full queue is rejected immediately with 429; a request that
+    waits longer than queue_timeout is rejected with 503. Both carry a
+    Retry-After header estimated from recent service times.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue: deque = deque()
+        self._service_time = 1.0
+        self._queue_waits: deque = deque(maxlen=1000)
+        self._stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def _retry_after(self) -> int:
+        backlog = len(self._queue) + self._active
+        return max(1, math.ceil(self._service_time * backlog / self.max_concurrent))
+
+    def _reject(self, status_code: int, reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=f"{self.name} capacity exceeded: {reason}",
+            headers={"Retry-After": str(self._retry_after())}
+        )
+
+    def _acquire(self) -> float:
+        enqueued_at = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrent and not self._queue:
+                self._active += 1
+                self._stats["admitted"] += 1
+                self._queue_waits.append(0.0)
+                queue_wait_seconds.observe(0.0, pool=self.name)
+                return 0.0
+
+            if len(self._queue) >= self.max_queue:
+                self._stats["rejected_queue_full"] += 1
+                raise self._reject(429, "queue full")
+
+            ticket = object()
+            self._queue.append(ticket)
+            deadline = enqueued_at + self.queue_timeout
+            while self._queue[0] is not ticket or self._active >= self.max_concurrent:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self._stats["rejected_timeout"] += 1
+                    self._cond.notify_all()
+                    raise self._reject(503, "timed out waiting in queue")
+                self._cond.wait(remaining)
+
+            self._queue.popleft()
+            self._active += 1
+            self._stats["admitted"] += 1
+            waited = time.monotonic() - enqueued_at
+            self._queue_waits.append(waited)
+            queue_wait_seconds.observe(waited, pool=self.name)
+            # Wake the next waiter in case another slot is already free
+            self._cond.notify_all()
+            return waited
+
+    def _release(self, service_time: float) -> None:
+        with self._cond:
+            self._active -= 1
+            # Exponentially weighted service time drives the Retry-After estimate
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self):
+        if not Config.admission.ADMISSION_ENABLED:
+            yield 0.0
+            return
+
+        waited = self._acquire()
+        started_at = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._release(time.monotonic() - started_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            waits = sorted(self._queue_waits)
+            stats.update({
+                "active": self._active,
+                "queued": len(self._queue),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue
+            })
+
+        for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            stats[f"queue_wait_{label}_seconds"] = waits[int(q * (len(waits) - 1))] if waits else 0.0
+        return stats
+
+
+query_admission = AdmissionController(
+    "query",
+    Config.admission.QUERY_MAX_CONCURRENCY,
+    Config.admission.QUERY_MAX_QUEUE,
+    Config.admission.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+
+ingest_admission = AdmissionController(
+    "ingest",
+    Config.admission.INGEST_MAX_CONCURRENCY,
+    Config.admission.INGEST_MAX_QUEUE,
+    Config.admission.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+
+
+def _admission_samples():
+    samples = []
+    for controller in (query_admission, ingest_admission):
+        stats = controller.get_stats()
+        pool = {"pool": controller.name}
+        samples.append(("rag_admission_in_flight", "gauge", "Requests holding an admission slot", pool, stats["active"]))
+        samples.append(("rag_admission_queued", "gauge", "Requests waiting for an admission slot", pool, stats["queued"]))
+        samples.append(("rag_admission_rejected_total", "counter", "Requests rejected by admission control",
+                        {**pool, "reason": "queue_full"}, stats["rejected_queue_full"]))
+        samples.append(("rag_admission_rejected_total", "counter", "Requests rejected by admission control",
+                        {**pool, "reason": "timeout"}, stats["rejected_timeout"]))
+    return samples
+
+
+metrics.register_collector(_admission_samples)
+
+
+def size_threadpool() -> int:
+    """
+    Grow anyio's worker thread limit (40 by default) so that admitted and
+    queued requests, which each block a thread, can never take all of it:
+    other sync routes keep ADMISSION_THREADPOOL_HEADROOM threads and still
+    get their 429/503 instead of starving. Must run inside the event loop.
+    Returns the resulting limit.
+    """
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if Config.admission.ADMISSION_ENABLED:
+        reserved = sum(c.max_concurrent + c.max_queue for c in (query_admission, ingest_admission))
+        limiter.total_tokens = max(limiter.total_tokens, reserved + Config.admission.ADMISSION_THREADPOOL_HEADROOM)
+    return limiter.total_tokens
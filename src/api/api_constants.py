@@ -3,7 +3,12 @@ COLLECTION_STATUS = "/collection/status"
 LINK_CONTENT = "/link-content"
 UNLINK_CONTENT = "/unlink-content"
 QUERY_COLLECTION = "/query"
+QUERY_BATCH = "/query-batch"
+FEDERATED_QUERY = "/federated-query"
 BATCH_READ_FILES = "/files/batch-read"
 CONFIG_BASE = "/config"
 FILES_BASE = "/files"
+STATS_BASE = "/stats"
+HEALTHZ = "/healthz"
+READYZ = "/readyz"
 API_PREFIX = "/api/v1"
\ No newline at end of file
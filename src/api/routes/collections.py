@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, Response
-from typing import List
+from typing import List, Optional
+from config import Config
 from api.api_constants import *
-from models.api_models import CreateCollectionRequest, ApiResponse, ApiResponseWithBody, LinkContentItem, LinkContentResponse, QueryRequest, QueryResponse, UnlinkContentResponse
+from api.admission import query_admission, ingest_admission
+from models.api_models import CreateCollectionRequest, ApiResponse, ApiResponseWithBody, LinkContentItem, LinkContentResponse, QueryRequest, QueryResponse, UnlinkContentResponse, BatchQueryRequest, BatchQueryResponse, FederatedQueryRequest
 from services.collection_service import CollectionService
 
 router = APIRouter()
 collection_service = CollectionService()
 
 @router.get("/collections")
-def list_collections() -> ApiResponseWithBody:
-    return collection_service.list_collections()
+def list_collections(since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> ApiResponseWithBody:
+    return collection_service.list_collections(since, offset, limit)
 
 @router.get(COLLECTIONS_BASE + "/{collection_name}")
 def get_collection(collection_name: str) -> ApiResponse:
@@ -30,8 +32,9 @@ def delete_collection(collection_name: str) -> ApiResponse:
 
 @router.post("/{collection_name}" + LINK_CONTENT)
 def link_content(collection_name: str, files: List[LinkContentItem], response: Response) -> List[LinkContentResponse]:
-    response.status_code = 207
-    return collection_service.link_content(collection_name, files)
+    with ingest_admission.admit():
+        response.status_code = 207
+        return collection_service.link_content(collection_name, files)
 
 @router.post("/{collection_name}" + UNLINK_CONTENT)
 def unlink_content(collection_name: str, file_ids: List[str], response: Response) -> List[UnlinkContentResponse]:
@@ -40,5 +43,32 @@ def unlink_content(collection_name: str, file_ids: List[str], response: Response
 
 @router.post("/{collection_name}" + QUERY_COLLECTION)
 def query_collection(collection_name: str, request: QueryRequest) -> QueryResponse:
-    return collection_service.query_collection(collection_name, request.query, request.enable_critic)
+    # Admission is taken inside the singleflight, so duplicates of an in-flight query hold no slot
+    return collection_service.query_collection(
+        collection_name, request.query, request.enable_critic, bypass_cache=request.bypass_cache,
+        admit=query_admission.admit
+    )
 
+@router.post("/{collection_name}" + QUERY_BATCH)
+def query_collection_batch(collection_name: str, request: BatchQueryRequest) -> BatchQueryResponse:
+    if len(request.queries) > Config.query.QUERY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.queries)} queries exceeds the limit of {Config.query.QUERY_BATCH_MAX_SIZE}"
+        )
+    with query_admission.admit():
+        return collection_service.query_collection_batch(
+            collection_name, request.queries, request.enable_critic, bypass_cache=request.bypass_cache
+        )
+
+@router.post(FEDERATED_QUERY)
+def query_federated(request: FederatedQueryRequest) -> QueryResponse:
+    if len(request.collections) > Config.query.QUERY_FEDERATION_MAX_COLLECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {Config.query.QUERY_FEDERATION_MAX_COLLECTIONS} collections can be queried together"
+        )
+    return collection_service.query_federated(
+        request.collections, request.query, request.enable_critic, bypass_cache=request.bypass_cache,
+        admit=query_admission.admit
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from models.api_models import FeedbackRequest, FeedbackResponse
+from models.api_models import FeedbackRequest, FeedbackResponse, ApiResponseWithBody
 from services.feedback_service import FeedbackService
 
 router = APIRouter()
@@ -11,7 +11,8 @@ def submit_feedback(request: FeedbackRequest) -> FeedbackResponse:
         query=request.query,
         doc_ids=request.doc_ids,
         label=request.label,
-        collection=request.collection
+        collection=request.collection,
+        query_ticket=request.query_ticket
     )
 
     if success:
@@ -23,4 +24,20 @@ def submit_feedback(request: FeedbackRequest) -> FeedbackResponse:
         return FeedbackResponse(
             status="FAILURE",
             message="Failed to save feedback"
-        )
\ No newline at end of file
+        )
+
+@router.post("/feedback/compact")
+def compact_feedback() -> ApiResponseWithBody:
+    result = feedback_service.compact_feedback()
+
+    if result is None:
+        return ApiResponseWithBody(
+            status="FAILURE",
+            message="Failed to compact feedback",
+            body={}
+        )
+    return ApiResponseWithBody(
+        status="SUCCESS",
+        message="Feedback compacted successfully",
+        body=result
+    )
\ No newline at end of file
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from typing import List, Optional
 from api.api_constants import *
 from models.api_models import ApiResponse, ApiResponseWithBody, FileUploadResponse
 from services.file_service import FileService
@@ -12,12 +12,11 @@ def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
     return file_service.upload_file(file)
 
 @router.get(FILES_BASE)
-def list_files() -> ApiResponseWithBody:
-    files = file_service.list_files()
+def list_files(since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> ApiResponseWithBody:
     return ApiResponseWithBody(
         status="SUCCESS",
         message="Files retrieved successfully",
-        body={"files": files}
+        body=file_service.list_files_since(since, offset, limit)
     )
 
 @router.get(FILES_BASE + "/{file_id}")
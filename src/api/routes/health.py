@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Response
+from api.api_constants import *
+from api.routes.collections import collection_service
+from core.reranker import reranker
+from utils.readiness import readiness
+
+router = APIRouter()
+
+
+def _check_qdrant() -> None:
+    if not collection_service.qdrant_repo.ping():
+        raise ConnectionError("Qdrant is not reachable")
+
+
+# Models load lazily; the warm-up loads them and runs the first forward pass
+readiness.register("qdrant", _check_qdrant)
+readiness.register("embedder", collection_service.embedding_client.warm_up)
+readiness.register("reranker", reranker.warm_up)
+
+
+# async so probes run on the event loop and never wait behind sync routes for a threadpool thread
+@router.get(HEALTHZ)
+async def healthz():
+    return {"status": "alive"}
+
+
+@router.get(READYZ)
+async def readyz(response: Response):
+    if not readiness.is_ready():
+        response.status_code = 503
+    return readiness.snapshot()
@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from api.api_constants import *
+from models.api_models import ApiResponseWithBody
+from utils.llm_client import llm_metrics
+from utils.llm_cache import llm_cache
+from services.collection_service import query_singleflight
+from api.admission import query_admission, ingest_admission
+from utils.metrics import stage_latency_summary
+from utils.inference_executor import inference_executor
+from repositories.feedback_repository import FeedbackRepository
+from repositories.query_ticket_repository import QueryTicketRepository
+
+router = APIRouter()
+
+@router.get(STATS_BASE)
+def get_stats() -> ApiResponseWithBody:
+    return ApiResponseWithBody(
+        status="SUCCESS",
+        message="Stats retrieved successfully",
+        body={
+            "llm": llm_metrics.snapshot(),
+            "llm_cache": llm_cache.get_stats(),
+            "query_coalescing": query_singleflight.get_stats(),
+            "query_tickets": QueryTicketRepository().get_stats(),
+            "admission": {
+                "query": query_admission.get_stats(),
+                "ingest": ingest_admission.get_stats()
+            },
+            "stages": stage_latency_summary(),
+            "feedback_writer": FeedbackRepository().writer.get_stats(),
+            "inference": inference_executor.get_stats()
+        }
+    )
@@ -1,56 +1,68 @@
 import requests
+import httpx
 import logging
 import time
 from typing import Dict, Any, Optional, List
 from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class RAGAPIClient:
-    def __init__(self, base_url: str = "http://localhost:8000/api/v1"):
-        self.base_url = base_url
+# Only requests that are safe to repeat are retried after a response or read error;
+# connection failures are retried for every method since nothing reached the server
+RETRY_METHODS = frozenset(["GET", "HEAD", "DELETE", "OPTIONS"])
+RETRY_STATUSES = (502, 503, 504)
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        url = f"{self.base_url}{endpoint}"
-        start_time = time.time()
 
-        try:
-            logger.info(f"API Call: {method} {url}")
-            response = requests.request(method, url, **kwargs)
+def _parse_response(status_code: int, json_body, text: str) -> Dict[str, Any]:
+    if status_code in [200, 207]:
+        return {"success": True, "data": json_body(), "status_code": status_code}
 
-            elapsed_time = round((time.time() - start_time) * 1000, 2)
-            logger.info(f"Response: {response.status_code} in {elapsed_time}ms")
+    error_msg = f"API Error: {status_code}"
+    try:
+        error_detail = json_body()
+        error_msg += f" - {error_detail}"
+    except:
+        error_msg += f" - {text}"
 
-            if response.status_code in [200, 207]:
-                return {"success": True, "data": response.json(), "status_code": response.status_code}
-            else:
-                error_msg = f"API Error: {response.status_code}"
-                try:
-                    error_detail = response.json()
-                    error_msg += f" - {error_detail}"
-                except:
-                    error_msg += f" - {response.text}"
+    logger.error(error_msg)
+    return {"success": False, "error": error_msg, "status_code": status_code}
 
-                logger.error(error_msg)
-                return {"success": False, "error": error_msg, "status_code": response.status_code}
 
-        except requests.exceptions.ConnectionError:
-            error_msg = "Connection Error: Could not connect to backend API"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg, "status_code": 0}
-        except Exception as e:
-            error_msg = f"Request Error: {str(e)}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg, "status_code": 0}
+def _listing_params(since: Optional[str], offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    params = {"since": since, "offset": offset or None, "limit": limit}
+    return {key: value for key, value in params.items() if value is not None}
+
+
+class BaseRAGAPIClient:
+    """
+    Endpoint methods shared by the sync and async clients. Each one returns
+    whatever `_make_request` returns: a result dict for RAGAPIClient, an
+    awaitable of one for AsyncRAGAPIClient.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 pool_size: Optional[int] = None):
+        self.base_url = base_url or Config.api_client.API_BASE_URL
+        self.connect_timeout = connect_timeout if connect_timeout is not None else Config.api_client.API_CLIENT_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout if read_timeout is not None else Config.api_client.API_CLIENT_READ_TIMEOUT
+        self.max_retries = max_retries if max_retries is not None else Config.api_client.API_CLIENT_MAX_RETRIES
+        self.pool_size = pool_size or Config.api_client.API_CLIENT_POOL_SIZE
+
+    def _make_request(self, method: str, endpoint: str, **kwargs):
+        raise NotImplementedError
 
     # File Management APIs
     def upload_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         files = {"file": (filename, BytesIO(file_content), "application/octet-stream")}
         return self._make_request("POST", "/files", files=files)
 
-    def list_files(self) -> Dict[str, Any]:
-        return self._make_request("GET", "/files")
+    def list_files(self, since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        return self._make_request("GET", "/files", params=_listing_params(since, offset, limit))
 
     def get_file(self, file_id: str) -> Dict[str, Any]:
         return self._make_request("GET", f"/files/{file_id}")
@@ -59,9 +71,9 @@ class RAGAPIClient:
         return self._make_request("DELETE", f"/files/{file_id}")
 
     # Collection Management APIs
-    def list_collections(self) -> Dict[str, Any]:
-        """List all collections"""
-        return self._make_request("GET", "/collections")
+    def list_collections(self, since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """List all collections, or only the changes after a `since` cursor"""
+        return self._make_request("GET", "/collections", params=_listing_params(since, offset, limit))
 
     def get_collection(self, collection_name: str) -> Dict[str, Any]:
         """Check if a specific collection exists"""
@@ -90,14 +102,126 @@ class RAGAPIClient:
         data = {"query": query, "enable_critic": enable_critic}
         return self._make_request("POST", f"/{collection_name}/query", json=data)
 
-    def submit_feedback(self, query: str, doc_ids: List[str], label: int, collection: str) -> Dict[str, Any]:
+    def query_collection_batch(self, collection_name: str, queries: List[str], enable_critic: bool = True) -> Dict[str, Any]:
+        data = {"queries": queries, "enable_critic": enable_critic}
+        return self._make_request("POST", f"/{collection_name}/query-batch", json=data)
+
+    def query_federated(self, collections: List[str], query: str, enable_critic: bool = True) -> Dict[str, Any]:
+        data = {"collections": collections, "query": query, "enable_critic": enable_critic}
+        return self._make_request("POST", "/federated-query", json=data)
+
+    def submit_feedback(self, query: str, doc_ids: List[str], label: int, collection: str,
+                        query_ticket: Optional[str] = None) -> Dict[str, Any]:
         data = {
             "query": query,
             "doc_ids": doc_ids,
             "label": label,
             "collection": collection
         }
+        if query_ticket:
+            data["query_ticket"] = query_ticket
         return self._make_request("POST", "/feedback", json=data)
 
 
-api_client = RAGAPIClient()
\ No newline at end of file
+class RAGAPIClient(BaseRAGAPIClient):
+    """Blocking client over one pooled keep-alive requests.Session."""
+
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        url = f"{self.base_url}{endpoint}"
+        start_time = time.time()
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+
+        try:
+            logger.info(f"API Call: {method} {url}")
+            response = self.session.request(method, url, **kwargs)
+
+            elapsed_time = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"Response: {response.status_code} in {elapsed_time}ms")
+
+            return _parse_response(response.status_code, response.json, response.text)
+
+        except requests.exceptions.ConnectionError:
+            error_msg = "Connection Error: Could not connect to backend API"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+        except requests.exceptions.Timeout:
+            error_msg = "Timeout Error: Backend API did not respond in time"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+        except Exception as e:
+            error_msg = f"Request Error: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncRAGAPIClient(BaseRAGAPIClient):
+    """
+    asyncio client with the same methods as RAGAPIClient, each returning an
+    awaitable. Use as `async with AsyncRAGAPIClient() as client:` or call
+    `aclose()` when done.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            # httpx transports only retry failed connection attempts
+            transport=httpx.AsyncHTTPTransport(retries=self.max_retries)
+        )
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        url = f"{self.base_url}{endpoint}"
+        start_time = time.time()
+
+        try:
+            logger.info(f"API Call: {method} {url}")
+            response = await self.client.request(method, url, **kwargs)
+
+            elapsed_time = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"Response: {response.status_code} in {elapsed_time}ms")
+
+            return _parse_response(response.status_code, response.json, response.text)
+
+        except httpx.ConnectError:
+            error_msg = "Connection Error: Could not connect to backend API"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+        except httpx.TimeoutException:
+            error_msg = "Timeout Error: Backend API did not respond in time"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+        except Exception as e:
+            error_msg = f"Request Error: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+api_client = RAGAPIClient()
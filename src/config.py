@@ -10,13 +10,29 @@ class DatabaseConfig:
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", "6333"))
     QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", "30"))
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
+    # gRPC sends vectors as packed floats instead of JSON number text
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    QDRANT_UPLOAD_BATCH_SIZE: int = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "64"))
 
 class EmbeddingConfig:
     MODEL_NAME: str = os.getenv("EMBEDDING_MODEL", "BAAI/bge-large-en-v1.5")
+    # "torch" (sentence-transformers) or "onnx" (ONNX Runtime, see InferenceConfig.ONNX_*)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
     VECTOR_SIZE: int = int(os.getenv("VECTOR_SIZE", "1024"))
     DISTANCE_METRIC: str = os.getenv("DISTANCE_METRIC", "COSINE")
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "512"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "50"))
+    # Bulk encoding packs length-sorted texts into batches of about this many (padded) tokens
+    EMBEDDING_BULK_BATCH_TOKENS: int = int(os.getenv("EMBEDDING_BULK_BATCH_TOKENS", "16384"))
+    EMBEDDING_BULK_MAX_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BULK_MAX_BATCH_SIZE", "128"))
+    # link-content reads and bulk-encodes files in chunks of at most this many, bounding memory
+    INGEST_BULK_MAX_FILES: int = int(os.getenv("INGEST_BULK_MAX_FILES", "256"))
+    # Worker processes for bulk encoding (0 disables the pool); used for inputs of at least MIN_TEXTS
+    EMBEDDING_POOL_PROCESSES: int = int(os.getenv("EMBEDDING_POOL_PROCESSES", "0"))
+    EMBEDDING_POOL_THREADS_PER_PROCESS: int = int(os.getenv("EMBEDDING_POOL_THREADS_PER_PROCESS", "0"))
+    EMBEDDING_POOL_MIN_TEXTS: int = int(os.getenv("EMBEDDING_POOL_MIN_TEXTS", "256"))
+    EMBEDDING_POOL_BATCH_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_POOL_BATCH_TIMEOUT_SECONDS", "300"))
 
 class LlmConfig:
     PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")
@@ -28,6 +44,19 @@ class LlmConfig:
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
     GEMINI_MAX_TOKENS: int = int(os.getenv("GEMINI_MAX_TOKENS", "4000"))
     GEMINI_TEMPERATURE: float = float(os.getenv("GEMINI_TEMPERATURE", "0.1"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_SECONDS: float = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+    LLM_RETRY_BACKOFF_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_BACKOFF_MAX_SECONDS", "8"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "5"))
+    LLM_FALLBACK_ENABLED: bool = os.getenv("LLM_FALLBACK_ENABLED", "true").lower() == "true"
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "16"))
+    FAKE_LLM_LATENCY_SECONDS: float = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0"))
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
 
 class AppConfig:
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
@@ -36,9 +65,18 @@ class AppConfig:
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     UPLOADS_DIR: str = os.getenv("UPLOADS_DIR", "uploads")
     MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "100"))
+    API_WORKERS: int = int(os.getenv("API_WORKERS", "2"))
+    TORCH_THREADS_PER_WORKER: int = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+    GRADIO_PORT: int = int(os.getenv("GRADIO_PORT", "7860"))
+    CHANGE_LOG_MAX_BYTES: int = int(os.getenv("CHANGE_LOG_MAX_BYTES", "1048576"))
+    UI_TRANSPORT: str = os.getenv("UI_TRANSPORT", "local")
+    READINESS_RETRY_SECONDS: float = float(os.getenv("READINESS_RETRY_SECONDS", "2"))
+    READINESS_TIMEOUT_SECONDS: float = float(os.getenv("READINESS_TIMEOUT_SECONDS", "300"))
+    READINESS_POLL_SECONDS: float = float(os.getenv("READINESS_POLL_SECONDS", "0.25"))
 
 class RerankingConfig:
     RERANKER_MODEL: str = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANKER_BACKEND: str = os.getenv("RERANKER_BACKEND", "torch")
     RERANKER_TOP_K: int = int(os.getenv("RERANKER_TOP_K", "5"))
     RERANKER_ENABLED: bool = os.getenv("RERANKER_ENABLED", "true").lower() == "true"
 
@@ -51,6 +89,64 @@ class CriticConfig:
 class FeedbackConfig:
     FEEDBACK_ENABLED: bool = os.getenv("FEEDBACK_ENABLED", "true").lower() == "true"
     FEEDBACK_SIMILARITY_THRESHOLD: float = float(os.getenv("FEEDBACK_SIMILARITY_THRESHOLD", "0.8"))
+    FEEDBACK_STORAGE_FORMAT: str = os.getenv("FEEDBACK_STORAGE_FORMAT", "binary")
+    FEEDBACK_FILE: str = os.getenv("FEEDBACK_FILE", "feedback_data.jsonl")
+    FEEDBACK_STORE_DIR: str = os.getenv("FEEDBACK_STORE_DIR", "feedback_store")
+    FEEDBACK_VECTOR_DTYPE: str = os.getenv("FEEDBACK_VECTOR_DTYPE", "float32")
+    FEEDBACK_FSYNC: bool = os.getenv("FEEDBACK_FSYNC", "true").lower() == "true"
+    FEEDBACK_CLUSTER_RADIUS: float = float(os.getenv("FEEDBACK_CLUSTER_RADIUS", "0.95"))
+    FEEDBACK_INDEX_MODE: str = os.getenv("FEEDBACK_INDEX_MODE", "exact")
+    FEEDBACK_ANN_NLIST: int = int(os.getenv("FEEDBACK_ANN_NLIST", "0"))
+    FEEDBACK_ANN_NPROBE: int = int(os.getenv("FEEDBACK_ANN_NPROBE", "16"))
+    FEEDBACK_ANN_MIN_ENTRIES: int = int(os.getenv("FEEDBACK_ANN_MIN_ENTRIES", "20000"))
+    FEEDBACK_COMPACTION_RADIUS: float = float(os.getenv("FEEDBACK_COMPACTION_RADIUS", "0.98"))
+    FEEDBACK_DECAY_HALF_LIFE_DAYS: float = float(os.getenv("FEEDBACK_DECAY_HALF_LIFE_DAYS", "30"))
+    FEEDBACK_COMPACTION_MIN_WEIGHT: float = float(os.getenv("FEEDBACK_COMPACTION_MIN_WEIGHT", "0.05"))
+    FEEDBACK_ASYNC_WRITES: bool = os.getenv("FEEDBACK_ASYNC_WRITES", "true").lower() == "true"
+    FEEDBACK_ACK_POLICY: str = os.getenv("FEEDBACK_ACK_POLICY", "written")
+    FEEDBACK_ACK_TIMEOUT_SECONDS: float = float(os.getenv("FEEDBACK_ACK_TIMEOUT_SECONDS", "5"))
+    FEEDBACK_FSYNC_INTERVAL_SECONDS: float = float(os.getenv("FEEDBACK_FSYNC_INTERVAL_SECONDS", "0"))
+    FEEDBACK_WRITER_QUEUE_SIZE: int = int(os.getenv("FEEDBACK_WRITER_QUEUE_SIZE", "1000"))
+    FEEDBACK_WRITER_MAX_BATCH: int = int(os.getenv("FEEDBACK_WRITER_MAX_BATCH", "256"))
+    FEEDBACK_WRITER_LINGER_SECONDS: float = float(os.getenv("FEEDBACK_WRITER_LINGER_SECONDS", "0.005"))
+
+class QueryConfig:
+    QUERY_COALESCING_ENABLED: bool = os.getenv("QUERY_COALESCING_ENABLED", "true").lower() == "true"
+    QUERY_TICKET_TTL_SECONDS: float = float(os.getenv("QUERY_TICKET_TTL_SECONDS", "900"))
+    QUERY_BATCH_MAX_SIZE: int = int(os.getenv("QUERY_BATCH_MAX_SIZE", "256"))
+    QUERY_BATCH_LLM_CONCURRENCY: int = int(os.getenv("QUERY_BATCH_LLM_CONCURRENCY", "8"))
+    QUERY_FEDERATION_MAX_COLLECTIONS: int = int(os.getenv("QUERY_FEDERATION_MAX_COLLECTIONS", "16"))
+    QUERY_TICKET_MAX_ENTRIES: int = int(os.getenv("QUERY_TICKET_MAX_ENTRIES", "10000"))
+    # SQLite file shared by all worker processes, so feedback can land on any worker
+    QUERY_TICKET_PATH: str = os.getenv("QUERY_TICKET_PATH", "query_tickets.sqlite3")
+
+class AdmissionConfig:
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    QUERY_MAX_CONCURRENCY: int = int(os.getenv("QUERY_MAX_CONCURRENCY", "4"))
+    QUERY_MAX_QUEUE: int = int(os.getenv("QUERY_MAX_QUEUE", "32"))
+    INGEST_MAX_CONCURRENCY: int = int(os.getenv("INGEST_MAX_CONCURRENCY", "2"))
+    INGEST_MAX_QUEUE: int = int(os.getenv("INGEST_MAX_QUEUE", "8"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+    # Threadpool threads kept free for other routes when every admission slot and queue is full
+    ADMISSION_THREADPOOL_HEADROOM: int = int(os.getenv("ADMISSION_THREADPOOL_HEADROOM", "16"))
+
+class MetricsConfig:
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+class InferenceConfig:
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "1"))
+    # 0 keeps torch's current setting (serve.py sizes it per worker process)
+    INFERENCE_INTRA_OP_THREADS: int = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "0"))
+    INFERENCE_INTER_OP_THREADS: int = int(os.getenv("INFERENCE_INTER_OP_THREADS", "1"))
+    ONNX_CACHE_DIR: str = os.getenv("ONNX_CACHE_DIR", "onnx_models")
+    ONNX_QUANTIZE: bool = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+
+class ApiClientConfig:
+    API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
+    API_CLIENT_CONNECT_TIMEOUT: float = float(os.getenv("API_CLIENT_CONNECT_TIMEOUT", "3.05"))
+    API_CLIENT_READ_TIMEOUT: float = float(os.getenv("API_CLIENT_READ_TIMEOUT", "120"))
+    API_CLIENT_MAX_RETRIES: int = int(os.getenv("API_CLIENT_MAX_RETRIES", "2"))
+    API_CLIENT_POOL_SIZE: int = int(os.getenv("API_CLIENT_POOL_SIZE", "10"))
 
 class Config:
     database = DatabaseConfig()
@@ -59,4 +155,9 @@ class Config:
     app = AppConfig()
     reranking = RerankingConfig()
     critic = CriticConfig()
-    feedback = FeedbackConfig()
\ No newline at end of file
+    feedback = FeedbackConfig()
+    query = QueryConfig()
+    admission = AdmissionConfig()
+    metrics = MetricsConfig()
+    inference = InferenceConfig()
+    api_client = ApiClientConfig()
\ No newline at end of file
@@ -1,8 +1,9 @@
-import google.generativeai as genai
 import json
+import threading
 import time
 import logging
 from typing import List, Dict, Any, Optional
+from utils.llm_cache import llm_cache
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -10,24 +11,35 @@ logger = logging.getLogger(__name__)
 class CriticHead:
     _instance = None
     _model = None
+    _genai = None
+    _load_attempted = False
+    _load_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if self._model is None and Config.critic.CRITIC_MODEL_API_KEY:
-            try:
-                genai.configure(api_key=Config.critic.CRITIC_MODEL_API_KEY)
-                self._model = genai.GenerativeModel(Config.critic.CRITIC_MODEL_NAME)
-                logger.info(f"Critic model loaded: {Config.critic.CRITIC_MODEL_NAME}")
-            except Exception as e:
-                logger.error(f"Failed to load critic model: {e}")
-                self._model = None
-
-    def evaluate(self, query: str, context_chunks: List[str], answer: str) -> Optional[Dict[str, Any]]:
-        if not Config.critic.CRITIC_ENABLED or not self._model:
+    def load(self):
+        """Import the Gemini SDK and create the model on first use."""
+        if not CriticHead._load_attempted:
+            with CriticHead._load_lock:
+                if not CriticHead._load_attempted:
+                    if Config.critic.CRITIC_MODEL_API_KEY:
+                        try:
+                            import google.generativeai as genai
+                            genai.configure(api_key=Config.critic.CRITIC_MODEL_API_KEY)
+                            CriticHead._genai = genai
+                            CriticHead._model = genai.GenerativeModel(Config.critic.CRITIC_MODEL_NAME)
+                            logger.info(f"Critic model loaded: {Config.critic.CRITIC_MODEL_NAME}")
+                        except Exception as e:
+                            logger.error(f"Failed to load critic model: {e}")
+                            CriticHead._model = None
+                    CriticHead._load_attempted = True
+        return self._model
+
+    def evaluate(self, query: str, context_chunks: List[str], answer: str, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
+        if not Config.critic.CRITIC_ENABLED or self.load() is None:
             return None
 
         start_time = time.time()
@@ -36,18 +48,28 @@ class CriticHead:
             context_text = "\n\n".join(context_chunks)
             prompt = self._build_evaluation_prompt(query, context_text, answer)
 
-            response = self._model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=Config.critic.CRITIC_MODEL_TEMPERATURE
-                )
+            cache_key = llm_cache.make_key(
+                "gemini", Config.critic.CRITIC_MODEL_NAME,
+                {"temperature": Config.critic.CRITIC_MODEL_TEMPERATURE},
+                prompt
             )
+            response_text = llm_cache.get(cache_key, bypass=bypass_cache)
+            cache_hit = response_text is not None
+
+            if not cache_hit:
+                response = self._model.generate_content(
+                    prompt,
+                    generation_config=self._genai.types.GenerationConfig(
+                        temperature=Config.critic.CRITIC_MODEL_TEMPERATURE
+                    )
+                )
+                response_text = response.text
 
-            if not response.text or not response.text.strip():
-                return None
+                if not response_text or not response_text.strip():
+                    return None
 
             # Strip markdown code blocks if present
-            clean_text = response.text.strip()
+            clean_text = response_text.strip()
             if clean_text.startswith('```json'):
                 clean_text = clean_text[7:]
             if clean_text.endswith('```'):
@@ -55,6 +77,9 @@ class CriticHead:
             clean_text = clean_text.strip()
 
             result = json.loads(clean_text)
+            # Only cache responses that parsed, so a malformed reply is retried next time
+            if not cache_hit:
+                llm_cache.put(cache_key, response_text)
             elapsed = time.time() - start_time
             logger.info(f"Critic evaluation completed in {elapsed:.3f}s")
 
@@ -93,6 +118,6 @@ Scoring guidelines:
 Focus on factual completeness, not writing quality."""
 
     def is_available(self) -> bool:
-        return Config.critic.CRITIC_ENABLED and self._model is not None
+        return Config.critic.CRITIC_ENABLED and self.load() is not None
 
 critic = CriticHead()
\ No newline at end of file
@@ -1,11 +1,16 @@
-from sentence_transformers import CrossEncoder
+import threading
 import time
 import logging
 from typing import List, Dict, Any, Optional
 from config import Config
+from utils.metrics import model_batch_size
+from utils.inference_executor import inference_executor
+from utils.onnx_backend import BACKEND_ONNX, OnnxCrossEncoder
 
 logger = logging.getLogger(__name__)
 
+WARM_UP_TEXT = "warm up"
+
 class Reranker:
     """
     Reranker module for improving document relevance in RAG pipeline.
@@ -15,21 +20,43 @@ class Reranker:
 
     _instance = None
     _model = None
+    _load_attempted = False
+    _load_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if self._model is None:
-            try:
-                logger.info(f"Loading reranker model: {Config.reranking.RERANKER_MODEL}")
-                self._model = CrossEncoder(Config.reranking.RERANKER_MODEL)
-                logger.info("Reranker model loaded successfully")
-            except Exception as e:
-                logger.error(f"Failed to load reranker model: {e}")
-                self._model = None
+    def load(self):
+        """Load the CrossEncoder on first use, so importing this module stays cheap."""
+        if not Reranker._load_attempted:
+            with Reranker._load_lock:
+                if not Reranker._load_attempted:
+                    try:
+                        logger.info(f"Loading reranker model: {Config.reranking.RERANKER_MODEL} ({Config.reranking.RERANKER_BACKEND})")
+                        if Config.reranking.RERANKER_BACKEND == BACKEND_ONNX:
+                            Reranker._model = OnnxCrossEncoder(Config.reranking.RERANKER_MODEL)
+                        else:
+                            from sentence_transformers import CrossEncoder
+                            Reranker._model = CrossEncoder(Config.reranking.RERANKER_MODEL)
+                        logger.info("Reranker model loaded successfully")
+                    except Exception as e:
+                        logger.error(f"Failed to load reranker model: {e}")
+                        Reranker._model = None
+                    Reranker._load_attempted = True
+        return self._model
+
+    def warm_up(self) -> None:
+        """Load the model and run one forward pass; raises if an enabled reranker is not usable."""
+        if not Config.reranking.RERANKER_ENABLED:
+            return
+        if self.load() is None:
+            # Let the readiness retry attempt the load again
+            Reranker._load_attempted = False
+            raise RuntimeError(f"Reranker model {Config.reranking.RERANKER_MODEL} failed to load")
+        # Called directly rather than through rerank(), which falls back to the input order on errors
+        inference_executor.run("reranker", self._model.predict, [(WARM_UP_TEXT, WARM_UP_TEXT)])
 
     def rerank(self, query: str, documents: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -49,7 +76,7 @@ class Reranker:
         final_top_k = top_k or Config.reranking.RERANKER_TOP_K
 
         # If reranker is disabled or model failed to load, return original order
-        if not Config.reranking.RERANKER_ENABLED or self._model is None:
+        if not Config.reranking.RERANKER_ENABLED or self.load() is None:
             logger.info("Reranker disabled or model unavailable, returning original order")
             return documents[:final_top_k]
 
@@ -72,7 +99,8 @@ class Reranker:
             pairs = [(query, text) for text in document_texts]
 
             # Get relevance scores from the model
-            scores = self._model.predict(pairs)
+            model_batch_size.observe(len(pairs), model="reranker")
+            scores = inference_executor.run("reranker", self._model.predict, pairs)
 
             # Combine documents with their scores
             scored_docs = list(zip(documents, scores))
@@ -93,9 +121,57 @@ class Reranker:
             # Fallback to original order on error
             return documents[:final_top_k]
 
+    def rerank_batch(self, queries: List[str], documents_per_query: List[List[Dict[str, Any]]],
+                     top_k: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Rerank the candidate lists of several queries with a single CrossEncoder
+        predict call over all (query, document) pairs.
+
+        Returns one reranked list per query, in input order.
+        """
+        start_time = time.time()
+        final_top_k = top_k or Config.reranking.RERANKER_TOP_K
+
+        if not Config.reranking.RERANKER_ENABLED or self.load() is None:
+            return [documents[:final_top_k] for documents in documents_per_query]
+
+        try:
+            pairs = []
+            spans = []
+            for query, documents in zip(queries, documents_per_query):
+                start = len(pairs)
+                if documents and query.strip():
+                    pairs.extend(
+                        (query, doc.get("text") or doc.get("content") or doc.get("payload", {}).get("text", ""))
+                        for doc in documents
+                    )
+                spans.append((start, len(pairs)))
+
+            scores = []
+            if pairs:
+                model_batch_size.observe(len(pairs), model="reranker")
+                scores = inference_executor.run("reranker", self._model.predict, pairs)
+
+            reranked = []
+            for documents, (start, end) in zip(documents_per_query, spans):
+                if start == end:
+                    reranked.append(documents[:final_top_k])
+                    continue
+                scored_docs = sorted(zip(documents, scores[start:end]), key=lambda x: x[1], reverse=True)
+                reranked.append([doc for doc, score in scored_docs[:final_top_k]])
+
+            elapsed_time = time.time() - start_time
+            logger.info(f"Batch reranking completed in {elapsed_time:.3f}s for {len(queries)} queries / {len(pairs)} pairs")
+
+            return reranked
+
+        except Exception as e:
+            logger.error(f"Error during batch reranking: {e}")
+            return [documents[:final_top_k] for documents in documents_per_query]
+
     def is_available(self) -> bool:
         """Check if reranker is available and enabled."""
-        return Config.reranking.RERANKER_ENABLED and self._model is not None
+        return Config.reranking.RERANKER_ENABLED and self.load() is not None
 
 # Global reranker instance
 reranker = Reranker()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import logging
+import time
+from io import BytesIO
+from typing import Dict, Any, Optional, List
+from fastapi import HTTPException, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
+from api_client import BaseRAGAPIClient
+from models.api_models import (
+    CreateCollectionRequest, LinkContentItem, QueryRequest, BatchQueryRequest, FederatedQueryRequest, FeedbackRequest
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LocalRAGClient(BaseRAGAPIClient):
+    """
+    Same surface as RAGAPIClient, but calls the API route handlers in this
+    process instead of going over localhost HTTP. The handlers are thin
+    wrappers over CollectionService, FileService and FeedbackService, and
+    going through them keeps admission control and response shaping
+    identical. Results are JSON-encoded the way FastAPI would, so callers
+    get exactly what the HTTP client returns.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Imported here so that merely importing this module does not load the models
+        from api.routes import collections, files, feedback
+        self._collections = collections
+        self._files = files
+        self._feedback = feedback
+
+    def _call(self, name: str, handler, *args, **kwargs) -> Dict[str, Any]:
+        start_time = time.time()
+        response = Response(status_code=200)
+        if kwargs.pop("with_response", False):
+            kwargs["response"] = response
+
+        try:
+            result = handler(*args, **kwargs)
+            elapsed_time = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"Local call: {name} -> {response.status_code} in {elapsed_time}ms")
+            return {"success": True, "data": jsonable_encoder(result), "status_code": response.status_code}
+
+        except HTTPException as e:
+            error_msg = f"API Error: {e.status_code} - {dict(detail=e.detail)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": e.status_code}
+        except Exception as e:
+            error_msg = f"Request Error: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg, "status_code": 0}
+
+    # File Management APIs
+    def upload_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        upload = UploadFile(file=BytesIO(file_content), filename=filename)
+        return self._call("upload_file", self._files.upload_file, upload)
+
+    def list_files(self, since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        return self._call("list_files", self._files.list_files, since, offset, limit)
+
+    def get_file(self, file_id: str) -> Dict[str, Any]:
+        return self._call("get_file", self._files.get_file, file_id)
+
+    def delete_file(self, file_id: str) -> Dict[str, Any]:
+        return self._call("delete_file", self._files.delete_file, file_id)
+
+    # Collection Management APIs
+    def list_collections(self, since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        return self._call("list_collections", self._collections.list_collections, since, offset, limit)
+
+    def get_collection(self, collection_name: str) -> Dict[str, Any]:
+        return self._call("get_collection", self._collections.get_collection, collection_name)
+
+    def create_collection(self, name: str, rag_config: Optional[Dict] = None, indexing_config: Optional[Dict] = None) -> Dict[str, Any]:
+        request = CreateCollectionRequest(name=name, rag_config=rag_config, indexing_config=indexing_config)
+        return self._call("create_collection", self._collections.create_collection, request)
+
+    def delete_collection(self, collection_name: str) -> Dict[str, Any]:
+        return self._call("delete_collection", self._collections.delete_collection, collection_name)
+
+    def link_content(self, collection_name: str, files: List[Dict[str, str]]) -> Dict[str, Any]:
+        items = [LinkContentItem(**file) for file in files]
+        return self._call("link_content", self._collections.link_content, collection_name, items, with_response=True)
+
+    def unlink_content(self, collection_name: str, file_ids: List[str]) -> Dict[str, Any]:
+        return self._call("unlink_content", self._collections.unlink_content, collection_name, file_ids, with_response=True)
+
+    def query_collection(self, collection_name: str, query: str = "", enable_critic: bool = True) -> Dict[str, Any]:
+        request = QueryRequest(query=query, enable_critic=enable_critic)
+        return self._call("query_collection", self._collections.query_collection, collection_name, request)
+
+    def query_collection_batch(self, collection_name: str, queries: List[str], enable_critic: bool = True) -> Dict[str, Any]:
+        request = BatchQueryRequest(queries=queries, enable_critic=enable_critic)
+        return self._call("query_collection_batch", self._collections.query_collection_batch, collection_name, request)
+
+    def query_federated(self, collections: List[str], query: str, enable_critic: bool = True) -> Dict[str, Any]:
+        request = FederatedQueryRequest(collections=collections, query=query, enable_critic=enable_critic)
+        return self._call("query_federated", self._collections.query_federated, request)
+
+    def submit_feedback(self, query: str, doc_ids: List[str], label: int, collection: str,
+                        query_ticket: Optional[str] = None) -> Dict[str, Any]:
+        request = FeedbackRequest(query=query, doc_ids=doc_ids, label=label, collection=collection,
+                                  query_ticket=query_ticket)
+        return self._call("submit_feedback", self._feedback.submit_feedback, request)
@@ -1,10 +1,27 @@
-from fastapi import FastAPI
-from api.routes import collections, config, files, feedback
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from api.routes import collections, config, files, feedback, stats, health
+from utils.metrics import metrics, CONTENT_TYPE
+from utils.readiness import readiness
+from api.admission import size_threadpool
+from utils.embedding_client import EmbeddingClient
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each serving process (after the fork under serve.py), so every
+    # worker warms its own models and reports ready on /readyz independently
+    size_threadpool()
+    readiness.start()
+    yield
+    EmbeddingClient.close_pool()
+
 
 app = FastAPI(
     title="RAG Engine API",
     description="Core engine for uploading, processing, retrieving, and enriching documents using Retrieval-Augmented Generation (RAG)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
@@ -12,6 +29,8 @@ app.include_router(collections.router, prefix="/api/v1", tags=["collections"])
 app.include_router(config.router, prefix="/api/v1", tags=["config"])
 app.include_router(files.router, prefix="/api/v1", tags=["files"])
 app.include_router(feedback.router, prefix="/api/v1", tags=["feedback"])
+app.include_router(stats.router, prefix="/api/v1", tags=["stats"])
+app.include_router(health.router, tags=["health"])
 
 @app.get("/")
 def read_root():
@@ -22,6 +41,10 @@ def read_root():
         "gradio_ui": "http://localhost:7860"
     }
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -41,6 +41,7 @@ class LinkContentResponse(BaseModel):
 class ChunkConfig(BaseModel):
     source: str
     text: str
+    collection: Optional[str] = None
 
 class CriticEvaluation(BaseModel):
     confidence: float
@@ -50,6 +51,7 @@ class CriticEvaluation(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     enable_critic: bool = True
+    bypass_cache: bool = False
 
 class QueryResponse(BaseModel):
     answer: str
@@ -57,6 +59,27 @@ class QueryResponse(BaseModel):
     is_relevant: bool
     chunks: List[ChunkConfig]
     critic: Optional[CriticEvaluation] = None
+    query_ticket: Optional[str] = None
+
+class FederatedQueryRequest(BaseModel):
+    collections: List[str]
+    query: str
+    enable_critic: bool = True
+    bypass_cache: bool = False
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    enable_critic: bool = True
+    bypass_cache: bool = False
+
+class BatchQueryItem(BaseModel):
+    index: int
+    status: str
+    result: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryItem]
 
 class FileUploadResponse(BaseModel):
     status: str
@@ -80,6 +103,7 @@ class FeedbackRequest(BaseModel):
     doc_ids: List[str]
     label: int
     collection: str
+    query_ticket: Optional[str] = None
 
 class FeedbackResponse(BaseModel):
     status: str
@@ -0,0 +1,167 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from repositories.feedback_store import FeedbackEntry
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _format_timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def decay_factor(age_seconds: float, half_life_seconds: float) -> float:
+    if half_life_seconds <= 0:
+        return 1.0
+    return 0.5 ** (max(age_seconds, 0.0) / half_life_seconds)
+
+
+def entry_counts(record: Dict[str, Any]) -> Dict[str, List[float]]:
+    """doc_id -> [positive, total] contributed by one stored entry, raw or merged."""
+    if "doc_counts" in record:
+        return {doc_id: list(counts) for doc_id, counts in record["doc_counts"].items()}
+    positive = 1 if record.get("label", 0) == 1 else 0
+    return {doc_id: [positive, 1] for doc_id in set(record.get("doc_ids", []))}
+
+
+class _Cluster:
+    def __init__(self, dim: int):
+        self.vector_sum = np.zeros(dim, dtype=np.float64)
+        self.weight = 0.0
+        self.doc_counts: Dict[str, List[float]] = {}
+        self.feedback_count = 0
+        self.positive_count = 0
+        self.latest = float("-inf")
+        self.latest_record: Dict[str, Any] = {}
+
+    def add(self, vector: np.ndarray, record: Dict[str, Any], decay: float, timestamp: float) -> None:
+        weight = record.get("weight", 1.0) * decay
+        self.vector_sum += vector * weight
+        self.weight += weight
+        for doc_id, (positive, total) in entry_counts(record).items():
+            counts = self.doc_counts.setdefault(doc_id, [0.0, 0.0])
+            counts[0] += positive * decay
+            counts[1] += total * decay
+        self.feedback_count += record.get("feedback_count", 1)
+        self.positive_count += record.get("positive_count", 1 if record.get("label", 0) == 1 else 0)
+        if timestamp >= self.latest:
+            self.latest = timestamp
+            self.latest_record = record
+
+    def to_entry(self, collection: str, now: float) -> FeedbackEntry:
+        norm = np.linalg.norm(self.vector_sum)
+        centroid = (self.vector_sum / norm if norm > 0 else self.vector_sum).astype(np.float32)
+        positive = sum(counts[0] for counts in self.doc_counts.values())
+        total = sum(counts[1] for counts in self.doc_counts.values())
+        record = {
+            "query": self.latest_record.get("query", ""),
+            "doc_ids": sorted(self.doc_counts),
+            "label": 1 if total > 0 and positive * 2 >= total else 0,
+            "collection": collection,
+            "timestamp": self.latest_record.get("timestamp") or _format_timestamp(now),
+            "doc_counts": {
+                doc_id: [round(counts[0], 6), round(counts[1], 6)]
+                for doc_id, counts in self.doc_counts.items()
+            },
+            "weight": round(self.weight, 6),
+            "feedback_count": self.feedback_count,
+            "positive_count": self.positive_count,
+            "decayed_at": _format_timestamp(now)
+        }
+        return record, centroid
+
+
+def compact_entries(entries: List[FeedbackEntry], merge_radius: float, half_life_days: float,
+                    min_weight: float, now: Optional[float] = None) -> List[FeedbackEntry]:
+    """
+    Merge entries whose query vectors lie within merge_radius (cosine) of a
+    cluster leader into one centroid record per cluster, per collection.
+
+    Counts are decayed by age with the given half-life before being summed, and
+    clusters whose decayed weight falls below min_weight are dropped. Merged
+    records carry `decayed_at`, so compacting again only decays the time elapsed
+    since the previous pass.
+    """
+    now = time.time() if now is None else now
+    half_life_seconds = half_life_days * 86400
+
+    groups: Dict[Tuple[str, int], List[FeedbackEntry]] = {}
+    for record, vector in entries:
+        groups.setdefault((record.get("collection", ""), vector.shape[0]), []).append((record, vector))
+
+    compacted = []
+    for (collection, dim), group in groups.items():
+        leaders = np.zeros((len(group), dim), dtype=np.float32)
+        clusters: List[_Cluster] = []
+
+        for record, vector in group:
+            vector = vector.astype(np.float32, copy=False)
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                continue
+            vector = vector / norm
+
+            timestamp = _parse_timestamp(record.get("timestamp"))
+            timestamp = now if timestamp is None else timestamp
+            decayed_at = _parse_timestamp(record.get("decayed_at")) or timestamp
+            decay = decay_factor(now - decayed_at, half_life_seconds)
+
+            cluster_id = -1
+            if clusters:
+                similarities = leaders[:len(clusters)] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= merge_radius:
+                    cluster_id = best
+            if cluster_id < 0:
+                leaders[len(clusters)] = vector
+                clusters.append(_Cluster(dim))
+                cluster_id = len(clusters) - 1
+
+            clusters[cluster_id].add(vector, record, decay, timestamp)
+
+        for cluster in clusters:
+            if cluster.weight >= min_weight:
+                compacted.append(cluster.to_entry(collection, now))
+
+    compacted.sort(key=lambda entry: entry[0]["timestamp"])
+    return compacted
+
+
+def compact_store(store) -> Tuple[int, int]:
+    """Compact a feedback store in place using the configured radius, half-life and weight floor."""
+    before, after = store.rewrite(lambda entries: compact_entries(
+        entries,
+        Config.feedback.FEEDBACK_COMPACTION_RADIUS,
+        Config.feedback.FEEDBACK_DECAY_HALF_LIFE_DAYS,
+        Config.feedback.FEEDBACK_COMPACTION_MIN_WEIGHT
+    ))
+    logger.info(f"Compacted feedback store from {before} to {after} entries")
+    return before, after
+
+
+if __name__ == "__main__":
+    # Usage: python -m repositories.feedback_compaction
+    from repositories.feedback_store import create_feedback_store
+
+    logging.basicConfig(level=logging.INFO)
+    store = create_feedback_store(
+        Config.feedback.FEEDBACK_STORAGE_FORMAT,
+        Config.feedback.FEEDBACK_FILE,
+        Config.feedback.FEEDBACK_STORE_DIR,
+        Config.feedback.FEEDBACK_VECTOR_DTYPE,
+        Config.feedback.FEEDBACK_FSYNC
+    )
+    before, after = compact_store(store)
+    print(f"Compacted {before} entries into {after}")
@@ -1,66 +1,411 @@
-import json
-import os
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+from repositories.feedback_store import create_feedback_store
+from repositories.feedback_compaction import compact_store, entry_counts
+from repositories.feedback_writer import FeedbackWriter, ACK_ENQUEUED, ACK_DURABLE
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class VectorMatrix:
+    """Growable row matrix of L2-normalised float32 vectors with a threshold search."""
 
-class FeedbackRepository:
     def __init__(self):
-        self.feedback_file = "feedback_data.jsonl"
+        self.vectors: Optional[np.ndarray] = None
+        self.size = 0
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self.vectors is None else self.vectors.shape[1]
+
+    def append(self, vector: np.ndarray) -> int:
+        if self.vectors is None:
+            self.vectors = np.zeros((16, vector.shape[0]), dtype=np.float32)
+        elif self.size == self.vectors.shape[0]:
+            grown = np.zeros((self.vectors.shape[0] * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+
+        self.vectors[self.size] = vector
+        self.size += 1
+        return self.size - 1
+
+    def similarities(self, query_vector: np.ndarray) -> np.ndarray:
+        if self.size == 0:
+            return np.empty(0, dtype=np.float32)
+        return self.vectors[:self.size] @ query_vector
+
+    def search(self, query_vector: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        similarities = self.similarities(query_vector)
+        matches = np.flatnonzero(similarities >= threshold)
+        order = np.argsort(-similarities[matches], kind="stable")
+        matches = matches[order]
+        return matches, similarities[matches]
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm k-means centroids fitted on a sample of at most 64 points per centroid."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), k * 64)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    k = min(k, sample_size)
+    centroids = sample[rng.choice(sample_size, k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        buckets, starts = np.unique(assignments[order], return_index=True)
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        # Centroids that attracted no points keep their previous position
+        centroids[buckets] = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+    return centroids
+
+
+class IvfIndex:
+    """
+    Inverted-file index over a VectorMatrix for sublinear threshold search.
+
+    Rows are bucketed by their nearest k-means centroid and a query scans only
+    the nprobe buckets whose centroids are closest to it, so recall depends on
+    nprobe. Below min_train_size the exact scan is used. The centroids are
+    refitted whenever the matrix has doubled since the last fit; the fit runs
+    on a background thread over a snapshot of the rows and is swapped in by
+    the next add() or search(), so writers and readers never wait for it.
+    Like the matrix it indexes, the index is guarded by the owner's lock.
+    """
+
+    def __init__(self, matrix: VectorMatrix, nlist: int = 0, nprobe: int = 16, min_train_size: int = 20000):
+        self.matrix = matrix
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[VectorMatrix] = []
+        self.list_rows: List[List[int]] = []
+        self._row_arrays: List[Optional[np.ndarray]] = []
+        self.trained_size = 0
+        self._training: Optional[threading.Thread] = None
+        self._trained = None
+
+    def add(self, row: int) -> None:
+        if self.centroids is not None:
+            self._assign(row)
+        # A finished fit re-assigns every row past its snapshot, including this one
+        self._install_trained()
+        if self._training is None and self.matrix.size >= max(self.min_train_size, 2 * self.trained_size):
+            self._start_training()
+
+    def _assign(self, row: int) -> None:
+        vector = self.matrix.vectors[row]
+        bucket = int(np.argmax(self.centroids @ vector))
+        self.lists[bucket].append(vector)
+        self.list_rows[bucket].append(row)
+        self._row_arrays[bucket] = None
+
+    def _start_training(self) -> None:
+        # Rows below size are never rewritten (appends land past it and growth copies into a
+        # new array), so this view stays valid while the matrix keeps growing
+        vectors = self.matrix.vectors[:self.matrix.size]
+
+        def run():
+            try:
+                self._trained = self._fit(vectors)
+            except Exception as e:
+                logger.error(f"IVF training failed: {e}")
+                self._trained = False
+
+        self._training = threading.Thread(target=run, name="ivf-train", daemon=True)
+        self._training.start()
+
+    def _install_trained(self) -> None:
+        trained = self._trained
+        if trained is None:
+            return
+        self._trained = None
+        self._training = None
+        if trained is False:
+            # Failed fit: retry once the matrix has grown past the next threshold
+            self.trained_size = max(self.trained_size, self.matrix.size // 2 + 1)
+            return
+
+        self.centroids, self.lists, self.list_rows, self.trained_size = trained
+        self._row_arrays = [None] * len(self.lists)
+        # Rows appended while the fit was running
+        for row in range(self.trained_size, self.matrix.size):
+            self._assign(row)
+
+    def train(self) -> None:
+        """Fit synchronously and install the result."""
+        self._trained = self._fit(self.matrix.vectors[:self.matrix.size])
+        self._install_trained()
+
+    def _fit(self, vectors: np.ndarray):
+        size = len(vectors)
+        nlist = self.nlist or int(np.clip(np.sqrt(size), 16, 4096))
+        centroids = spherical_kmeans(vectors, nlist)
+
+        assignments = np.empty(size, dtype=np.int64)
+        for start in range(0, size, 8192):
+            assignments[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+
+        lists, list_rows = [], []
+        for bucket in range(len(centroids)):
+            rows = np.flatnonzero(assignments == bucket)
+            bucket_matrix = VectorMatrix()
+            if rows.size:
+                bucket_matrix.vectors = vectors[rows].copy()
+                bucket_matrix.size = rows.size
+            lists.append(bucket_matrix)
+            list_rows.append(rows.tolist())
+
+        return centroids, lists, list_rows, size
+
+    def _rows(self, bucket: int) -> np.ndarray:
+        if self._row_arrays[bucket] is None:
+            self._row_arrays[bucket] = np.asarray(self.list_rows[bucket], dtype=np.int64)
+        return self._row_arrays[bucket]
+
+    def search(self, query_vector: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        self._install_trained()
+        if self.centroids is None:
+            return self.matrix.search(query_vector, threshold)
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+
+        matched_rows, matched_similarities = [], []
+        for bucket in probes:
+            similarities = self.lists[bucket].similarities(query_vector)
+            hits = np.flatnonzero(similarities >= threshold)
+            if hits.size:
+                matched_rows.append(self._rows(bucket)[hits])
+                matched_similarities.append(similarities[hits])
+
+        if not matched_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = np.concatenate(matched_rows)
+        similarities = np.concatenate(matched_similarities)
+        order = np.argsort(-similarities, kind="stable")
+        return rows[order], similarities[order]
+
+
+def _search_index(matrix: VectorMatrix):
+    if Config.feedback.FEEDBACK_INDEX_MODE == "ivf":
+        return IvfIndex(matrix, Config.feedback.FEEDBACK_ANN_NLIST, Config.feedback.FEEDBACK_ANN_NPROBE,
+                        Config.feedback.FEEDBACK_ANN_MIN_ENTRIES)
+    return None
+
+
+class FeedbackIndex:
+    """
+    In-memory view of one collection's feedback.
+
+    Every entry's normalised query vector is kept for similarity search. Entries
+    are also grouped into query clusters: an entry joins the first cluster whose
+    leader vector lies within the cluster radius, otherwise it starts a new one.
+    Each cluster keeps an inverted doc_id -> [positive, total] index, so scoring
+    a candidate list touches only the matched clusters' counters.
+    """
+
+    def __init__(self, cluster_radius: float):
+        self.cluster_radius = cluster_radius
+        self.entries = VectorMatrix()
+        self.records: List[Dict[str, Any]] = []
+        self.leaders = VectorMatrix()
+        self.cluster_counts: List[Dict[str, List[int]]] = []
+        # Optional ANN structures over entries and cluster leaders (FEEDBACK_INDEX_MODE=ivf)
+        self.entries_ann = _search_index(self.entries)
+        self.leaders_ann = _search_index(self.leaders)
+        self.total = 0
+        self.positive = 0
+
+    def add(self, vector: np.ndarray, record: Dict[str, Any]) -> bool:
+        if self.entries.dim is not None and vector.shape[0] != self.entries.dim:
+            # Vectors from a different embedding model cannot be compared
+            return False
+
+        # Compacted records stand for several feedback entries
+        self.total += record.get("feedback_count", 1)
+        self.positive += record.get("positive_count", 1 if record.get("label", 0) == 1 else 0)
+
+        vector = _normalize(vector.astype(np.float32, copy=False))
+        row = self.entries.append(vector)
+        self.records.append(record)
+        if self.entries_ann is not None:
+            self.entries_ann.add(row)
+
+        cluster = self._assign_cluster(vector)
+        counts = self.cluster_counts[cluster]
+        for doc_id, (positive, total) in entry_counts(record).items():
+            doc_counts = counts.setdefault(doc_id, [0, 0])
+            doc_counts[0] += positive
+            doc_counts[1] += total
+        return True
+
+    def _assign_cluster(self, vector: np.ndarray) -> int:
+        if self.leaders_ann is not None:
+            clusters, _ = self.leaders_ann.search(vector, self.cluster_radius)
+            if clusters.size:
+                return int(clusters[0])
+        else:
+            similarities = self.leaders.similarities(vector)
+            if similarities.size:
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.cluster_radius:
+                    return best
+
+        self.cluster_counts.append({})
+        cluster = self.leaders.append(vector)
+        if self.leaders_ann is not None:
+            self.leaders_ann.add(cluster)
+        return cluster
+
+    def search(self, query_vector: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        if self.entries.dim != query_vector.shape[0]:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return (self.entries_ann or self.entries).search(query_vector, threshold)
+
+    def doc_counts(self, query_vector: np.ndarray, threshold: float, doc_ids: List[str]) -> Optional[Dict[str, List[int]]]:
+        if self.leaders.dim != query_vector.shape[0]:
+            return None
+
+        clusters, _ = (self.leaders_ann or self.leaders).search(query_vector, threshold)
+        if clusters.size == 0:
+            return None
+
+        totals = {}
+        matched = [self.cluster_counts[i] for i in clusters]
+        for doc_id in doc_ids:
+            positive = total = 0
+            for counts in matched:
+                doc_counts = counts.get(doc_id)
+                if doc_counts:
+                    positive += doc_counts[0]
+                    total += doc_counts[1]
+            totals[doc_id] = [positive, total]
+        return totals
+
+
+class FeedbackRepository:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
 
-    def save_feedback(self, query: str, query_vector: List[float], doc_ids: List[str],
+    def __init__(self):
+        if self._initialized:
+            return
+        self.store = create_feedback_store(
+            Config.feedback.FEEDBACK_STORAGE_FORMAT,
+            Config.feedback.FEEDBACK_FILE,
+            Config.feedback.FEEDBACK_STORE_DIR,
+            Config.feedback.FEEDBACK_VECTOR_DTYPE,
+            Config.feedback.FEEDBACK_FSYNC
+        )
+        self._lock = threading.RLock()
+        self._indexes: Dict[str, FeedbackIndex] = {}
+        self.writer = FeedbackWriter(self.store, on_written=self._refresh_index)
+        self._initialized = True
+
+    def _refresh_index(self) -> None:
+        # The store hands back only entries appended since the last call, so
+        # feedback written by this or any other process is indexed exactly once
+        with self._lock:
+            try:
+                entries, reset = self.store.read_new()
+            except Exception:
+                return
+
+            if reset:
+                self._indexes = {}
+
+            for record, vector in entries:
+                collection = record.get("collection", "")
+                if collection not in self._indexes:
+                    self._indexes[collection] = FeedbackIndex(Config.feedback.FEEDBACK_CLUSTER_RADIUS)
+                self._indexes[collection].add(vector, record)
+
+    def save_feedback(self, query: str, query_vector: np.ndarray, doc_ids: List[str],
                      label: int, collection: str) -> bool:
         try:
             feedback_entry = {
                 "query": query,
-                "q_vec": query_vector,
                 "doc_ids": doc_ids,
                 "label": label,
                 "collection": collection,
                 "timestamp": datetime.utcnow().isoformat() + "Z"
             }
-
-            with open(self.feedback_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(feedback_entry) + "\n")
+            vector = np.asarray(query_vector, dtype=np.float32)
+
+            if not Config.feedback.FEEDBACK_ASYNC_WRITES:
+                with self._lock:
+                    self.store.append([(feedback_entry, vector)])
+                    self._refresh_index()
+                return True
+
+            ack_policy = Config.feedback.FEEDBACK_ACK_POLICY
+            future = self.writer.submit(feedback_entry, vector, durable=ack_policy == ACK_DURABLE)
+            if future is None:
+                return False
+            if ack_policy != ACK_ENQUEUED:
+                try:
+                    future.result(timeout=Config.feedback.FEEDBACK_ACK_TIMEOUT_SECONDS)
+                except FutureTimeoutError:
+                    # Withdraw the entry if the writer has not picked it up yet, so a client
+                    # retry cannot store it twice; otherwise it is being written: accepted
+                    return not future.cancel()
 
             return True
         except Exception:
             return False
 
-    def get_relevant_feedback(self, query_vector: List[float], collection: str,
-                            similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
-        if not os.path.exists(self.feedback_file):
-            return []
-
-        relevant_feedback = []
-        query_vec = np.array(query_vector)
-
+    def compact(self) -> Optional[Dict[str, int]]:
+        """Merge, decay and rewrite the stored feedback, then rebuild the in-memory index."""
         try:
-            with open(self.feedback_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    feedback = json.loads(line)
-
-                    if feedback.get("collection") != collection:
-                        continue
-
-                    stored_vec = np.array(feedback.get("q_vec", []))
-                    if len(stored_vec) == 0:
-                        continue
-
-                    similarity = self._cosine_similarity(query_vec, stored_vec)
-
-                    if similarity >= similarity_threshold:
-                        feedback["similarity"] = similarity
-                        relevant_feedback.append(feedback)
+            with self._lock:
+                before, after = compact_store(self.store)
+                self._refresh_index()
+            return {"entries_before": before, "entries_after": after}
+        except Exception:
+            return None
 
-            relevant_feedback.sort(key=lambda x: x["similarity"], reverse=True)
-            return relevant_feedback
+    def get_relevant_feedback(self, query_vector: np.ndarray, collection: str,
+                            similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
+        try:
+            self._refresh_index()
+
+            query_vec = np.asarray(query_vector, dtype=np.float32)
+            norm = np.linalg.norm(query_vec)
+            if norm == 0:
+                return []
+            query_vec = query_vec / norm
+
+            with self._lock:
+                index = self._indexes.get(collection)
+                if index is None:
+                    return []
+                matches, similarities = index.search(query_vec, similarity_threshold)
+                records = [index.records[i] for i in matches]
+
+            return [
+                {**record, "similarity": float(similarity)}
+                for record, similarity in zip(records, similarities)
+            ]
 
         except Exception:
             return []
@@ -74,11 +419,10 @@ class FeedbackRepository:
             total_count = 0
 
             for feedback in relevant_feedback:
-                feedback_doc_ids = feedback.get("doc_ids", [])
-                if doc_id in feedback_doc_ids:
-                    total_count += 1
-                    if feedback.get("label", 0) == 1:
-                        positive_count += 1
+                counts = entry_counts(feedback).get(doc_id)
+                if counts:
+                    positive_count += counts[0]
+                    total_count += counts[1]
 
             if total_count == 0:
                 doc_scores[doc_id] = 0.5
@@ -87,48 +431,58 @@ class FeedbackRepository:
 
         return doc_scores
 
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+    def get_feedback_scores(self, query_vector: np.ndarray, collection: str, doc_ids: List[str],
+                            similarity_threshold: float = 0.8) -> Dict[str, float]:
+        """
+        Bayesian-smoothed feedback score per doc_id, aggregated over the query
+        clusters similar to query_vector. Returns an empty dict when no
+        feedback cluster matches.
+        """
         try:
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
+            self._refresh_index()
+
+            query_vec = _normalize(np.asarray(query_vector, dtype=np.float32))
 
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
+            with self._lock:
+                index = self._indexes.get(collection)
+                if index is None:
+                    return {}
+                counts = index.doc_counts(query_vec, similarity_threshold, doc_ids)
+
+            if counts is None:
+                return {}
+
+            return {
+                doc_id: self._bayesian_smooth(positive, total, 1.0, 1.0) if total > 0 else 0.5
+                for doc_id, (positive, total) in counts.items()
+            }
 
-            return np.dot(vec1, vec2) / (norm1 * norm2)
         except Exception:
-            return 0.0
+            return {}
 
     def _bayesian_smooth(self, positive: int, total: int, alpha: float = 1.0,
                         beta: float = 1.0) -> float:
         return (positive + alpha) / (total + alpha + beta)
 
     def get_feedback_stats(self, collection: Optional[str] = None) -> Dict[str, Any]:
-        if not os.path.exists(self.feedback_file):
-            return {"total_feedback": 0, "positive_ratio": 0.0, "collections": []}
-
         total_feedback = 0
         positive_feedback = 0
         collections = set()
 
         try:
-            with open(self.feedback_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    feedback = json.loads(line)
-                    feedback_collection = feedback.get("collection", "")
+            self._refresh_index()
 
+            with self._lock:
+                for feedback_collection, index in self._indexes.items():
                     if collection and feedback_collection != collection:
                         continue
 
-                    total_feedback += 1
+                    total_feedback += index.total
+                    positive_feedback += index.positive
                     collections.add(feedback_collection)
 
-                    if feedback.get("label", 0) == 1:
-                        positive_feedback += 1
+            if total_feedback == 0:
+                return {"total_feedback": 0, "positive_ratio": 0.0, "collections": []}
 
             positive_ratio = positive_feedback / total_feedback if total_feedback > 0 else 0.0
 
@@ -141,4 +495,4 @@ class FeedbackRepository:
             }
 
         except Exception:
-            return {"total_feedback": 0, "positive_ratio": 0.0, "collections": []}
\ No newline at end of file
+            return {"total_feedback": 0, "positive_ratio": 0.0, "collections": []}
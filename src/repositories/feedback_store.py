@@ -0,0 +1,493 @@
+import json
+import logging
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FeedbackEntry = Tuple[Dict[str, Any], np.ndarray]
+FeedbackTransform = Callable[[List[FeedbackEntry]], List[FeedbackEntry]]
+
+
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _trim_partial_line(fd: int) -> None:
+    """Truncate a trailing line that has no newline, left behind by an interrupted append."""
+    size = os.fstat(fd).st_size
+    position = size
+    while position > 0:
+        chunk_start = max(0, position - 65536)
+        chunk = os.pread(fd, position - chunk_start, chunk_start)
+        newline = chunk.rfind(b"\n")
+        if newline >= 0:
+            end = chunk_start + newline + 1
+            if end != size:
+                os.ftruncate(fd, end)
+            return
+        position = chunk_start
+    if size:
+        os.ftruncate(fd, 0)
+
+
+class JsonlFeedbackStore:
+    """Legacy store: one JSON object per line with the query vector inlined as `q_vec`."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._offset = 0
+        self._inode = None
+
+    def append(self, entries: List[FeedbackEntry], fsync: Optional[bool] = None) -> None:
+        fsync = self.fsync if fsync is None else fsync
+        payload = "".join(
+            json.dumps({**record, "q_vec": np.asarray(vector, dtype=np.float32).tolist()}) + "\n"
+            for record, vector in entries
+        ).encode("utf-8")
+
+        fd = self._open_locked(os.O_RDWR | os.O_APPEND | os.O_CREAT)
+        try:
+            _trim_partial_line(fd)
+            _write_all(fd, payload)
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _open_locked(self, flags: int) -> int:
+        """Open the file under an exclusive lock, retrying if a rewrite replaced it meanwhile."""
+        while True:
+            fd = os.open(self.path, flags, 0o644)
+            if fcntl is None:
+                return fd
+            # Serialise writers across worker processes; released on close
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    @staticmethod
+    def _parse_lines(data: bytes) -> List[FeedbackEntry]:
+        entries = []
+        for line in data.split(b"\n"):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            vector = np.asarray(record.pop("q_vec", None) or [], dtype=np.float32)
+            if vector.size:
+                entries.append((record, vector))
+        return entries
+
+    def read_new(self) -> Tuple[List[FeedbackEntry], bool]:
+        """Return entries appended since the previous call and whether the file was replaced."""
+        if not os.path.exists(self.path):
+            return [], False
+
+        stat = os.stat(self.path)
+        reset = False
+        if self._inode is not None and (stat.st_ino != self._inode or stat.st_size < self._offset):
+            self._offset = 0
+            reset = True
+        self._inode = stat.st_ino
+
+        if stat.st_size == self._offset:
+            return [], reset
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Only consume complete lines; a partial trailing line is picked up next time
+        end = data.rfind(b"\n")
+        if end < 0:
+            return [], reset
+        self._offset += end + 1
+        return self._parse_lines(data[:end]), reset
+
+    def rewrite(self, transform: FeedbackTransform) -> Tuple[int, int]:
+        """
+        Replace the file with transform(all entries) via a temp file and rename.
+        Appends are blocked for the duration. Returns (entries before, entries after).
+        """
+        if not os.path.exists(self.path):
+            return 0, 0
+
+        fd = self._open_locked(os.O_RDWR)
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            end = data.rfind(b"\n")
+            entries = self._parse_lines(data[:end]) if end >= 0 else []
+            rewritten = transform(entries)
+
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record, vector in rewritten:
+                    f.write(json.dumps({**record, "q_vec": np.asarray(vector, dtype=np.float32).tolist()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+        finally:
+            os.close(fd)
+
+        return len(entries), len(rewritten)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record.pop("q_vec", None)
+                yield record
+
+
+class BinaryFeedbackStore:
+    """
+    Feedback stored as an append-only matrix of raw vectors plus a small JSON
+    sidecar log of records.
+
+    Layout inside `directory`:
+        meta.json               {"generation", "dim", "dtype"}; replaced atomically
+        vectors-<gen>.bin       row-major vectors, memory-mappable
+        records-<gen>.jsonl     one record per line with its vector "row"
+
+    Append protocol: the vector is written (and optionally fsynced) before the
+    record that references it, under an exclusive file lock. A crash can
+    therefore leave at most an unreferenced or partial trailing vector, which is
+    trimmed on the next append, or a partial record line, which readers skip.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float32", fsync: bool = True):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.fsync = fsync
+        self._generation = None
+        self._offset = 0
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"vectors-{generation}.bin")
+
+    def _records_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"records-{generation}.jsonl")
+
+    @contextmanager
+    def _exclusive(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+        _fsync_dir(self.directory)
+
+    def append(self, entries: List[FeedbackEntry], fsync: Optional[bool] = None) -> None:
+        if not entries:
+            return
+        fsync = self.fsync if fsync is None else fsync
+
+        with self._exclusive():
+            meta = self.read_meta()
+            if meta is None:
+                meta = {"generation": 0, "dim": int(np.asarray(entries[0][1]).shape[0]), "dtype": self.dtype.name}
+                self.write_meta(meta)
+
+            dtype = np.dtype(meta["dtype"])
+            dim = meta["dim"]
+            row_bytes = dim * dtype.itemsize
+            vectors_path = self._vectors_path(meta["generation"])
+            records_path = self._records_path(meta["generation"])
+
+            rows = []
+            for _, vector in entries:
+                vector = np.asarray(vector, dtype=dtype)
+                if vector.shape != (dim,):
+                    raise ValueError(f"Feedback vector has dimension {vector.shape}, store expects {dim}")
+                rows.append(vector)
+
+            fd = os.open(vectors_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                first_row = size // row_bytes
+                if size != first_row * row_bytes:
+                    # Trim a partial vector left behind by an interrupted append
+                    os.ftruncate(fd, first_row * row_bytes)
+                os.lseek(fd, first_row * row_bytes, os.SEEK_SET)
+                _write_all(fd, np.ascontiguousarray(np.stack(rows)).tobytes())
+                if fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            payload = "".join(
+                json.dumps({**record, "row": first_row + i}) + "\n"
+                for i, (record, _) in enumerate(entries)
+            ).encode("utf-8")
+
+            fd = os.open(records_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                _trim_partial_line(fd)
+                _write_all(fd, payload)
+                if fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _load_vectors(self, generation: int, dim: int, dtype: np.dtype) -> np.ndarray:
+        path = self._vectors_path(generation)
+        if not os.path.exists(path):
+            return np.empty((0, dim), dtype=dtype)
+        rows = os.path.getsize(path) // (dim * dtype.itemsize)
+        if rows == 0:
+            return np.empty((0, dim), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows, dim))
+
+    def read_new(self) -> Tuple[List[FeedbackEntry], bool]:
+        """Return entries appended since the previous call and whether the store was rewritten."""
+        meta = self.read_meta()
+        if meta is None:
+            return [], False
+
+        reset = False
+        if self._generation is not None and meta["generation"] != self._generation:
+            self._offset = 0
+            reset = True
+        self._generation = meta["generation"]
+
+        records_path = self._records_path(self._generation)
+        if not os.path.exists(records_path) or os.path.getsize(records_path) == self._offset:
+            return [], reset
+
+        with open(records_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        end = data.rfind(b"\n")
+        if end < 0:
+            return [], reset
+
+        vectors = self._load_vectors(self._generation, meta["dim"], np.dtype(meta["dtype"]))
+        entries, consumed = self._parse_records(data[:end + 1], vectors)
+        self._offset += consumed
+        return entries, reset
+
+    @staticmethod
+    def _parse_records(data: bytes, vectors: np.ndarray) -> Tuple[List[FeedbackEntry], int]:
+        """Pair complete record lines with their vectors; returns the entries and bytes consumed."""
+        entries = []
+        consumed = 0
+        for line in data.split(b"\n")[:-1]:
+            record = None
+            try:
+                record = json.loads(line) if line.strip() else None
+            except ValueError:
+                pass
+            if record is not None:
+                row = record.pop("row", -1)
+                if not 0 <= row < len(vectors):
+                    # The vector is not visible yet; stop and retry from here next time
+                    break
+                entries.append((record, np.array(vectors[row], dtype=np.float32)))
+            consumed += len(line) + 1
+        return entries, consumed
+
+    def rewrite(self, transform: FeedbackTransform) -> Tuple[int, int]:
+        """
+        Write transform(all entries) as a new generation and switch meta.json to
+        it atomically; readers see the swap as a reset. Appends are blocked for
+        the duration. Returns (entries before, entries after).
+        """
+        with self._exclusive():
+            meta = self.read_meta()
+            if meta is None:
+                return 0, 0
+
+            dtype = np.dtype(meta["dtype"])
+            generation = meta["generation"]
+            records_path = self._records_path(generation)
+            data = b""
+            if os.path.exists(records_path):
+                with open(records_path, "rb") as f:
+                    data = f.read()
+            vectors = self._load_vectors(generation, meta["dim"], dtype)
+            entries, _ = self._parse_records(data[:data.rfind(b"\n") + 1], vectors)
+            rewritten = transform(entries)
+
+            new_generation = generation + 1
+            with open(self._vectors_path(new_generation), "wb") as f:
+                if rewritten:
+                    f.write(np.ascontiguousarray(np.stack([
+                        np.asarray(vector, dtype=dtype) for _, vector in rewritten
+                    ])).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._records_path(new_generation), "w", encoding="utf-8") as f:
+                for row, (record, _) in enumerate(rewritten):
+                    f.write(json.dumps({**record, "row": row}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.write_meta({**meta, "generation": new_generation})
+
+            # Readers that already mapped the old files keep them alive until they reset
+            for path in (self._vectors_path(generation), records_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        return len(entries), len(rewritten)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        meta = self.read_meta()
+        if meta is None:
+            return
+        records_path = self._records_path(meta["generation"])
+        if not os.path.exists(records_path):
+            return
+        with open(records_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record.pop("row", None)
+                yield record
+
+
+def convert_jsonl_to_binary(jsonl_path: str, directory: str, dtype: str = "float32", batch_size: int = 1000) -> int:
+    """
+    Copy every entry of a legacy JSONL feedback file into a new binary store.
+    The store is built in a scratch directory and renamed into place, so a
+    concurrent or interrupted conversion never leaves a half-written store.
+    Returns the entry count.
+    """
+    if BinaryFeedbackStore(directory).exists():
+        raise ValueError(f"Binary feedback store already exists at '{directory}'")
+
+    entries, _ = JsonlFeedbackStore(jsonl_path).read_new()
+    if not entries:
+        # Nothing to convert, and the vector dimension for meta.json is unknown; the
+        # store is created by the first append
+        logger.info(f"No feedback entries in '{jsonl_path}' to convert")
+        return 0
+
+    scratch = f"{directory.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(scratch, ignore_errors=True)
+    target = BinaryFeedbackStore(scratch, dtype=dtype, fsync=False)
+    for start in range(0, len(entries), batch_size):
+        target.append(entries[start:start + batch_size])
+
+    meta = target.read_meta()
+    if meta is not None:
+        # Single fsync pass at the end instead of one per batch
+        for path in (target._vectors_path(meta["generation"]), target._records_path(meta["generation"])):
+            with open(path, "rb+") as f:
+                os.fsync(f.fileno())
+
+    try:
+        # rename() replaces an empty target directory but refuses a populated one
+        os.rename(scratch, directory)
+    except OSError:
+        shutil.rmtree(scratch, ignore_errors=True)
+        if BinaryFeedbackStore(directory).exists():
+            raise ValueError(f"Binary feedback store already exists at '{directory}'")
+        raise
+
+    _fsync_dir(os.path.dirname(os.path.abspath(directory)))
+    logger.info(f"Converted {len(entries)} feedback entries from '{jsonl_path}' to '{directory}'")
+    return len(entries)
+
+
+def create_feedback_store(storage_format: str, jsonl_path: str, directory: str, dtype: str, fsync: bool):
+    if storage_format == "jsonl":
+        return JsonlFeedbackStore(jsonl_path, fsync=fsync)
+
+    store = BinaryFeedbackStore(directory, dtype=dtype, fsync=fsync)
+    if not store.exists() and os.path.exists(jsonl_path):
+        logger.info(f"Migrating legacy feedback file '{jsonl_path}' to binary store '{directory}'")
+        try:
+            convert_jsonl_to_binary(jsonl_path, directory, dtype)
+        except ValueError:
+            # Another worker finished the migration first
+            pass
+    return store
+
+
+if __name__ == "__main__":
+    # Usage: python -m repositories.feedback_store <feedback_data.jsonl> <store_dir> [float32|float16]
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 3:
+        print("usage: python -m repositories.feedback_store <jsonl_path> <store_dir> [dtype]")
+        sys.exit(1)
+    count = convert_jsonl_to_binary(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "float32")
+    print(f"Converted {count} entries")
@@ -0,0 +1,160 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ACK_ENQUEUED = "enqueued"
+ACK_WRITTEN = "written"
+ACK_DURABLE = "durable"
+
+_STOP = object()
+
+
+class FeedbackWriter:
+    """
+    Background group-commit writer for feedback entries.
+
+    Submissions go into a bounded queue. A single thread drains whatever has
+    accumulated (up to max_batch, waiting at most linger_seconds for more) and
+    appends the batch to the store in one write per file, fsyncing per policy.
+    Each submission gets a Future that resolves once its batch is written,
+    carrying True if the batch was also fsynced.
+    """
+
+    def __init__(self, store, on_written: Optional[Callable[[], None]] = None):
+        self.store = store
+        self.on_written = on_written
+        self.max_batch = Config.feedback.FEEDBACK_WRITER_MAX_BATCH
+        self.linger_seconds = Config.feedback.FEEDBACK_WRITER_LINGER_SECONDS
+        self.fsync_enabled = Config.feedback.FEEDBACK_FSYNC
+        self.fsync_interval = Config.feedback.FEEDBACK_FSYNC_INTERVAL_SECONDS
+        self._queue: "queue.Queue" = queue.Queue(maxsize=Config.feedback.FEEDBACK_WRITER_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._last_fsync = 0.0
+        # Updated by request threads (rejections) and the writer thread alike
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "entries": 0, "fsyncs": 0, "rejected": 0, "errors": 0, "cancelled": 0}
+        # Once per writer; close() is a no-op in processes where the thread is not running
+        atexit.register(self.close)
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, amount in increments.items():
+                self._stats[name] += amount
+
+    def _ensure_started(self) -> None:
+        # Started lazily (and restarted after a fork) because threads do not survive fork()
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, record: Dict[str, Any], vector: np.ndarray, durable: bool = False) -> Optional[Future]:
+        """Queue an entry for writing. Returns None if the queue is full."""
+        self._ensure_started()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((record, vector, durable, future))
+        except queue.Full:
+            self._count(rejected=1)
+            return None
+        return future
+
+    def _collect_batch(self, first) -> Tuple[List, bool]:
+        batch = [first]
+        stop = False
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _should_fsync(self, batch: List) -> bool:
+        if any(durable for _, _, durable, _ in batch):
+            return True
+        if not self.fsync_enabled:
+            return False
+        return self.fsync_interval <= 0 or time.monotonic() - self._last_fsync >= self.fsync_interval
+
+    def _write_batch(self, batch: List) -> None:
+        # Claim every entry before writing: a submitter whose ack wait timed out may have
+        # cancelled its entry, and a claimed entry can no longer be cancelled
+        claimed = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        self._count(cancelled=len(batch) - len(claimed))
+        batch = claimed
+        if not batch:
+            return
+
+        fsync = self._should_fsync(batch)
+        try:
+            self.store.append([(record, vector) for record, vector, _, _ in batch], fsync=fsync)
+        except Exception as e:
+            logger.error(f"Feedback batch write failed: {e}")
+            self._count(errors=1)
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        if fsync:
+            self._last_fsync = time.monotonic()
+        self._count(fsyncs=int(fsync), batches=1, entries=len(batch))
+
+        # Index the new entries before acknowledging, so a caller that waits
+        # for the ack can immediately see its own feedback in lookups
+        if self.on_written is not None:
+            try:
+                self.on_written()
+            except Exception as e:
+                logger.error(f"Feedback index refresh failed: {e}")
+
+        for _, _, _, future in batch:
+            future.set_result(fsync)
+
+    def _run(self) -> None:
+        work_queue = self._queue
+        while True:
+            item = work_queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect_batch(item)
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
@@ -1,23 +1,49 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition
 from typing import List, Dict, Any, Optional
+import threading
 import uuid
+import numpy as np
 from config import Config
 
 class QdrantRepository:
     def __init__(self):
+        # qdrant_client takes seconds to import (pydantic models for the whole REST API), so the
+        # client is created on first use, normally by the readiness check, not at API import
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._connect()
+        return self._client
+
+    def _connect(self):
+        from qdrant_client import QdrantClient
+
         if Config.database.QDRANT_API_KEY:
-            self.client = QdrantClient(
+            return QdrantClient(
                 url=f"{Config.database.QDRANT_HOST}:{Config.database.QDRANT_PORT}",
                 api_key=Config.database.QDRANT_API_KEY,
-                timeout=Config.database.QDRANT_TIMEOUT
-            )
-        else:
-            self.client = QdrantClient(
-                host=Config.database.QDRANT_HOST,
-                port=Config.database.QDRANT_PORT,
-                timeout=Config.database.QDRANT_TIMEOUT
+                timeout=Config.database.QDRANT_TIMEOUT,
+                grpc_port=Config.database.QDRANT_GRPC_PORT,
+                prefer_grpc=Config.database.QDRANT_PREFER_GRPC
             )
+        return QdrantClient(
+            host=Config.database.QDRANT_HOST,
+            port=Config.database.QDRANT_PORT,
+            timeout=Config.database.QDRANT_TIMEOUT,
+            grpc_port=Config.database.QDRANT_GRPC_PORT,
+            prefer_grpc=Config.database.QDRANT_PREFER_GRPC
+        )
+
+    def ping(self) -> bool:
+        try:
+            self.client.get_collections()
+            return True
+        except Exception:
+            return False
 
     def collection_exists(self, collection_name: str) -> bool:
         try:
@@ -26,6 +52,8 @@ class QdrantRepository:
             return False
 
     def create_collection(self, collection_name: str) -> bool:
+        from qdrant_client.models import VectorParams, Distance
+
         try:
             if self.collection_exists(collection_name):
                 return False
@@ -61,31 +89,36 @@ class QdrantRepository:
             return []
 
 
-    def link_content(self, collection_name: str, documents: List[Dict[str, Any]]) -> bool:
+    def link_content(self, collection_name: str, documents: List[Dict[str, Any]], vectors: np.ndarray) -> bool:
+        """
+        Upload one point per document; row i of `vectors` is document i's
+        embedding. The float32 matrix goes to the client as-is, which slices
+        it per upload batch rather than building a PointStruct per vector.
+        """
         try:
-            points = []
-            for doc in documents:
-                text = doc.get("text", "")
-                vector = doc.get("vector", [])
-
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=vector,
-                    payload={
+            self.client.upload_collection(
+                collection_name=collection_name,
+                vectors=np.ascontiguousarray(vectors, dtype=np.float32),
+                payload=[
+                    {
                         "document_id": doc.get("document_id"),
-                        "text": text,
+                        "text": doc.get("text", ""),
                         "source": doc.get("source", ""),
                         "metadata": doc.get("metadata", {})
                     }
-                )
-                points.append(point)
-
-            self.client.upsert(collection_name=collection_name, points=points)
+                    for doc in documents
+                ],
+                ids=[str(uuid.uuid4()) for _ in documents],
+                batch_size=Config.database.QDRANT_UPLOAD_BATCH_SIZE,
+                wait=True
+            )
             return True
         except Exception:
             return False
 
     def unlink_content(self, collection_name: str, document_ids: List[str]) -> bool:
+        from qdrant_client.models import Filter, FieldCondition
+
         try:
             for doc_id in document_ids:
                 self.client.delete(
@@ -98,7 +131,7 @@ class QdrantRepository:
         except Exception:
             return False
 
-    def query_collection(self, collection_name: str, query_vector: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+    def query_collection(self, collection_name: str, query_vector: np.ndarray, limit: int = 5) -> List[Dict[str, Any]]:
         try:
             results = self.client.search(
                 collection_name=collection_name,
@@ -117,7 +150,38 @@ class QdrantRepository:
         except Exception:
             return []
 
+    def query_collection_batch(self, collection_name: str, query_vectors: np.ndarray,
+                               limit: int = 5) -> Optional[List[List[Dict[str, Any]]]]:
+        from qdrant_client.models import SearchRequest
+
+        try:
+            # SearchRequest validates plain lists; convert the whole matrix in one call
+            vectors = np.asarray(query_vectors, dtype=np.float32).tolist()
+            batch_results = self.client.search_batch(
+                collection_name=collection_name,
+                requests=[
+                    SearchRequest(vector=vector, limit=limit, with_payload=True)
+                    for vector in vectors
+                ]
+            )
+
+            return [
+                [
+                    {
+                        "id": hit.id,
+                        "score": hit.score,
+                        "payload": hit.payload
+                    }
+                    for hit in results
+                ]
+                for results in batch_results
+            ]
+        except Exception:
+            return None
+
     def batch_read_files(self, collection_name: str, document_ids: List[str]) -> Dict[str, Any]:
+        from qdrant_client.models import Filter, FieldCondition
+
         try:
             status = {}
             for doc_id in document_ids:
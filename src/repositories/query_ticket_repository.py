@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTicketRepository:
+    """
+    Short-lived, bounded store of the query vector and result doc_ids behind
+    each query response, so feedback on that response can reuse the vector
+    instead of embedding the query again.
+
+    Tickets live in a small SQLite (WAL) table so that every worker process
+    started by serve.py can resolve a ticket issued by any other. Like the LLM
+    cache, the connection is opened lazily and reopened after a fork.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.path = Config.query.QUERY_TICKET_PATH
+        self.ttl_seconds = Config.query.QUERY_TICKET_TTL_SECONDS
+        self.max_entries = Config.query.QUERY_TICKET_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stats = {"created": 0, "hits": 0, "misses": 0, "mismatched": 0}
+        self._initialized = True
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_tickets ("
+                "ticket_id TEXT PRIMARY KEY, query TEXT NOT NULL, doc_ids TEXT NOT NULL, "
+                "vector BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_query_tickets_expires_at ON query_tickets(expires_at)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM query_tickets WHERE expires_at <= ?", (now,))
+        excess = conn.execute("SELECT COUNT(*) FROM query_tickets").fetchone()[0] - self.max_entries
+        if excess > 0:
+            # Every ticket has the same TTL, so the earliest expiry is the oldest ticket
+            conn.execute(
+                "DELETE FROM query_tickets WHERE ticket_id IN "
+                "(SELECT ticket_id FROM query_tickets ORDER BY expires_at ASC, rowid ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def create_ticket(self, query: str, query_vector: np.ndarray, doc_ids: Dict[str, List[str]]) -> Optional[str]:
+        """
+        Store a ticket for a response built from `doc_ids` (collection -> documents
+        it returned). Returns the ticket id, or None if it could not be stored.
+        """
+        ticket_id = secrets.token_urlsafe(16)
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT INTO query_tickets (ticket_id, query, doc_ids, vector, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (ticket_id, query, json.dumps(doc_ids),
+                     np.asarray(query_vector, dtype=np.float32).tobytes(), now + self.ttl_seconds)
+                )
+                self._evict(conn, now)
+                conn.commit()
+                self._stats["created"] += 1
+                return ticket_id
+            except Exception as e:
+                logger.error(f"Query ticket write failed: {e}")
+                return None
+
+    def get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT query, doc_ids, vector FROM query_tickets WHERE ticket_id = ? AND expires_at > ?",
+                    (ticket_id, time.time())
+                ).fetchone()
+            except Exception as e:
+                logger.error(f"Query ticket read failed: {e}")
+                row = None
+
+        if row is None:
+            return None
+        query, doc_ids, vector = row
+        return {"query": query, "doc_ids": json.loads(doc_ids), "vector": np.frombuffer(vector, dtype=np.float32)}
+
+    def resolve_vector(self, ticket_id: str, query: str, collection: str, doc_ids: List[str]) -> Optional[np.ndarray]:
+        """
+        Return the ticket's query vector if the feedback is on that same response:
+        same question, and documents the response returned from `collection`.
+        Every lookup counts as a hit, a miss (unknown or expired) or a mismatch.
+        """
+        ticket = self.get_ticket(ticket_id)
+        if ticket is None:
+            outcome, vector = "misses", None
+        elif ticket["query"] == query and set(doc_ids) <= set(ticket["doc_ids"].get(collection, ())):
+            outcome, vector = "hits", ticket["vector"]
+        else:
+            outcome, vector = "mismatched", None
+
+        with self._lock:
+            self._stats[outcome] += 1
+        return vector
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"] + stats["mismatched"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups > 0 else 0.0
+        return stats
+
+
+def _query_ticket_samples():
+    stats = QueryTicketRepository().get_stats()
+    return [
+        ("rag_query_ticket_lookups_total", "counter", "Feedback query-ticket lookups by outcome",
+         {"result": result}, stats[key])
+        for result, key in (("hit", "hits"), ("miss", "misses"), ("mismatch", "mismatched"))
+    ]
+
+
+metrics.register_collector(_query_ticket_samples)
@@ -1,10 +1,32 @@
-from typing import List, Dict, Any, Optional
+import os
+import threading
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Callable, ContextManager
 from datetime import datetime
+import numpy as np
 from repositories.qdrant_repository import QdrantRepository
 from utils.embedding_client import EmbeddingClient
 from services.file_service import FileService
 from services.query_service import QueryService
-from models.api_models import LinkContentItem, LinkContentResponse, ApiResponse, ApiResponseWithBody, QueryResponse, UnlinkContentResponse
+from models.api_models import LinkContentItem, LinkContentResponse, ApiResponse, ApiResponseWithBody, QueryResponse, UnlinkContentResponse, BatchQueryItem, BatchQueryResponse
+from utils.singleflight import SingleFlight
+from utils.change_log import ChangeLog, CHANGE_UPSERT, CHANGE_DELETE
+from utils.metrics import metrics, track_stage
+from config import Config
+
+# Shared across CollectionService instances so duplicate queries coalesce process-wide
+query_singleflight = SingleFlight()
+
+
+def _query_coalescing_samples():
+    stats = query_singleflight.get_stats()
+    return [
+        ("rag_query_executed_total", "counter", "Query pipeline runs started by a singleflight leader", {}, stats["executed"]),
+        ("rag_query_coalesced_total", "counter", "Queries that waited on an identical in-flight query", {}, stats["coalesced"]),
+    ]
+
+
+metrics.register_collector(_query_coalescing_samples)
 
 class CollectionService:
     def __init__(self):
@@ -12,11 +34,26 @@ class CollectionService:
         self.embedding_client = EmbeddingClient()
         self.file_service = FileService()
         self.query_service = QueryService()
+        self._collection_versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self.change_log = ChangeLog(
+            os.path.join(self.file_service.upload_dir, "collections_changes.log"), Config.app.CHANGE_LOG_MAX_BYTES
+        )
+
+    def _get_collection_version(self, collection_name: str) -> int:
+        with self._versions_lock:
+            return self._collection_versions.get(collection_name, 0)
+
+    def _bump_collection_version(self, collection_name: str) -> None:
+        with self._versions_lock:
+            self._collection_versions[collection_name] = self._collection_versions.get(collection_name, 0) + 1
 
     def create_collection(self, name: str, rag_config: Optional[Dict] = None, indexing_config: Optional[Dict] = None) -> ApiResponse:
         try:
             success = self.qdrant_repo.create_collection(name)
             if success:
+                self._bump_collection_version(name)
+                self.change_log.append(CHANGE_UPSERT, name)
                 return ApiResponse(status="SUCCESS", message="Collection created successfully")
             else:
                 return ApiResponse(status="FAILURE", message="Failed to create collection, already exists")
@@ -31,16 +68,38 @@ class CollectionService:
 
             success = self.qdrant_repo.delete_collection(name)
             if success:
+                self._bump_collection_version(name)
+                self.change_log.append(CHANGE_DELETE, name)
                 return ApiResponse(status="SUCCESS", message=f"Collection '{name}' deleted successfully")
             else:
                 return ApiResponse(status="FAILURE", message=f"Failed to delete collection '{name}' - check server logs for details")
         except Exception as e:
             return ApiResponse(status="FAILURE", message=f"Failed to delete collection: {str(e)}")
 
-    def list_collections(self) -> ApiResponseWithBody:
+    def list_collections(self, since: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> ApiResponseWithBody:
         try:
-            collections = self.qdrant_repo.list_collections()
-            return ApiResponseWithBody(status="SUCCESS", message="Collections retrieved successfully", body={"collections": collections})
+            # Same contract as FileService.list_files_since: deltas for a valid cursor, else a full page
+            if since:
+                delta = self.change_log.read_since(since, limit or 1000)
+                if delta is not None:
+                    changes, cursor, has_more = delta
+                    return ApiResponseWithBody(
+                        status="SUCCESS",
+                        message="Collection changes retrieved successfully",
+                        body={"changes": changes, "cursor": cursor, "has_more": has_more}
+                    )
+
+            cursor = self.change_log.cursor()
+            collections = sorted(self.qdrant_repo.list_collections())
+            page = collections[offset:offset + limit] if limit else collections[offset:]
+            body = {
+                "collections": page,
+                "total": len(collections),
+                "has_more": offset + len(page) < len(collections),
+                "cursor": cursor,
+                "reset": bool(since)
+            }
+            return ApiResponseWithBody(status="SUCCESS", message="Collections retrieved successfully", body=body)
         except Exception as e:
             return ApiResponseWithBody(status="FAILURE", message=f"Failed to list collections: {str(e)}", body={})
 
@@ -63,19 +122,13 @@ class CollectionService:
     def _get_file_content(self, file_id: str) -> Optional[str]:
         return self.file_service.get_file_content(file_id)
 
-    def _generate_embedding_and_document(self, file_id: str, file_content: str, file_type: str) -> Optional[List[Dict[str, Any]]]:
-        try:
-            embedding = self.embedding_client.generate_single_embedding(file_content)
-            documents = [{
-                "document_id": file_id,
-                "text": file_content,
-                "source": file_type,
-                "metadata": {"file_type": file_type},
-                "vector": embedding
-            }]
-            return documents
-        except Exception:
-            return None
+    def _create_documents(self, file_id: str, file_content: str, file_type: str) -> List[Dict[str, Any]]:
+        return [{
+            "document_id": file_id,
+            "text": file_content,
+            "source": file_type,
+            "metadata": {"file_type": file_type}
+        }]
 
     def _check_file_already_linked(self, collection_name: str, file_id: str) -> bool:
         try:
@@ -124,38 +177,88 @@ class CollectionService:
                 ))
             return responses
 
-        for file_item in files:
+        # Validate every file first, then read and embed them in bounded chunks, one bulk pass per chunk
+        responses = [None] * len(files)
+        pending = []
+        pending_ids = set()
+        for position, file_item in enumerate(files):
             try:
                 if not self._validate_file_exists(file_item.file_id):
-                    responses.append(self._create_link_error_response(file_item, 404, "File not found"))
+                    responses[position] = self._create_link_error_response(file_item, 404, "File not found")
                     continue
 
-                if self._check_file_already_linked(collection_name, file_item.file_id):
-                    responses.append(self._create_link_error_response(file_item, 409, "File already linked, unlink first"))
+                if file_item.file_id in pending_ids or self._check_file_already_linked(collection_name, file_item.file_id):
+                    responses[position] = self._create_link_error_response(file_item, 409, "File already linked, unlink first")
                     continue
 
-                file_content = self._get_file_content(file_item.file_id)
+                pending.append((position, file_item))
+                pending_ids.add(file_item.file_id)
+
+            except Exception as e:
+                responses[position] = self._create_link_error_response(file_item, 500, f"Internal error: {str(e)}")
+
+        chunk_size = max(1, Config.embedding.INGEST_BULK_MAX_FILES)
+        for start in range(0, len(pending), chunk_size):
+            self._link_chunk(collection_name, pending[start:start + chunk_size], responses)
+
+        return responses
+
+    def _embed_chunk(self, contents: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Bulk-encode a chunk; if that fails, encode file by file so only the
+        files that actually fail are reported. Returns one row view (or None) per file.
+        """
+        try:
+            embeddings = self.embedding_client.encode_bulk(contents)
+            return [embeddings[row:row + 1] for row in range(len(contents))]
+        except Exception:
+            pass
+
+        rows = []
+        for content in contents:
+            try:
+                rows.append(self.embedding_client.encode_bulk([content]))
+            except Exception:
+                rows.append(None)
+        return rows
+
+    def _link_chunk(self, collection_name: str, chunk: List, responses: List[Optional[LinkContentResponse]]) -> None:
+        readable = []
+        for position, file_item in chunk:
+            try:
+                with track_stage("ingest", "read_file"):
+                    file_content = self._get_file_content(file_item.file_id)
                 if not file_content:
-                    responses.append(self._create_link_error_response(file_item, 500, "Could not read file content"))
+                    responses[position] = self._create_link_error_response(file_item, 500, "Could not read file content")
                     continue
+                readable.append((position, file_item, file_content))
+            except Exception as e:
+                responses[position] = self._create_link_error_response(file_item, 500, f"Internal error: {str(e)}")
 
-                documents = self._generate_embedding_and_document(
-                    file_item.file_id, file_content, file_item.type
-                )
-                if not documents:
-                    responses.append(self._create_link_error_response(file_item, 500, "Failed to generate embedding"))
-                    continue
+        if not readable:
+            return
 
-                success = self.qdrant_repo.link_content(collection_name, documents)
+        with track_stage("ingest", "embed"):
+            embeddings = self._embed_chunk([content for _, _, content in readable])
+
+        for (position, file_item, file_content), embedding in zip(readable, embeddings):
+            if embedding is None:
+                responses[position] = self._create_link_error_response(file_item, 500, "Failed to generate embedding")
+                continue
+
+            try:
+                documents = self._create_documents(file_item.file_id, file_content, file_item.type)
+                with track_stage("ingest", "qdrant_upsert"):
+                    # A one-row slice is a view into the bulk matrix, not a copy
+                    success = self.qdrant_repo.link_content(collection_name, documents, embedding)
                 if success:
-                    responses.append(self._create_link_success_response(file_item))
+                    self._bump_collection_version(collection_name)
+                    responses[position] = self._create_link_success_response(file_item)
                 else:
-                    responses.append(self._create_link_error_response(file_item, 500, "Failed to link content to collection"))
+                    responses[position] = self._create_link_error_response(file_item, 500, "Failed to link content to collection")
 
             except Exception as e:
-                responses.append(self._create_link_error_response(file_item, 500, f"Internal error: {str(e)}"))
-
-        return responses
+                responses[position] = self._create_link_error_response(file_item, 500, f"Internal error: {str(e)}")
 
     def unlink_content(self, collection_name: str, file_ids: List[str]) -> List[UnlinkContentResponse]:
         responses = []
@@ -173,6 +276,7 @@ class CollectionService:
 
                 success = self.qdrant_repo.unlink_content(collection_name, [file_id])
                 if success:
+                    self._bump_collection_version(collection_name)
                     responses.append(self._create_unlink_response(file_id, 200, "Successfully unlinked from collection"))
                 else:
                     responses.append(self._create_unlink_response(file_id, 500, "Failed to unlink content from collection"))
@@ -182,7 +286,54 @@ class CollectionService:
 
         return responses
 
-    def query_collection(self, collection_name: str, query_text: str, enable_critic: bool = True, limit: int = 5) -> QueryResponse:
+    def query_federated(self, collection_names: List[str], query_text: str, enable_critic: bool = True,
+                        limit: int = 5, bypass_cache: bool = False,
+                        admit: Callable[[], ContextManager] = nullcontext) -> QueryResponse:
+        # Unknown collections are skipped; the query fails only if none exist
+        existing = [name for name in dict.fromkeys(collection_names) if self._validate_collection_exists(name)]
+
+        if not existing or not query_text.strip():
+            return QueryResponse(
+                answer="Context not found",
+                confidence=0.0,
+                is_relevant=False,
+                chunks=[]
+            )
+
+        def run() -> QueryResponse:
+            with admit():
+                return self.query_service.search_federated(existing, query_text, limit, enable_critic, bypass_cache)
+
+        if not Config.query.QUERY_COALESCING_ENABLED:
+            return run()
+
+        flight_key = (
+            tuple(sorted((name, self._get_collection_version(name)) for name in existing)),
+            " ".join(query_text.lower().split()),
+            enable_critic,
+            bypass_cache,
+            limit
+        )
+        return query_singleflight.do(flight_key, run)
+
+    def query_collection_batch(self, collection_name: str, query_texts: List[str], enable_critic: bool = True,
+                               limit: int = 5, bypass_cache: bool = False) -> BatchQueryResponse:
+        if not self._validate_collection_exists(collection_name):
+            return BatchQueryResponse(results=[
+                BatchQueryItem(index=index, status="FAILURE", error="Collection not found")
+                for index in range(len(query_texts))
+            ])
+
+        return BatchQueryResponse(
+            results=self.query_service.search_batch(collection_name, query_texts, limit, enable_critic, bypass_cache)
+        )
+
+    def query_collection(self, collection_name: str, query_text: str, enable_critic: bool = True, limit: int = 5,
+                         bypass_cache: bool = False, admit: Callable[[], ContextManager] = nullcontext) -> QueryResponse:
+        """
+        `admit` is entered around the pipeline run only, so callers coalesced onto an
+        identical in-flight query wait for its result without holding an admission slot.
+        """
         if not self._validate_collection_exists(collection_name):
             return QueryResponse(
                 answer="Context not found",
@@ -199,5 +350,21 @@ class CollectionService:
                 chunks=[]
             )
 
-        return self.query_service.search(collection_name, query_text, limit, enable_critic)
+        def run() -> QueryResponse:
+            with admit():
+                return self.query_service.search(collection_name, query_text, limit, enable_critic, bypass_cache)
+
+        if not Config.query.QUERY_COALESCING_ENABLED:
+            return run()
+
+        # Concurrent identical questions against the same collection state share one pipeline run
+        flight_key = (
+            collection_name,
+            " ".join(query_text.lower().split()),
+            enable_critic,
+            bypass_cache,
+            limit,
+            self._get_collection_version(collection_name)
+        )
+        return query_singleflight.do(flight_key, run)
 
@@ -1,5 +1,7 @@
-from typing import List
+from typing import List, Optional
+import numpy as np
 from repositories.feedback_repository import FeedbackRepository
+from repositories.query_ticket_repository import QueryTicketRepository
 from utils.embedding_client import EmbeddingClient
 from config import Config
 
@@ -8,8 +10,19 @@ class FeedbackService:
     def __init__(self):
         self.feedback_repo = FeedbackRepository()
         self.embedding_client = EmbeddingClient()
+        self.ticket_repo = QueryTicketRepository()
 
-    def save_feedback(self, query: str, doc_ids: List[str], label: int, collection: str) -> bool:
+    def _resolve_query_vector(self, query: str, collection: str, doc_ids: List[str],
+                              query_ticket: Optional[str]) -> np.ndarray:
+        if query_ticket:
+            vector = self.ticket_repo.resolve_vector(query_ticket, query, collection, doc_ids)
+            if vector is not None:
+                return vector
+        # Unknown, expired or mismatched ticket: embed again
+        return self.embedding_client.generate_single_embedding(query)
+
+    def save_feedback(self, query: str, doc_ids: List[str], label: int, collection: str,
+                      query_ticket: Optional[str] = None) -> bool:
         if not Config.feedback.FEEDBACK_ENABLED:
             return False
 
@@ -17,7 +30,7 @@ class FeedbackService:
             return False
 
         try:
-            query_vector = self.embedding_client.generate_single_embedding(query)
+            query_vector = self._resolve_query_vector(query, collection, doc_ids, query_ticket)
             return self.feedback_repo.save_feedback(
                 query=query,
                 query_vector=query_vector,
@@ -28,5 +41,8 @@ class FeedbackService:
         except Exception:
             return False
 
+    def compact_feedback(self):
+        return self.feedback_repo.compact()
+
     def get_feedback_stats(self, collection: str = None):
         return self.feedback_repo.get_feedback_stats(collection)
\ No newline at end of file
@@ -5,12 +5,15 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from models.api_models import FileUploadResponse, ApiResponse, ApiResponseWithBody
+from utils.change_log import ChangeLog, CHANGE_UPSERT, CHANGE_DELETE
+from config import Config
 
 class FileService:
     def __init__(self):
         self.upload_dir = "uploads"
         self.metadata_file = os.path.join(self.upload_dir, "files_metadata.json")
         os.makedirs(self.upload_dir, exist_ok=True)
+        self.change_log = ChangeLog(os.path.join(self.upload_dir, "files_changes.log"), Config.app.CHANGE_LOG_MAX_BYTES)
 
     def _load_metadata(self) -> Dict[str, Any]:
         try:
@@ -47,6 +50,7 @@ class FileService:
                 "file_path": file_path
             }
             self._save_metadata(metadata)
+            self.change_log.append(CHANGE_UPSERT, file_id, metadata[file_id])
 
             return FileUploadResponse(
                 status="SUCCESS",
@@ -120,6 +124,7 @@ class FileService:
                 if file_id in metadata:
                     del metadata[file_id]
                     self._save_metadata(metadata)
+                self.change_log.append(CHANGE_DELETE, file_id)
 
                 return True
             except Exception:
@@ -128,4 +133,30 @@ class FileService:
 
     def list_files(self) -> List[Dict[str, Any]]:
         metadata = self._load_metadata()
-        return list(metadata.values())
\ No newline at end of file
+        return list(metadata.values())
+
+    def list_files_since(self, since: Optional[str] = None, offset: int = 0,
+                         limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Listing body for GET /files. With a valid `since` cursor only the
+        changes after it are returned; otherwise a page of the full listing
+        (ordered by upload date) with "reset": true when a cursor was rejected.
+        Either way "cursor" is the position to pass as `since` next time.
+        """
+        if since:
+            delta = self.change_log.read_since(since, limit or 1000)
+            if delta is not None:
+                changes, cursor, has_more = delta
+                return {"changes": changes, "cursor": cursor, "has_more": has_more}
+
+        # Taken before the snapshot: changes racing with it are replayed, never lost
+        cursor = self.change_log.cursor()
+        files = sorted(self.list_files(), key=lambda file: file.get("upload_date", ""))
+        page = files[offset:offset + limit] if limit else files[offset:]
+        return {
+            "files": page,
+            "total": len(files),
+            "has_more": offset + len(page) < len(files),
+            "cursor": cursor,
+            "reset": bool(since)
+        }
\ No newline at end of file
@@ -1,11 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+import numpy as np
 from repositories.qdrant_repository import QdrantRepository
 from repositories.feedback_repository import FeedbackRepository
+from repositories.query_ticket_repository import QueryTicketRepository
 from utils.embedding_client import EmbeddingClient
 from utils.llm_client import LlmClient
-from models.api_models import QueryResponse, ChunkConfig, CriticEvaluation
+from models.api_models import QueryResponse, ChunkConfig, CriticEvaluation, BatchQueryItem
 from core.reranker import reranker
 from core.critic import critic
+from utils.metrics import track_stage
 from config import Config
 
 class QueryService:
@@ -14,6 +18,7 @@ class QueryService:
         self.embedding_client = EmbeddingClient()
         self.llm_client = LlmClient()
         self.feedback_repo = FeedbackRepository()
+        self.ticket_repo = QueryTicketRepository()
 
     def _filter_relevant_results(self, results: List[Dict], threshold: float = 0.5) -> List[Dict]:
         return [result for result in results if result.get("score", 0) >= threshold]
@@ -38,7 +43,7 @@ class QueryService:
 
             if text and self._is_valid_text(text) and text not in seen_texts:
                 seen_texts.add(text)
-                chunks.append(ChunkConfig(source=source, text=text))
+                chunks.append(ChunkConfig(source=source, text=text, collection=result.get("collection")))
 
         return chunks[:3]
 
@@ -61,7 +66,8 @@ class QueryService:
             return 0.0
         return max(result.get("score", 0) for result in results)
 
-    def _create_query_response(self, results: List[Dict], query: str, enable_critic: bool = True) -> QueryResponse:
+    def _create_query_response(self, results: List[Dict], query: str, enable_critic: bool = True,
+                               bypass_cache: bool = False) -> QueryResponse:
         relevant_results = self._filter_relevant_results(results)
 
         if not relevant_results:
@@ -84,12 +90,15 @@ class QueryService:
 
         chunk_texts = [chunk.text for chunk in chunks]
         full_chunk_texts = self._extract_full_texts(relevant_results)
-        answer = self.llm_client.generate_answer(query, chunk_texts)
+        with track_stage("query", "llm"):
+            answer = self.llm_client.generate_answer(query, chunk_texts, bypass_cache)
         confidence = self._calculate_confidence(relevant_results)
 
         critic_result = None
         if enable_critic and critic.is_available():
-            if critic_evaluation := critic.evaluate(query, full_chunk_texts, answer):
+            with track_stage("query", "critic"):
+                critic_evaluation = critic.evaluate(query, full_chunk_texts, answer, bypass_cache)
+            if critic_evaluation:
                 critic_result = CriticEvaluation(**critic_evaluation)
 
         return QueryResponse(
@@ -100,22 +109,20 @@ class QueryService:
             critic=critic_result
         )
 
-    def _apply_feedback_scoring(self, results: List[Dict], query_vector: List[float],
+    def _apply_feedback_scoring(self, results: List[Dict], query_vector: np.ndarray,
                               collection_name: str) -> List[Dict]:
         if not Config.feedback.FEEDBACK_ENABLED or not results:
             return results
 
         try:
-            relevant_feedback = self.feedback_repo.get_relevant_feedback(
-                query_vector, collection_name, Config.feedback.FEEDBACK_SIMILARITY_THRESHOLD
+            doc_ids = [result.get("payload", {}).get("document_id", "") for result in results]
+            feedback_scores = self.feedback_repo.get_feedback_scores(
+                query_vector, collection_name, doc_ids, Config.feedback.FEEDBACK_SIMILARITY_THRESHOLD
             )
 
-            if not relevant_feedback:
+            if not feedback_scores:
                 return results
 
-            doc_ids = [result.get("payload", {}).get("document_id", "") for result in results]
-            feedback_scores = self.feedback_repo.calculate_feedback_scores(doc_ids, relevant_feedback)
-
             for result in results:
                 doc_id = result.get("payload", {}).get("document_id", "")
                 original_score = result.get("score", 0.0)
@@ -134,23 +141,176 @@ class QueryService:
         except Exception:
             return results
 
-    def search(self, collection_name: str, query_text: str, limit: int = 10, enable_critic: bool = True) -> QueryResponse:
+    def search(self, collection_name: str, query_text: str, limit: int = 10, enable_critic: bool = True,
+               bypass_cache: bool = False) -> QueryResponse:
         try:
-            query_vector = self.embedding_client.generate_single_embedding(query_text)
-            results = self.qdrant_repo.query_collection(collection_name, query_vector, limit)
+            with track_stage("query", "embed"):
+                query_vector = self.embedding_client.generate_single_embedding(query_text)
+            with track_stage("query", "qdrant_search"):
+                results = self.qdrant_repo.query_collection(collection_name, query_vector, limit)
 
             # Apply reranking if available and enabled
             if reranker.is_available() and results:
-                results = reranker.rerank(query_text, results)
+                with track_stage("query", "rerank"):
+                    results = reranker.rerank(query_text, results)
 
-            # Apply feedback scoring if enabled
+            return self._answer(collection_name, query_text, query_vector, results, enable_critic, bypass_cache)
+        except Exception as e:
+            return QueryResponse(
+                answer="Context not found",
+                confidence=0.0,
+                is_relevant=False,
+                chunks=[]
+            )
+
+    def _answer(self, collection_name: str, query_text: str, query_vector: np.ndarray, results: List[Dict],
+                enable_critic: bool, bypass_cache: bool) -> QueryResponse:
+        # Apply feedback scoring if enabled
+        with track_stage("query", "feedback_scoring"):
             results = self._apply_feedback_scoring(results, query_vector, collection_name)
 
-            return self._create_query_response(results, query_text, enable_critic)
-        except Exception as e:
+        response = self._create_query_response(results, query_text, enable_critic, bypass_cache)
+
+        # Feedback on this response can reuse the query vector through the ticket
+        if response.chunks:
+            response.query_ticket = self.ticket_repo.create_ticket(
+                query_text, query_vector, {collection_name: [chunk.source for chunk in response.chunks]}
+            )
+        return response
+
+    def _normalize_scores(self, results: List[Dict]) -> None:
+        # Mostly min-max within one collection, so a collection whose scores all sit
+        # higher or lower does not crowd the others out of the merged list. The raw
+        # cosine share keeps a strong worst hit above zero, and a lone (or flat) result
+        # set, which has no spread to normalise, keeps its raw score instead of 1.0
+        if not results:
+            return
+        scores = [result.get("score", 0.0) for result in results]
+        low, high = min(scores), max(scores)
+        for result, score in zip(results, scores):
+            spread = (score - low) / (high - low) if high > low else score
+            result["normalized_score"] = 0.7 * spread + 0.3 * score
+
+    def _apply_federated_feedback_scoring(self, results: List[Dict], query_vector: np.ndarray) -> List[Dict]:
+        """
+        Apply each result's collection feedback to the merged (and possibly reranked) list.
+        Raw scores are not comparable across collections and the reranker's scores are not
+        kept, so the list position stands in for the search/rerank score, with the same
+        80/20 search/feedback weighting _apply_feedback_scoring uses.
+        """
+        position_scores = {
+            id(result): 1.0 - position / max(len(results) - 1, 1) for position, result in enumerate(results)
+        }
+        by_collection: Dict[str, List[Dict]] = {}
+        for result in results:
+            by_collection.setdefault(result["collection"], []).append(result)
+        scored = [
+            result
+            for collection_name, group in by_collection.items()
+            for result in self._apply_feedback_scoring(group, query_vector, collection_name)
+        ]
+        if not any("feedback_score" in result for result in scored):
+            return results
+        scored.sort(key=lambda x: 0.8 * position_scores[id(x)] + 0.2 * x.get("feedback_score", 0.5), reverse=True)
+        return scored
+
+    def search_federated(self, collection_names: List[str], query_text: str, limit: int = 10,
+                         enable_critic: bool = True, bypass_cache: bool = False) -> QueryResponse:
+        """
+        Answer one query over several collections: embed once, search every
+        collection concurrently, merge on per-collection normalised scores,
+        rerank the union once, apply each result's collection feedback and
+        make a single LLM call.
+        """
+        try:
+            with track_stage("query", "embed"):
+                query_vector = self.embedding_client.generate_single_embedding(query_text)
+
+            def search_one(collection_name: str) -> List[Dict]:
+                results = self.qdrant_repo.query_collection(collection_name, query_vector, limit)
+                for result in results:
+                    result["collection"] = collection_name
+                self._normalize_scores(results)
+                return results
+
+            with track_stage("query", "qdrant_search"):
+                with ThreadPoolExecutor(max_workers=len(collection_names)) as pool:
+                    per_collection = list(pool.map(search_one, collection_names))
+
+            results = [result for results in per_collection for result in results]
+            results.sort(key=lambda x: (x.get("normalized_score", 0.0), x.get("score", 0.0)), reverse=True)
+
+            if reranker.is_available() and results:
+                with track_stage("query", "rerank"):
+                    results = reranker.rerank(query_text, results)
+
+            # As in search(): feedback adjusts the reranked list rather than being discarded by it
+            with track_stage("query", "feedback_scoring"):
+                results = self._apply_federated_feedback_scoring(results, query_vector)
+
+            response = self._create_query_response(results, query_text, enable_critic, bypass_cache)
+            # One ticket covers feedback on any of the collections that contributed chunks
+            if response.chunks:
+                doc_ids: Dict[str, List[str]] = {}
+                for chunk in response.chunks:
+                    doc_ids.setdefault(chunk.collection, []).append(chunk.source)
+                response.query_ticket = self.ticket_repo.create_ticket(query_text, query_vector, doc_ids)
+            return response
+        except Exception:
             return QueryResponse(
                 answer="Context not found",
                 confidence=0.0,
                 is_relevant=False,
                 chunks=[]
-            )
\ No newline at end of file
+            )
+
+    def search_batch(self, collection_name: str, query_texts: List[str], limit: int = 10,
+                     enable_critic: bool = True, bypass_cache: bool = False) -> List[BatchQueryItem]:
+        """
+        Answer many queries at once: one embedding call, one Qdrant search_batch
+        and one rerank call for the whole batch, then LLM/critic calls fanned out
+        over QUERY_BATCH_LLM_CONCURRENCY threads. Items come back in input order,
+        each with its own status and error.
+        """
+        items: List[BatchQueryItem] = [None] * len(query_texts)
+        active = []
+        for index, query_text in enumerate(query_texts):
+            if query_text.strip():
+                active.append(index)
+            else:
+                items[index] = BatchQueryItem(index=index, status="FAILURE", error="Empty query")
+
+        if not active:
+            return items
+
+        texts = [query_texts[index] for index in active]
+        try:
+            with track_stage("query_batch", "embed"):
+                query_vectors = self.embedding_client.generate_embeddings(texts)
+            with track_stage("query_batch", "qdrant_search"):
+                batch_results = self.qdrant_repo.query_collection_batch(collection_name, query_vectors, limit)
+            if batch_results is None:
+                raise RuntimeError("Vector search failed")
+
+            if reranker.is_available():
+                with track_stage("query_batch", "rerank"):
+                    batch_results = reranker.rerank_batch(texts, batch_results)
+        except Exception as e:
+            for index in active:
+                items[index] = BatchQueryItem(index=index, status="FAILURE", error=str(e))
+            return items
+
+        def answer(position: int) -> BatchQueryItem:
+            index = active[position]
+            try:
+                response = self._answer(collection_name, texts[position], query_vectors[position],
+                                        batch_results[position], enable_critic, bypass_cache)
+                return BatchQueryItem(index=index, status="SUCCESS", result=response)
+            except Exception as e:
+                return BatchQueryItem(index=index, status="FAILURE", error=str(e))
+
+        with ThreadPoolExecutor(max_workers=min(Config.query.QUERY_BATCH_LLM_CONCURRENCY, len(active))) as pool:
+            for item in pool.map(answer, range(len(active))):
+                items[item.index] = item
+
+        return items
\ No newline at end of file
@@ -0,0 +1,163 @@
+import json
+import os
+import secrets
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms fall back to in-process locking only
+    fcntl = None
+
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+
+
+class ChangeLog:
+    """
+    Append-only JSONL log of upserts and deletes, shared by every worker
+    process through the filesystem, that lets clients fetch only what changed.
+
+    The first line of the file is a header carrying a random epoch. A cursor
+    is "<epoch>:<offset>", a byte offset into the file of that epoch. Once the
+    log grows past max_bytes it is replaced by a file with a fresh epoch;
+    clients holding an old cursor are told to reload in full. (Inode numbers
+    are not used as the epoch because the filesystem recycles them.)
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._ensure_exists()
+
+    @staticmethod
+    def _header() -> bytes:
+        return (json.dumps({"epoch": secrets.token_hex(8)}) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _read_header(f) -> Optional[Tuple[str, int]]:
+        """Return (epoch, header length) from an open binary file, or None if it has no header."""
+        f.seek(0)
+        line = f.readline()
+        try:
+            epoch = json.loads(line)["epoch"] if line.endswith(b"\n") else None
+        except (ValueError, KeyError, TypeError):
+            epoch = None
+        return (epoch, len(line)) if isinstance(epoch, str) else None
+
+    def _ensure_exists(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                if self._read_header(f) is not None:
+                    return
+            # Written before epochs were stored in the file: start a new epoch
+            with self._lock:
+                fd = self._open_locked()
+                try:
+                    with open(self.path, "rb") as f:
+                        if self._read_header(f) is None:
+                            self._replace_locked(fd)
+                finally:
+                    os.close(fd)
+            return
+
+        # Create with the header in place, without clobbering a file another process just created
+        tmp_path = f"{self.path}.tmp-{os.getpid()}-{secrets.token_hex(4)}"
+        with open(tmp_path, "wb") as f:
+            f.write(self._header())
+        try:
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+    def _open_locked(self) -> int:
+        """Open the log for appending under an exclusive lock, retrying if a rotation replaced it meanwhile."""
+        while True:
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND, 0o644)
+            except FileNotFoundError:
+                self._ensure_exists()
+                continue
+            if fcntl is None:
+                return fd
+            # Serialise writers across worker processes; released on close
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _replace_locked(self, fd: int) -> int:
+        """
+        Swap in an empty log with a new epoch while holding the old file's lock,
+        so no other writer rotates concurrently; writers already waiting on the
+        old inode re-check it and reopen the new file. Returns the new file's fd, locked.
+        """
+        tmp_path = self.path + ".tmp"
+        tmp_fd = os.open(tmp_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_TRUNC, 0o644)
+        if fcntl is not None:
+            fcntl.flock(tmp_fd, fcntl.LOCK_EX)
+        os.write(tmp_fd, self._header())
+        os.replace(tmp_path, self.path)
+        return tmp_fd
+
+    def append(self, op: str, key: str, item: Optional[Dict[str, Any]] = None) -> None:
+        line = (json.dumps({"op": op, "key": key, "item": item}) + "\n").encode("utf-8")
+        with self._lock:
+            fd = self._open_locked()
+            try:
+                if os.fstat(fd).st_size + len(line) > self.max_bytes:
+                    new_fd = self._replace_locked(fd)
+                    os.close(fd)
+                    fd = new_fd
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+    def cursor(self) -> str:
+        with open(self.path, "rb") as f:
+            header = self._read_header(f)
+            size = os.fstat(f.fileno()).st_size
+        epoch = header[0] if header is not None else ""
+        return f"{epoch}:{size}"
+
+    def read_since(self, cursor: Optional[str], limit: int = 1000) -> Optional[Tuple[List[Dict[str, Any]], str, bool]]:
+        """
+        Return (changes, next_cursor, has_more) for the entries after `cursor`,
+        or None when the cursor is missing, malformed or from an older epoch.
+        """
+        try:
+            epoch, offset = (cursor or "").split(":")
+            offset = int(offset)
+        except ValueError:
+            return None
+
+        with open(self.path, "rb") as f:
+            header = self._read_header(f)
+            size = os.fstat(f.fileno()).st_size
+            if header is None or header[0] != epoch or not header[1] <= offset <= size:
+                return None
+            f.seek(offset)
+            data = f.read()
+
+        changes = []
+        consumed = 0
+        for line in data.split(b"\n")[:-1]:
+            if len(changes) >= limit:
+                break
+            consumed += len(line) + 1
+            try:
+                changes.append(json.loads(line))
+            except ValueError:
+                continue
+
+        has_more = consumed < data.rfind(b"\n") + 1
+        return changes, f"{epoch}:{offset + consumed}", has_more
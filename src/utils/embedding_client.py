@@ -1,15 +1,164 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+import numpy as np
 from config import Config
+from utils.metrics import metrics, model_batch_size
+from utils.inference_executor import inference_executor
+from utils.onnx_backend import BACKEND_ONNX, OnnxSentenceEncoder
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXT = "warm up"
+
+embedder_tokens = metrics.counter(
+    "rag_embedder_bulk_tokens_total", "Tokens encoded by bulk embedding; divide its rate by seconds_total for tokens/s"
+)
+embedder_seconds = metrics.counter(
+    "rag_embedder_bulk_seconds_total", "Wall time spent in bulk embedding"
+)
+
+
+def load_model(model_name: str, backend: str):
+    if backend == BACKEND_ONNX:
+        return OnnxSentenceEncoder(model_name)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
 
 class EmbeddingClient:
+    # One model per name, shared by every EmbeddingClient in the process and
+    # loaded on first use, so importing the services does not pull in torch
+    _models: Dict[Tuple[str, str], object] = {}
+    _models_lock = threading.Lock()
+    _pool = None
+    _pool_lock = threading.Lock()
+
     def __init__(self):
-        self.model = SentenceTransformer(Config.embedding.MODEL_NAME)
+        self.model_name = Config.embedding.MODEL_NAME
+        self.backend = Config.embedding.EMBEDDING_BACKEND
+
+    @property
+    def model(self):
+        model = self._models.get((self.backend, self.model_name))
+        return model if model is not None else self.load()
+
+    def load(self):
+        with self._models_lock:
+            model = self._models.get((self.backend, self.model_name))
+            if model is None:
+                logger.info(f"Loading embedding model: {self.model_name} ({self.backend})")
+                model = load_model(self.model_name, self.backend)
+                self._models[(self.backend, self.model_name)] = model
+        return model
+
+    def warm_up(self) -> None:
+        self.generate_single_embedding(WARM_UP_TEXT)
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Return an (n, dim) C-contiguous float32 matrix; rows are views, not copies."""
+        model_batch_size.observe(len(texts), model="embedder")
+        embeddings = inference_executor.run("embedder", self.model.encode, texts)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def generate_single_embedding(self, text: str) -> np.ndarray:
+        return self.generate_embeddings([text])[0]
+
+    def _bucket(self, texts: Sequence[str]) -> List[Tuple[np.ndarray, int]]:
+        """
+        Split texts into batches of similar token length, longest first.
+        Returns (indices, token_count) per batch, where token_count is the
+        batch's real (unpadded) token count; each batch holds about
+        EMBEDDING_BULK_BATCH_TOKENS padded tokens.
+        """
+        model = self.model
+        max_length = model.max_seq_length
+        lengths = np.fromiter(
+            (len(ids) for ids in model.tokenizer(list(texts), truncation=True, max_length=max_length)["input_ids"]),
+            dtype=np.int64, count=len(texts)
+        )
+        order = np.argsort(-lengths, kind="stable")
+
+        batches = []
+        start = 0
+        while start < len(order):
+            # The first (longest) text sets the padded length for the whole batch
+            padded_length = int(max(lengths[order[start]], 1))
+            size = Config.embedding.EMBEDDING_BULK_BATCH_TOKENS // padded_length
+            size = max(1, min(size, Config.embedding.EMBEDDING_BULK_MAX_BATCH_SIZE))
+            indices = order[start:start + size]
+            batches.append((indices, int(lengths[indices].sum())))
+            start += size
+        return batches
+
+    @classmethod
+    def _get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                from utils.embedding_pool import EmbeddingPool
+                cls._pool = EmbeddingPool()
+        return cls._pool
+
+    @classmethod
+    def close_pool(cls) -> None:
+        """Stop the pool's worker processes. Safe to call when no pool was started."""
+        with cls._pool_lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.close()
+
+    def _use_pool(self, count: int) -> bool:
+        return Config.embedding.EMBEDDING_POOL_PROCESSES > 0 and count >= Config.embedding.EMBEDDING_POOL_MIN_TEXTS
+
+    def iter_encode_bulk(self, texts: Sequence[str]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Encode many texts in length-bucketed batches, yielding
+        (indices, float32 embeddings) per batch as soon as it is ready.
+        Large inputs are sharded across the multi-process pool when enabled.
+        """
+        if not texts:
+            return
+
+        started = time.perf_counter()
+        batches = self._bucket(texts)
+        total_tokens = sum(tokens for _, tokens in batches)
+        use_pool = self._use_pool(len(texts))
+        if use_pool:
+            # The pool dispatches every batch up front, so record their sizes here
+            for indices, _ in batches:
+                model_batch_size.observe(len(indices), model="embedder")
+            yield from self._get_pool().iter_encode(texts, [indices for indices, _ in batches])
+        else:
+            for indices, _ in batches:
+                batch = [texts[index] for index in indices]
+                model_batch_size.observe(len(batch), model="embedder")
+                embeddings = inference_executor.run(
+                    "embedder", self.model.encode, batch,
+                    batch_size=len(batch), convert_to_numpy=True, show_progress_bar=False
+                )
+                yield indices, np.asarray(embeddings, dtype=np.float32)
+
+        elapsed = time.perf_counter() - started
+        embedder_tokens.inc(total_tokens)
+        embedder_seconds.inc(elapsed)
+        logger.info(
+            f"Bulk encoded {len(texts)} texts ({total_tokens} tokens) in {elapsed:.2f}s"
+            f"{' on the process pool' if use_pool else ''}: {total_tokens / max(elapsed, 1e-9):.0f} tokens/s"
+        )
+
+    def encode_bulk(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode many texts into one float32 (len(texts), dim) array, in input order."""
+        embeddings = None
+        for indices, batch in self.iter_encode_bulk(texts):
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[indices] = batch
+        if embeddings is None:
+            return np.zeros((0, Config.embedding.VECTOR_SIZE), dtype=np.float32)
+        return embeddings
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        embeddings = self.model.encode(texts)
-        return [embedding.tolist() for embedding in embeddings]
 
-    def generate_single_embedding(self, text: str) -> List[float]:
-        embedding = self.model.encode([text])[0]
-        return embedding.tolist()
\ No newline at end of file
+# Covers plain interpreter exits; serve.py workers leave via os._exit and close the pool themselves
+atexit.register(EmbeddingClient.close_pool)
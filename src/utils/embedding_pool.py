@@ -0,0 +1,179 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+READY = "ready"
+DONE = "done"
+
+
+PARENT_CHECK_SECONDS = 5.0
+
+
+def _worker_main(model_name: str, backend: str, threads: int, tasks, results) -> None:
+    # Runs in a spawned process: size the native thread pools before torch loads
+    parent_pid = os.getppid()
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    from utils.inference_executor import configure_torch_threads
+    from utils.embedding_client import load_model, WARM_UP_TEXT
+
+    configure_torch_threads(threads, 1)
+    model = load_model(model_name, backend)
+    dimension = int(np.asarray(model.encode([WARM_UP_TEXT], show_progress_bar=False)).shape[1])
+    results.put((READY, os.getpid(), dimension))
+
+    while True:
+        try:
+            task = tasks.get(timeout=PARENT_CHECK_SECONDS)
+        except queue.Empty:
+            # The parent can exit without closing the pool (os._exit, SIGKILL); once it is
+            # gone we are reparented, and nobody will ever send work or a stop sentinel
+            if os.getppid() != parent_pid:
+                break
+            continue
+        if task is None:
+            break
+        task_id, shm_name, rows, indices, texts = task
+        try:
+            embeddings = model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+            shm = SharedMemory(name=shm_name)
+            try:
+                output = np.ndarray((rows, dimension), dtype=np.float32, buffer=shm.buf)
+                output[indices] = embeddings
+                del output
+            finally:
+                shm.close()
+            results.put((DONE, task_id, None))
+        except Exception as e:
+            results.put((DONE, task_id, f"{type(e).__name__}: {e}"))
+
+
+class EmbeddingPool:
+    """
+    Encodes large text sets on several worker processes, each with its own
+    model copy and torch thread pool. Batches are sharded across workers
+    through a task queue; workers write float32 rows straight into one
+    shared-memory matrix, so only texts and row indices are pickled and the
+    vectors never are. Workers are spawned (not forked) so they start with
+    clean torch / tokenizer thread state.
+    """
+
+    def __init__(self, processes: Optional[int] = None, threads_per_process: Optional[int] = None):
+        self.processes = max(1, processes or Config.embedding.EMBEDDING_POOL_PROCESSES)
+        self.threads_per_process = threads_per_process or Config.embedding.EMBEDDING_POOL_THREADS_PER_PROCESS or max(
+            1, (os.cpu_count() or 1) // self.processes
+        )
+        self.model_name = Config.embedding.MODEL_NAME
+        self.backend = Config.embedding.EMBEDDING_BACKEND
+        self.dimension: Optional[int] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List = []
+        self._tasks = None
+        self._results = None
+        # One encode at a time: the result queue is shared by all batches in flight
+        self._lock = threading.Lock()
+
+    def start(self, timeout: float = 600.0) -> None:
+        if self._workers:
+            return
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        for _ in range(self.processes):
+            worker = self._context.Process(
+                target=_worker_main,
+                args=(self.model_name, self.backend, self.threads_per_process, self._tasks, self._results),
+                daemon=True,
+                name="embedding-pool"
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        started = time.time()
+        for _ in range(self.processes):
+            _, pid, dimension = self._get_result(started + timeout, "Embedding pool workers did not start in time")
+            self.dimension = dimension
+        logger.info(
+            f"Embedding pool ready: {self.processes} processes x {self.threads_per_process} threads "
+            f"in {time.time() - started:.1f}s"
+        )
+
+    def _get_result(self, deadline: float, timeout_message: str) -> Tuple:
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [worker.pid for worker in self._workers if not worker.is_alive()]
+                if dead:
+                    self.close()
+                    raise RuntimeError(f"Embedding pool worker(s) {dead} exited")
+                if time.time() > deadline:
+                    # A hung worker cannot be interrupted; stop it now and restart the pool on the next call
+                    self.close(grace_seconds=0.0)
+                    raise TimeoutError(timeout_message)
+
+    def iter_encode(self, texts: Sequence[str], batches: Sequence[np.ndarray]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Encode `texts` split into `batches` (arrays of row indices), yielding
+        (indices, float32 embeddings) per batch as workers finish them.
+        """
+        with self._lock:
+            self.start()
+            rows = len(texts)
+            shm = SharedMemory(create=True, size=max(1, rows * self.dimension * 4))
+            remaining = 0
+            try:
+                output = np.ndarray((rows, self.dimension), dtype=np.float32, buffer=shm.buf)
+                for task_id, indices in enumerate(batches):
+                    self._tasks.put((task_id, shm.name, rows, indices, [texts[index] for index in indices]))
+
+                remaining = len(batches)
+                errors = []
+                while remaining:
+                    _, task_id, error = self._get_result(
+                        time.time() + Config.embedding.EMBEDDING_POOL_BATCH_TIMEOUT_SECONDS,
+                        "Embedding pool batch timed out"
+                    )
+                    remaining -= 1
+                    if error:
+                        errors.append(error)
+                    elif not errors:
+                        yield batches[task_id], output[batches[task_id]]
+                if errors:
+                    raise RuntimeError(f"Embedding pool failed on {len(errors)} batch(es): {errors[0]}")
+            finally:
+                # Drain batches still in flight (caller stopped early or a batch failed)
+                # so they cannot leak into the next call
+                while remaining and self._workers:
+                    self._get_result(
+                        time.time() + Config.embedding.EMBEDDING_POOL_BATCH_TIMEOUT_SECONDS,
+                        "Embedding pool batch timed out"
+                    )
+                    remaining -= 1
+                output = None
+                shm.close()
+                shm.unlink()
+
+    def close(self, grace_seconds: float = 5.0) -> None:
+        for worker in self._workers:
+            if worker.is_alive():
+                self._tasks.put(None)
+        deadline = time.time() + grace_seconds
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.time()))
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(timeout=1.0)
+            if worker.is_alive():
+                # A stopped or wedged process may never act on SIGTERM
+                worker.kill()
+                worker.join()
+        self._workers = []
@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+inference_queue_wait = metrics.histogram(
+    "rag_inference_queue_wait_seconds", "Time model calls waited for an inference worker", ["model"]
+)
+inference_duration = metrics.histogram(
+    "rag_inference_duration_seconds", "Time model calls ran on an inference worker", ["model"]
+)
+
+
+def configure_torch_threads(intra_op: int, inter_op: int) -> None:
+    """Apply torch thread-pool sizes; 0 leaves the current setting alone."""
+    try:
+        import torch
+    except ImportError:
+        return
+    if intra_op > 0:
+        torch.set_num_threads(intra_op)
+    if inter_op > 0:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # Already fixed once inter-op work has started
+            pass
+
+
+class InferenceExecutor:
+    """
+    Owns execution of every model forward pass in the process. Request
+    threads submit calls and wait on the returned future, so at most
+    `workers` forward passes run at once, each with the configured torch
+    thread team, no matter how many requests are in flight.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or Config.inference.INFERENCE_WORKERS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Set when the worker threads start, so model loading and the pre-fork parent's
+        # lifetime under serve.py do not count as idle time
+        self._started_at: Optional[float] = None
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    configure_torch_threads(
+                        Config.inference.INFERENCE_INTRA_OP_THREADS, Config.inference.INFERENCE_INTER_OP_THREADS
+                    )
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+                    self._started_at = time.time()
+                    logger.info(f"Inference executor started with {self.workers} workers")
+        return self._executor
+
+    def submit(self, model: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a model call; asyncio callers can await it via asyncio.wrap_future."""
+        executor = self._get_executor()
+        with self._lock:
+            self._queued += 1
+        try:
+            return executor.submit(self._execute, model, time.perf_counter(), fn, args, kwargs)
+        except Exception:
+            # e.g. submitted after shutdown: the call never reaches _execute to dequeue itself
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    def run(self, model: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # A model call made from inside an inference worker runs inline; queueing it would deadlock
+        if getattr(self._local, "active", False):
+            return fn(*args, **kwargs)
+        return self.submit(model, fn, *args, **kwargs).result()
+
+    def _execute(self, model: str, submitted_at: float, fn: Callable[..., Any], args, kwargs) -> Any:
+        started = time.perf_counter()
+        inference_queue_wait.observe(started - submitted_at, model=model)
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        self._local.active = True
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._local.active = False
+            elapsed = time.perf_counter() - started
+            inference_duration.observe(elapsed, model=model)
+            with self._lock:
+                self._running -= 1
+                self._busy_seconds += elapsed
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = max(time.time() - self._started_at, 1e-9) if self._started_at is not None else None
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "utilization": round(self._busy_seconds / (uptime * self.workers), 4) if uptime else 0.0
+            }
+
+
+inference_executor = InferenceExecutor()
+
+
+def _inference_samples():
+    stats = inference_executor.get_stats()
+    return [
+        ("rag_inference_queue_depth", "gauge", "Model calls waiting for an inference worker", {}, stats["queued"]),
+        ("rag_inference_running", "gauge", "Model calls currently executing", {}, stats["running"]),
+        ("rag_inference_workers", "gauge", "Inference worker threads", {}, stats["workers"]),
+        ("rag_inference_busy_seconds_total", "counter",
+         "Worker time spent running model calls; rate() / workers gives utilization", {}, stats["busy_seconds"]),
+    ]
+
+
+metrics.register_collector(_inference_samples)
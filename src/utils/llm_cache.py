@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LlmResponseCache:
+    """
+    Disk-backed cache of LLM completions stored in SQLite.
+
+    Entries are keyed by a fingerprint of provider, model, generation config and
+    prompt, expire after a TTL and are evicted least-recently-used once the entry
+    cap is exceeded. The connection is opened lazily (and reopened after a fork)
+    so each process owns its own handle.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        self.path = path or Config.llm.LLM_CACHE_PATH
+        self.ttl_seconds = Config.llm.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = Config.llm.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.enabled = Config.llm.LLM_CACHE_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "expired": 0, "evictions": 0, "writes": 0}
+
+    @staticmethod
+    def make_key(provider: str, model: str, generation_config: Dict[str, Any], prompt: str) -> str:
+        fingerprint = json.dumps(
+            {"provider": provider, "model": model, "config": generation_config, "prompt": prompt},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _record(self, name: str) -> None:
+        self._stats[name] += 1
+
+    def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        return self.get_any([key], bypass)
+
+    def get_any(self, keys: List[str], bypass: bool = False) -> Optional[str]:
+        """
+        Return the first cached value among `keys` (e.g. one key per provider
+        that could have answered). Counts as a single hit or miss.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if bypass:
+                self._record("bypassed")
+                return None
+
+            try:
+                conn = self._connection()
+                now = time.time()
+                for key in keys:
+                    row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        continue
+
+                    value, created_at = row
+                    if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        conn.commit()
+                        self._record("expired")
+                        continue
+
+                    conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    self._record("hits")
+                    return value
+
+                self._record("misses")
+                return None
+            except Exception as e:
+                logger.error(f"LLM cache read failed: {e}")
+                self._record("misses")
+                return None
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._record("writes")
+                self._evict(conn, now)
+                conn.commit()
+            except Exception as e:
+                logger.error(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        if self.max_entries <= 0:
+            return
+
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            self._stats["evictions"] += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            except Exception as e:
+                logger.error(f"LLM cache clear failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = 0
+            if self.enabled:
+                try:
+                    entries = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                except Exception:
+                    pass
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["entries"] = entries
+        stats["enabled"] = self.enabled
+        stats["hit_rate"] = stats["hits"] / lookups if lookups > 0 else 0.0
+        return stats
+
+
+# Global cache shared by the answer and critic paths
+llm_cache = LlmResponseCache()
+
+
+def _llm_cache_samples():
+    stats = llm_cache.get_stats()
+    samples = [
+        ("rag_cache_requests_total", "counter", "Cache lookups by outcome", {"cache": "llm", "result": result}, stats[key])
+        for result, key in (("hit", "hits"), ("miss", "misses"), ("bypass", "bypassed"))
+    ]
+    samples.append(("rag_cache_evictions_total", "counter", "Entries evicted by the LRU size cap", {"cache": "llm"}, stats["evictions"]))
+    samples.append(("rag_cache_entries", "gauge", "Entries currently stored", {"cache": "llm"}, stats["entries"]))
+    return samples
+
+
+metrics.register_collector(_llm_cache_samples)
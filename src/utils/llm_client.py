@@ -1,67 +1,327 @@
-from openai import OpenAI
-import google.generativeai as genai
-from typing import List
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional
+from utils.llm_cache import llm_cache
+from utils.metrics import metrics
 from config import Config
 
-class LlmClient:
+logger = logging.getLogger(__name__)
+
+ANSWER_SYSTEM_PROMPT = "You are a helpful assistant that answers questions based only on the provided context. Be accurate and concise."
+
+
+class LlmTimeoutError(Exception):
+    pass
+
+
+class LlmNoAnswerError(Exception):
+    """The provider responded without usable text (e.g. blocked for safety)."""
+
+
+class LlmMetrics:
     def __init__(self):
-        self.provider = Config.llm.PROVIDER
+        self._lock = threading.Lock()
+        self._counters = {
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "fallbacks": 0,
+        }
 
-        if self.provider == "openai":
-            self.client = OpenAI(api_key=Config.llm.OPENAI_API_KEY)
-            self.model = Config.llm.OPENAI_MODEL
-            self.max_tokens = Config.llm.OPENAI_MAX_TOKENS
-            self.temperature = Config.llm.OPENAI_TEMPERATURE
-        elif self.provider == "gemini":
-            genai.configure(api_key=Config.llm.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(Config.llm.GEMINI_MODEL)
-            self.max_tokens = Config.llm.GEMINI_MAX_TOKENS
-            self.temperature = Config.llm.GEMINI_TEMPERATURE
-
-    def generate_answer(self, query: str, context_chunks: List[str]) -> str:
-        if not context_chunks:
-            return "No relevant context found"
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
 
-        context = "\n\n".join(context_chunks)
-        prompt = f"""Based on the following context, answer the user's question. If the context doesn't contain enough information to answer the question, say so clearly.
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
 
-Context:
-{context}
 
-Question: {query}
+llm_metrics = LlmMetrics()
 
-Answer:"""
 
-        try:
-            if self.provider == "openai":
-                return self._generate_openai_answer(prompt)
-            elif self.provider == "gemini":
-                return self._generate_gemini_answer(prompt)
-        except Exception as e:
-            return f"Error generating answer: {str(e)}"
+def _llm_samples():
+    return [
+        ("rag_llm_events_total", "counter", "LLM client attempts, retries, hedges, timeouts and fallbacks", {"event": name}, value)
+        for name, value in llm_metrics.snapshot().items()
+    ]
+
+
+metrics.register_collector(_llm_samples)
+
 
-    def _generate_openai_answer(self, prompt: str) -> str:
+class OpenAIProvider:
+    name = "openai"
+
+    def __init__(self):
+        # SDKs are imported per provider, so only the configured ones are loaded
+        from openai import OpenAI
+        # Retries are handled by LlmClient, so the SDK must not retry on its own
+        self.client = OpenAI(api_key=Config.llm.OPENAI_API_KEY, max_retries=0)
+        self.model = Config.llm.OPENAI_MODEL
+        self.max_tokens = Config.llm.OPENAI_MAX_TOKENS
+        self.temperature = Config.llm.OPENAI_TEMPERATURE
+
+    def cache_key(self, prompt: str) -> str:
+        return llm_cache.make_key(
+            self.name, self.model,
+            {"max_tokens": self.max_tokens, "temperature": self.temperature, "system": ANSWER_SYSTEM_PROMPT},
+            prompt
+        )
+
+    def generate(self, prompt: str, timeout: float) -> str:
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that answers questions based only on the provided context. Be accurate and concise."},
+                {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=self.max_tokens,
-            temperature=self.temperature
+            temperature=self.temperature,
+            timeout=timeout
         )
         return response.choices[0].message.content.strip()
 
-    def _generate_gemini_answer(self, prompt: str) -> str:
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+        self.genai = genai
+        genai.configure(api_key=Config.llm.GEMINI_API_KEY)
+        self.model_name = Config.llm.GEMINI_MODEL
+        self.model = genai.GenerativeModel(self.model_name)
+        self.max_tokens = Config.llm.GEMINI_MAX_TOKENS
+        self.temperature = Config.llm.GEMINI_TEMPERATURE
+
+    def cache_key(self, prompt: str) -> str:
+        return llm_cache.make_key(
+            self.name, self.model_name,
+            {"max_tokens": self.max_tokens, "temperature": self.temperature},
+            prompt
+        )
+
+    def generate(self, prompt: str, timeout: float) -> str:
         response = self.model.generate_content(
             prompt,
-            generation_config=genai.types.GenerationConfig(
+            generation_config=self.genai.types.GenerationConfig(
                 max_output_tokens=self.max_tokens,
                 temperature=self.temperature
-            )
+            ),
+            request_options={"timeout": timeout}
         )
         try:
             return response.text.strip()
-        except:
-            # Handle the case where response.text is not available (e.g., blocked for safety)
-            return "I'm unable to generate a response for this query. Please try rephrasing your question."
\ No newline at end of file
+        except Exception as e:
+            # response.text raises when there is no text (e.g. blocked for safety); raising rather than
+            # returning a placeholder keeps it out of the cache and lets a fallback provider answer
+            raise LlmNoAnswerError(f"Gemini returned no text: {e}")
+
+
+class FakeProvider:
+    """
+    Offline provider that echoes the question back after a configurable delay.
+    Failures can be scripted with fail_times so retry, hedging and fallback
+    behaviour can be exercised without network access.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: Optional[float] = None, fail_times: int = 0, response: Optional[str] = None):
+        self.latency = Config.llm.FAKE_LLM_LATENCY_SECONDS if latency is None else latency
+        self.fail_times = fail_times
+        self.response = response
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def cache_key(self, prompt: str) -> str:
+        return llm_cache.make_key(self.name, "fake", {"response": self.response}, prompt)
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        with self._lock:
+            self.calls += 1
+            should_fail = self.calls <= self.fail_times
+
+        if self.latency > 0:
+            time.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise LlmTimeoutError(f"Fake provider exceeded {timeout:.2f}s")
+
+        if should_fail:
+            raise RuntimeError("Fake provider failure")
+
+        if self.response is not None:
+            return self.response
+
+        question = prompt.rsplit("Question:", 1)[-1].split("Answer:", 1)[0].strip()
+        return f"[fake answer] {question}"
+
+
+PROVIDER_FACTORIES = {
+    "openai": OpenAIProvider,
+    "gemini": GeminiProvider,
+    "fake": FakeProvider,
+}
+
+
+def _provider_configured(name: str) -> bool:
+    if name == "openai":
+        return bool(Config.llm.OPENAI_API_KEY)
+    if name == "gemini":
+        return bool(Config.llm.GEMINI_API_KEY)
+    return name == "fake"
+
+
+class LlmClient:
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, providers: Optional[List] = None):
+        self.provider = Config.llm.PROVIDER
+        self.providers = providers if providers is not None else self._build_providers()
+        self.timeout = Config.llm.LLM_TIMEOUT_SECONDS
+        self.max_retries = Config.llm.LLM_MAX_RETRIES
+        self.hedge_enabled = Config.llm.LLM_HEDGE_ENABLED
+        self._latencies = {provider.name: deque(maxlen=200) for provider in self.providers}
+
+    def _build_providers(self) -> List:
+        names = [self.provider]
+        if Config.llm.LLM_FALLBACK_ENABLED:
+            names += [name for name in ("openai", "gemini") if name != self.provider and _provider_configured(name)]
+
+        providers = []
+        for name in names:
+            factory = PROVIDER_FACTORIES.get(name)
+            if factory is None:
+                logger.error(f"Unknown LLM provider: {name}")
+                continue
+            try:
+                providers.append(factory())
+            except Exception as e:
+                logger.error(f"Failed to initialise LLM provider '{name}': {e}")
+        return providers
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=Config.llm.LLM_POOL_SIZE,
+                        thread_name_prefix="llm"
+                    )
+        return cls._executor
+
+    def generate_answer(self, query: str, context_chunks: List[str], bypass_cache: bool = False) -> str:
+        if not context_chunks:
+            return "No relevant context found"
+
+        context = "\n\n".join(context_chunks)
+        prompt = f"""Based on the following context, answer the user's question. If the context doesn't contain enough information to answer the question, say so clearly.
+
+Context:
+{context}
+
+Question: {query}
+
+Answer:"""
+
+        try:
+            return self.generate(prompt, bypass_cache)
+        except LlmNoAnswerError:
+            return "I'm unable to generate a response for this query. Please try rephrasing your question."
+        except Exception as e:
+            return f"Error generating answer: {str(e)}"
+
+    def generate(self, prompt: str, bypass_cache: bool = False) -> str:
+        if not self.providers:
+            raise RuntimeError(f"No LLM provider available for '{self.provider}'")
+
+        cached = llm_cache.get_any([provider.cache_key(prompt) for provider in self.providers], bypass=bypass_cache)
+        if cached is not None:
+            return cached
+
+        last_error = None
+        for index, provider in enumerate(self.providers):
+            if index > 0:
+                llm_metrics.increment("fallbacks")
+                logger.warning(f"Falling back to LLM provider '{provider.name}' after: {last_error}")
+
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0:
+                    llm_metrics.increment("retries")
+                    time.sleep(self._backoff_delay(attempt))
+
+                try:
+                    answer = self._call_with_deadline(provider, prompt)
+                    llm_cache.put(provider.cache_key(prompt), answer)
+                    return answer
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"LLM call to '{provider.name}' failed (attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+
+        llm_metrics.increment("failures")
+        raise last_error
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(
+            Config.llm.LLM_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)),
+            Config.llm.LLM_RETRY_BACKOFF_MAX_SECONDS
+        )
+        # Full jitter keeps concurrent retries from synchronising
+        return random.uniform(0, delay)
+
+    def _hedge_delay(self, provider) -> float:
+        samples = self._latencies.get(provider.name)
+        if not samples or len(samples) < 20:
+            return Config.llm.LLM_HEDGE_DELAY_SECONDS
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _timed_call(self, provider, prompt: str, timeout: float) -> str:
+        llm_metrics.increment("attempts")
+        start_time = time.monotonic()
+        result = provider.generate(prompt, timeout)
+        self._latencies.setdefault(provider.name, deque(maxlen=200)).append(time.monotonic() - start_time)
+        return result
+
+    def _call_with_deadline(self, provider, prompt: str) -> str:
+        executor = self._get_executor()
+        deadline = time.monotonic() + self.timeout
+        primary = executor.submit(self._timed_call, provider, prompt, self.timeout)
+        pending: List[Future] = [primary]
+
+        if self.hedge_enabled:
+            done, _ = wait(pending, timeout=min(self._hedge_delay(provider), self.timeout))
+            if not done:
+                llm_metrics.increment("hedges")
+                remaining = max(deadline - time.monotonic(), 0.0)
+                pending.append(executor.submit(self._timed_call, provider, prompt, remaining))
+
+        last_error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    if future is not primary:
+                        llm_metrics.increment("hedge_wins")
+                    return future.result()
+                last_error = future.exception()
+
+        if pending:
+            llm_metrics.increment("timeouts")
+            raise LlmTimeoutError(f"LLM provider '{provider.name}' did not respond within {self.timeout:.1f}s")
+        raise last_error
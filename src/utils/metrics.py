@@ -0,0 +1,274 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, value: float = 1.0, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, value: float = 1.0, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def dec(self, value: float = 1.0, **labels) -> None:
+        self.inc(-value, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram. A bounded window of recent observations is
+    kept per label set so p50/p95/p99 can be read in-process as well.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, registry, name, help_text, labelnames, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 window: int = 1024):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0,
+                          "recent": deque(maxlen=self.window)}
+                self._series[key] = series
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["recent"].append(value)
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99), **labels) -> Dict[float, float]:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            recent = sorted(series["recent"]) if series else []
+        if not recent:
+            return {q: 0.0 for q in qs}
+        return {q: recent[int(q * (len(recent) - 1))] for q in qs}
+
+    def label_sets(self) -> List[Dict[str, str]]:
+        with self._lock:
+            keys = list(self._series.keys())
+        return [dict(zip(self.labelnames, key)) for key in keys]
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(s["counts"]), s["sum"], s["count"]) for key, s in self._series.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = Config.metrics.METRICS_ENABLED if enabled is None else enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Tuple[str, str, str, Dict[str, Any], float]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, str, Dict[str, Any], float]]]) -> None:
+        """
+        Register a callable evaluated at scrape time. It returns
+        (name, type, help, labels, value) tuples, which lets components that
+        already keep their own counters publish them without double bookkeeping.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        if not self.enabled:
+            return ""
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        families: Dict[str, Dict[str, Any]] = {}
+        for collector in collectors:
+            try:
+                samples = collector()
+            except Exception:
+                continue
+            for name, type_name, help_text, labels, value in samples:
+                family = families.setdefault(name, {"type": type_name, "help": help_text, "samples": []})
+                family["samples"].append((labels, value))
+
+        for name, family in families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, value in family["samples"]:
+                lines.append(f"{name}{_format_labels(list(labels.keys()), list(labels.values()))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_duration = metrics.histogram(
+    "rag_stage_duration_seconds", "Time spent in each pipeline stage", ["pipeline", "stage"]
+)
+stage_errors = metrics.counter(
+    "rag_stage_errors_total", "Exceptions raised inside a pipeline stage", ["pipeline", "stage"]
+)
+stage_in_flight = metrics.gauge(
+    "rag_stage_in_flight", "Pipeline stages currently executing", ["pipeline", "stage"]
+)
+model_batch_size = metrics.histogram(
+    "rag_model_batch_size", "Number of inputs per model forward call", ["model"], BATCH_SIZE_BUCKETS
+)
+
+
+@contextmanager
+def track_stage(pipeline: str, stage: str):
+    if not metrics.enabled:
+        yield
+        return
+
+    stage_in_flight.inc(pipeline=pipeline, stage=stage)
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(pipeline=pipeline, stage=stage)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - start_time, pipeline=pipeline, stage=stage)
+        stage_in_flight.dec(pipeline=pipeline, stage=stage)
+
+
+def stage_latency_summary() -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for labels in stage_duration.label_sets():
+        quantiles = stage_duration.quantiles(**labels)
+        summary[f"{labels['pipeline']}.{labels['stage']}"] = {
+            "p50": quantiles[0.5],
+            "p95": quantiles[0.95],
+            "p99": quantiles[0.99]
+        }
+    return summary
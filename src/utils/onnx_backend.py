@@ -0,0 +1,243 @@
+import inspect
+import json
+import logging
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+
+TASK_EMBEDDING = "embedding"
+TASK_RERANKING = "reranking"
+
+OPSET_VERSION = 14
+
+# Pooling modes OnnxSentenceEncoder reproduces; others (weightedmean, lasttoken, ...) are refused at export
+SUPPORTED_POOLING = ("cls", "mean", "max")
+
+
+def _export_dir(model_name: str, task: str) -> str:
+    return os.path.join(Config.inference.ONNX_CACHE_DIR, model_name.replace("/", "__"), task)
+
+
+def _model_path(export_dir: str, quantize: bool) -> str:
+    return os.path.join(export_dir, "model_int8.onnx" if quantize else "model.onnx")
+
+
+def _check_pooling(model_name: str, pooling: str) -> None:
+    if pooling not in SUPPORTED_POOLING:
+        raise ValueError(
+            f"{model_name} uses '{pooling}' pooling, which the ONNX backend does not implement "
+            f"(supported: {', '.join(SUPPORTED_POOLING)}); use EMBEDDING_BACKEND=torch"
+        )
+
+
+def _export(model_name: str, task: str, export_dir: str) -> None:
+    """
+    Export the PyTorch model behind SentenceTransformer / CrossEncoder to
+    ONNX next to its tokenizer, plus the settings the ONNX path needs to
+    reproduce the PyTorch outputs (pooling, normalization, max length).
+    """
+    import torch
+
+    if task == TASK_EMBEDDING:
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.models import Normalize, Pooling
+        source = SentenceTransformer(model_name, device="cpu")
+        transformer = source[0].auto_model
+        tokenizer = source.tokenizer
+        pooling = next((module for module in source if isinstance(module, Pooling)), None)
+        settings = {
+            "max_length": source.max_seq_length,
+            "pooling": pooling.get_pooling_mode_str() if pooling is not None else "mean",
+            "normalize": any(isinstance(module, Normalize) for module in source)
+        }
+        _check_pooling(model_name, settings["pooling"])
+        output_name = "last_hidden_state"
+    else:
+        from sentence_transformers import CrossEncoder
+        source = CrossEncoder(model_name, device="cpu")
+        transformer = source.model
+        tokenizer = source.tokenizer
+        settings = {
+            "max_length": source.max_length or min(
+                tokenizer.model_max_length, getattr(transformer.config, "max_position_embeddings", 512), 512
+            ),
+            # CrossEncoder.predict applies a sigmoid to single-logit models by default
+            "sigmoid": transformer.config.num_labels == 1
+        }
+        output_name = "logits"
+
+    sample = tokenizer(["export sample"], ["export sample"] if task == TASK_RERANKING else None,
+                       padding=True, truncation=True, return_tensors="pt")
+    input_names = list(sample.keys())
+
+    class _FirstOutput(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    os.makedirs(export_dir, exist_ok=True)
+    wrapper = _FirstOutput(transformer.eval())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "sequence"} if task == TASK_EMBEDDING else {0: "batch"}
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter; the tracing exporter handles dynamic_axes as-is
+        export_kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            tuple(sample[name] for name in input_names),
+            _model_path(export_dir, quantize=False),
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+            do_constant_folding=True,
+            **export_kwargs
+        )
+
+    tokenizer.save_pretrained(export_dir)
+    with open(os.path.join(export_dir, "backend_config.json"), "w") as f:
+        json.dump(settings, f)
+
+
+def _quantize(export_dir: str) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    # Dynamic quantization: int8 weights, activation scales computed per batch at run time
+    quantize_dynamic(
+        _model_path(export_dir, quantize=False),
+        _model_path(export_dir, quantize=True),
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+
+
+_export_lock = threading.Lock()
+
+
+def ensure_exported(model_name: str, task: str, quantize: bool) -> str:
+    """Return the export directory, exporting (and quantizing) on first use."""
+    export_dir = _export_dir(model_name, task)
+    with _export_lock:
+        if not os.path.exists(_model_path(export_dir, quantize=False)):
+            logger.info(f"Exporting {model_name} ({task}) to ONNX in {export_dir}")
+            _export(model_name, task, export_dir)
+        if quantize and not os.path.exists(_model_path(export_dir, quantize=True)):
+            logger.info(f"Quantizing {model_name} ({task}) to int8")
+            _quantize(export_dir)
+    return export_dir
+
+
+class _OnnxModel:
+    """
+    Tokenizer plus ONNX Runtime session for one exported model. The session
+    (and its thread pool) is created per process on first use, so a model
+    loaded before serve.py forks is safe to use in every worker.
+    """
+
+    def __init__(self, model_name: str, task: str, quantize: Optional[bool] = None):
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = Config.inference.ONNX_QUANTIZE if quantize is None else quantize
+        self.export_dir = ensure_exported(model_name, task, self.quantize)
+        self.model_path = _model_path(self.export_dir, self.quantize)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.export_dir)
+        with open(os.path.join(self.export_dir, "backend_config.json")) as f:
+            self.settings = json.load(f)
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    import onnxruntime as ort
+                    options = ort.SessionOptions()
+                    # Same thread budget the torch path gets; 0 lets ONNX Runtime pick
+                    options.intra_op_num_threads = (
+                        Config.inference.INFERENCE_INTRA_OP_THREADS or int(os.environ.get("OMP_NUM_THREADS", "0"))
+                    )
+                    options.inter_op_num_threads = max(1, Config.inference.INFERENCE_INTER_OP_THREADS)
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+                    self._input_names = [node.name for node in self._session.get_inputs()]
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _run(self, first: List[str], second: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        session = self._get_session()
+        encoded = self.tokenizer(first, second, padding=True, truncation=True,
+                                 max_length=self.settings["max_length"], return_tensors="np")
+        feed = {name: encoded[name].astype(np.int64) for name in self._input_names}
+        return session.run(None, feed)[0], encoded["attention_mask"]
+
+
+class OnnxSentenceEncoder(_OnnxModel):
+    """Drop-in for SentenceTransformer.encode on the ONNX Runtime CPU backend."""
+
+    def __init__(self, model_name: str, quantize: Optional[bool] = None):
+        super().__init__(model_name, TASK_EMBEDDING, quantize)
+        # Also guards exports cached before the pooling check existed
+        _check_pooling(model_name, self.settings["pooling"])
+        self.max_seq_length = self.settings["max_length"]
+
+    def encode(self, sentences: Sequence[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        if not sentences:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Like SentenceTransformer.encode: batch longest-first to minimise padding, then restore order
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        batches = []
+        for start in range(0, len(order), batch_size):
+            hidden, attention_mask = self._run([sentences[index] for index in order[start:start + batch_size]])
+            batches.append(self._pool(hidden, attention_mask))
+        pooled = np.concatenate(batches)
+        embeddings = np.empty_like(pooled, dtype=np.float32)
+        embeddings[order] = pooled
+        return embeddings
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.settings["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        elif self.settings["pooling"] == "max":
+            # As sentence-transformers: padding positions are set to -1e9 before the max
+            mask = attention_mask[..., None].astype(bool)
+            pooled = np.where(mask, hidden, np.asarray(-1e9, dtype=hidden.dtype)).max(axis=1)
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.settings["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """Drop-in for CrossEncoder.predict on the ONNX Runtime CPU backend."""
+
+    def __init__(self, model_name: str, quantize: Optional[bool] = None):
+        super().__init__(model_name, TASK_RERANKING, quantize)
+
+    def predict(self, sentences: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            logits, _ = self._run([pair[0] for pair in batch], [pair[1] for pair in batch])
+            scores.append(logits[:, 0] if logits.shape[1] == 1 else logits)
+        if not scores:
+            return np.zeros(0, dtype=np.float32)
+        result = np.concatenate(scores)
+        if self.settings.get("sigmoid"):
+            result = 1 / (1 + np.exp(-result))
+        return result.astype(np.float32)
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Tracks whether this process can serve traffic. Warm-up checks run once
+    in a background thread after startup; each one must return without
+    raising. Checks that fail are retried until they all pass, and only
+    then does the process report ready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checks: Dict[str, Callable[[], None]] = {}
+        self._status: Dict[str, str] = {}
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+        self._warm_up_seconds: Optional[float] = None
+
+    def register(self, name: str, check: Callable[[], None]) -> None:
+        with self._lock:
+            self._checks[name] = check
+            self._status[name] = "pending"
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="warm-up")
+            self._thread.start()
+
+    def _run(self) -> None:
+        pending = list(self._checks)
+        while pending:
+            failed = []
+            for name in pending:
+                try:
+                    started = time.time()
+                    self._checks[name]()
+                    self._set_status(name, "ok")
+                    logger.info(f"Warm-up '{name}' done in {(time.time() - started) * 1000:.0f}ms")
+                except Exception as e:
+                    self._set_status(name, f"error: {e}")
+                    logger.warning(f"Warm-up '{name}' failed, retrying: {e}")
+                    failed.append(name)
+            pending = failed
+            if pending:
+                time.sleep(Config.app.READINESS_RETRY_SECONDS)
+
+        self._warm_up_seconds = round(time.time() - self._started_at, 3)
+        self._ready.set()
+        logger.info(f"Ready to serve after {self._warm_up_seconds}s warm-up")
+
+    def _set_status(self, name: str, status: str) -> None:
+        with self._lock:
+            self._status[name] = status
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            checks = dict(self._status)
+        return {"ready": self.is_ready(), "checks": checks, "warm_up_seconds": self._warm_up_seconds}
+
+
+readiness = Readiness()
+
+
+def _readiness_samples():
+    return [("rag_ready", "gauge", "1 once warm-up has finished and the process serves traffic", {},
+             1.0 if readiness.is_ready() else 0.0)]
+
+
+metrics.register_collector(_readiness_samples)
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import anyio
+import pytest
+from fastapi import HTTPException
+
+from api.admission import AdmissionController, size_threadpool
+from config import Config
+from services import collection_service as collection_service_module
+from services.collection_service import CollectionService
+
+
+@pytest.fixture(autouse=True)
+def admission_enabled(monkeypatch):
+    monkeypatch.setattr(Config.admission, "ADMISSION_ENABLED", True)
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def _hold_slot(controller: AdmissionController, release: threading.Event, order: list, label: str) -> None:
+    with controller.admit():
+        order.append(label)
+        release.wait(5)
+
+
+def test_admits_immediately_while_slots_are_free():
+    controller = AdmissionController("test", max_concurrent=2, max_queue=0, queue_timeout=1)
+
+    with controller.admit() as first_wait, controller.admit() as second_wait:
+        assert (first_wait, second_wait) == (0.0, 0.0)
+        assert controller.get_stats()["active"] == 2
+
+    stats = controller.get_stats()
+    assert stats["active"] == 0
+    assert stats["admitted"] == 2
+
+
+def test_queued_requests_are_admitted_in_arrival_order():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=3, queue_timeout=5)
+    release = threading.Event()
+    order = []
+    threads = [threading.Thread(target=_hold_slot, args=(controller, release, order, "holder"))]
+    threads[0].start()
+    _wait_until(lambda: order == ["holder"])
+
+    for i in range(3):
+        thread = threading.Thread(target=_hold_slot, args=(controller, release, order, f"queued-{i}"))
+        thread.start()
+        threads.append(thread)
+        _wait_until(lambda: controller.get_stats()["queued"] == i + 1)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["holder", "queued-0", "queued-1", "queued-2"]
+    assert controller.get_stats()["active"] == 0
+
+
+def test_full_queue_is_rejected_with_429_and_retry_after():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=0, queue_timeout=5)
+
+    with controller.admit():
+        with pytest.raises(HTTPException) as excinfo:
+            with controller.admit():
+                pass
+
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) >= 1
+    assert controller.get_stats()["rejected_queue_full"] == 1
+
+
+def test_queue_timeout_is_rejected_with_503_and_frees_the_queue_slot():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+
+    with controller.admit():
+        with pytest.raises(HTTPException) as excinfo:
+            with controller.admit():
+                pass
+        assert controller.get_stats()["queued"] == 0
+
+    assert excinfo.value.status_code == 503
+    assert "Retry-After" in excinfo.value.headers
+    assert controller.get_stats()["rejected_timeout"] == 1
+    with controller.admit():
+        pass
+
+
+def test_slot_is_released_when_the_request_fails():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=0, queue_timeout=1)
+
+    with pytest.raises(RuntimeError):
+        with controller.admit():
+            raise RuntimeError("boom")
+
+    with controller.admit():
+        assert controller.get_stats()["active"] == 1
+
+
+def test_disabled_admission_never_rejects(monkeypatch):
+    monkeypatch.setattr(Config.admission, "ADMISSION_ENABLED", False)
+    controller = AdmissionController("test", max_concurrent=1, max_queue=0, queue_timeout=1)
+
+    with controller.admit(), controller.admit():
+        assert controller.get_stats()["active"] == 0
+
+
+def test_size_threadpool_reserves_headroom_beyond_admission_capacity():
+    async def main():
+        limit = size_threadpool()
+        assert limit == anyio.to_thread.current_default_thread_limiter().total_tokens
+        return limit
+
+    reserved = (
+        Config.admission.QUERY_MAX_CONCURRENCY + Config.admission.QUERY_MAX_QUEUE
+        + Config.admission.INGEST_MAX_CONCURRENCY + Config.admission.INGEST_MAX_QUEUE
+    )
+    assert anyio.run(main) >= reserved + Config.admission.ADMISSION_THREADPOOL_HEADROOM
+
+
+class _BlockingQueryService:
+    def __init__(self, release: threading.Event):
+        self.release = release
+        self.runs = []
+
+    def search(self, collection_name, query_text, *args):
+        self.runs.append(query_text)
+        self.release.wait(5)
+        return f"answer to {query_text}"
+
+
+def test_coalesced_queries_share_one_admission_slot(monkeypatch):
+    monkeypatch.setattr(Config.query, "QUERY_COALESCING_ENABLED", True)
+    monkeypatch.setattr(collection_service_module, "query_singleflight", collection_service_module.SingleFlight())
+    controller = AdmissionController("test", max_concurrent=2, max_queue=0, queue_timeout=1)
+    release = threading.Event()
+    service = CollectionService.__new__(CollectionService)
+    service.query_service = _BlockingQueryService(release)
+    service._validate_collection_exists = lambda name: True
+    service._get_collection_version = lambda name: 0
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.query_collection("docs", "popular", admit=controller.admit)))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: collection_service_module.query_singleflight.get_stats()["coalesced"] == 5)
+
+    # Five duplicates are waiting on the leader, yet a different query still gets the second slot
+    assert controller.get_stats()["active"] == 1
+    other = threading.Thread(target=lambda: results.append(service.query_collection("docs", "other", admit=controller.admit)))
+    other.start()
+    _wait_until(lambda: len(service.query_service.runs) == 2)
+    release.set()
+    for thread in threads + [other]:
+        thread.join(5)
+
+    assert sorted(results) == ["answer to other"] + ["answer to popular"] * 6
+    stats = controller.get_stats()
+    assert stats["admitted"] == 2
+    assert stats["rejected_queue_full"] == stats["rejected_timeout"] == 0
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+
+from utils.change_log import ChangeLog, CHANGE_DELETE, CHANGE_UPSERT
+
+
+def _append_many(path: str, max_bytes: int, tag: str, count: int) -> None:
+    log = ChangeLog(path, max_bytes)
+    for i in range(count):
+        log.append(CHANGE_UPSERT, f"{tag}-{i}")
+
+
+def test_read_since_returns_only_later_changes(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.log"))
+    log.append(CHANGE_UPSERT, "a", {"name": "a"})
+    cursor = log.cursor()
+    log.append(CHANGE_DELETE, "a")
+    log.append(CHANGE_UPSERT, "b", {"name": "b"})
+
+    changes, next_cursor, has_more = log.read_since(cursor)
+
+    assert [(change["op"], change["key"]) for change in changes] == [(CHANGE_DELETE, "a"), (CHANGE_UPSERT, "b")]
+    assert not has_more
+    assert next_cursor == log.cursor()
+    assert log.read_since(next_cursor) == ([], next_cursor, False)
+
+
+def test_read_since_pages_with_limit(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.log"))
+    cursor = log.cursor()
+    for key in "abcde":
+        log.append(CHANGE_UPSERT, key)
+
+    keys = []
+    has_more = True
+    while has_more:
+        changes, cursor, has_more = log.read_since(cursor, limit=2)
+        assert len(changes) <= 2
+        keys.extend(change["key"] for change in changes)
+
+    assert keys == list("abcde")
+
+
+def test_malformed_or_foreign_cursor_requires_full_reload(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.log"))
+    log.append(CHANGE_UPSERT, "a")
+
+    assert log.read_since(None) is None
+    assert log.read_since("not-a-cursor") is None
+    epoch = log.cursor().split(":")[0]
+    assert log.read_since(f"not{epoch}:0") is None
+    assert log.read_since(f"{epoch}:0") is None
+    assert log.read_since(f"{epoch}:{10 ** 9}") is None
+
+
+def test_rotation_invalidates_old_cursors(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.log"), max_bytes=200)
+    log.append(CHANGE_UPSERT, "first")
+    old_cursor = log.cursor()
+
+    for i in range(10):
+        log.append(CHANGE_UPSERT, f"key-{i}")
+
+    assert os.path.getsize(log.path) <= 200
+    assert log.read_since(old_cursor) is None
+    # The new file holds the entry that triggered the rotation and everything after it
+    with open(log.path) as f:
+        assert '"key-9"' in f.read()
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    path = str(tmp_path / "changes.log")
+    cursor = ChangeLog(path).cursor()
+    writers = [
+        multiprocessing.get_context("fork").Process(target=_append_many, args=(path, 10 ** 9, str(tag), 200))
+        for tag in range(4)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    changes, _, has_more = ChangeLog(path).read_since(cursor, limit=10 ** 6)
+    assert not has_more
+    assert sorted(change["key"] for change in changes) == sorted(f"{tag}-{i}" for tag in range(4) for i in range(200))
+
+
+def test_writers_racing_a_rotation_write_to_the_live_file(tmp_path):
+    path = str(tmp_path / "changes.log")
+    ChangeLog(path)
+    writers = [
+        multiprocessing.get_context("fork").Process(target=_append_many, args=(path, 4096, str(tag), 300))
+        for tag in range(4)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    # Rotation drops older lines, but no writer may leave a torn line or write past the limit
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert all(line.startswith("{") and line.endswith("}") for line in lines)
+    assert os.path.getsize(path) <= 4096
+
+
+def test_log_without_epoch_header_starts_a_new_epoch(tmp_path):
+    path = tmp_path / "changes.log"
+    path.write_text('{"op": "upsert", "key": "old", "item": null}\n')
+
+    log = ChangeLog(str(path))
+
+    assert "old" not in path.read_text()
+    changes, _, _ = log.read_since(log.cursor())
+    assert changes == []
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from config import Config
+from utils import embedding_client
+from utils.embedding_client import EmbeddingClient
+
+
+class FakeTokenizer:
+    def __call__(self, texts, truncation=True, max_length=None):
+        return {"input_ids": [text.split()[:max_length] for text in texts]}
+
+
+class FakeModel:
+    """Embeds a text as (word count, its first word's number), so rows can be traced back to inputs."""
+
+    max_seq_length = 16
+
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return np.array([[len(text.split()), float(text.split()[0])] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config.embedding, "EMBEDDING_POOL_PROCESSES", 0)
+    monkeypatch.setattr(Config.embedding, "EMBEDDING_BULK_BATCH_TOKENS", 12)
+    monkeypatch.setattr(Config.embedding, "EMBEDDING_BULK_MAX_BATCH_SIZE", 4)
+    client = EmbeddingClient()
+    model = FakeModel()
+    monkeypatch.setitem(EmbeddingClient._models, (client.backend, client.model_name), model)
+    return client, model
+
+
+def test_encode_bulk_restores_input_order(client):
+    client, model = client
+    texts = [" ".join([str(i)] * (1 + (i * 7) % 11)) for i in range(30)]
+
+    embeddings = client.encode_bulk(texts)
+
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (30, 2)
+    assert embeddings[:, 1].tolist() == list(range(30))
+    assert embeddings[:, 0].tolist() == [min(1 + (i * 7) % 11, FakeModel.max_seq_length) for i in range(30)]
+    assert len(model.batches) > 1
+
+
+def test_batches_are_longest_first_and_sized_by_token_budget(client):
+    client, model = client
+    texts = [" ".join([str(i)] * length) for i, length in enumerate([1, 6, 2, 6, 3, 1, 1, 1, 1, 1])]
+
+    client.encode_bulk(texts)
+
+    lengths = [[len(text.split()) for text in batch] for batch in model.batches]
+    assert lengths[0] == [6, 6]
+    assert all(max(batch) * len(batch) <= 12 or len(batch) == 1 for batch in lengths)
+    assert all(len(batch) <= 4 for batch in lengths)
+    flat = [length for batch in lengths for length in batch]
+    assert flat == sorted(flat, reverse=True)
+
+
+def test_encode_bulk_of_nothing(client):
+    client, model = client
+
+    embeddings = client.encode_bulk([])
+
+    assert embeddings.shape == (0, Config.embedding.VECTOR_SIZE)
+    assert model.batches == []
+
+
+class FakePool:
+    def __init__(self, model):
+        self.model = model
+
+    def iter_encode(self, texts, batches):
+        for indices in batches:
+            yield indices, self.model.encode([texts[index] for index in indices])
+
+
+class RecordingHistogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value, **labels):
+        self.values.append(value)
+
+
+def test_pool_path_records_batch_sizes_and_restores_order(client, monkeypatch):
+    client, model = client
+    histogram = RecordingHistogram()
+    monkeypatch.setattr(embedding_client, "model_batch_size", histogram)
+    monkeypatch.setattr(Config.embedding, "EMBEDDING_POOL_PROCESSES", 2)
+    monkeypatch.setattr(Config.embedding, "EMBEDDING_POOL_MIN_TEXTS", 1)
+    monkeypatch.setattr(EmbeddingClient, "_get_pool", classmethod(lambda cls: FakePool(model)))
+    texts = [" ".join([str(i)] * (1 + i % 5)) for i in range(20)]
+
+    embeddings = client.encode_bulk(texts)
+
+    assert embeddings[:, 1].tolist() == list(range(20))
+    assert histogram.values == [len(batch) for batch in model.batches]
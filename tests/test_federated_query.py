@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from config import Config
+from models.api_models import ChunkConfig, QueryResponse
+from repositories.query_ticket_repository import QueryTicketRepository
+from services import query_service
+from services.feedback_service import FeedbackService
+from services.query_service import QueryService
+
+
+class FakeEmbeddingClient:
+    def generate_single_embedding(self, text):
+        return np.ones(4, dtype=np.float32)
+
+
+class FakeQdrantRepository:
+    def __init__(self, scores_by_collection):
+        self.scores_by_collection = scores_by_collection
+
+    def query_collection(self, collection_name, query_vector, limit):
+        return [
+            {"id": f"{collection_name}-{i}", "score": score, "payload": {"document_id": f"{collection_name}-{i}"}}
+            for i, score in enumerate(self.scores_by_collection[collection_name])
+        ]
+
+
+class FakeFeedbackRepository:
+    def __init__(self, scores=None):
+        self.scores = scores or {}
+        self.calls = []
+
+    def get_feedback_scores(self, query_vector, collection_name, doc_ids, threshold):
+        self.calls.append((collection_name, sorted(doc_ids)))
+        return {doc_id: self.scores[doc_id] for doc_id in doc_ids if doc_id in self.scores}
+
+
+class FailingEmbeddingClient:
+    def generate_single_embedding(self, text):
+        raise AssertionError("feedback should reuse the ticket's vector")
+
+
+@pytest.fixture
+def tickets(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.query, "QUERY_TICKET_PATH", str(tmp_path / "tickets.sqlite3"))
+    monkeypatch.setattr(QueryTicketRepository, "_instance", None)
+    return QueryTicketRepository()
+
+
+@pytest.fixture
+def service(monkeypatch, tickets):
+    monkeypatch.setattr(query_service.reranker, "is_available", lambda: False)
+    monkeypatch.setattr(Config.feedback, "FEEDBACK_ENABLED", True)
+    service = QueryService.__new__(QueryService)
+    service.embedding_client = FakeEmbeddingClient()
+    service.feedback_repo = FakeFeedbackRepository()
+    service.ticket_repo = tickets
+
+    def create_query_response(results, *args):
+        # Keep the final ranking and answer from the top three instead of calling the LLM
+        service.ranked = results
+        chunks = [
+            ChunkConfig(source=result["payload"]["document_id"], text="text", collection=result["collection"])
+            for result in results[:3]
+        ]
+        return QueryResponse(answer="answer", confidence=1.0, is_relevant=True, chunks=chunks)
+
+    service._create_query_response = create_query_response
+    return service
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def _search(service, *args):
+    service.search_federated(*args)
+    return service.ranked
+
+
+def test_merge_orders_by_per_collection_normalised_score(service):
+    # Collection b scores lower across the board but its best hit still leads its list
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.9, 0.8, 0.7], "b": [0.3, 0.2, 0.1]})
+
+    results = _search(service, ["a", "b"], "question")
+
+    assert _ids(results)[:2] == ["a-0", "b-0"]
+    assert _ids(results)[-2:] == ["a-2", "b-2"]
+    assert {result["collection"] for result in results} == {"a", "b"}
+
+
+def test_single_weak_hit_does_not_outrank_other_collections(service):
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.9, 0.8, 0.7], "b": [0.3]})
+
+    results = _search(service, ["a", "b"], "question")
+
+    assert _ids(results)[:3] == ["a-0", "a-1", "b-0"]
+    assert results[2]["normalized_score"] == pytest.approx(0.3)
+
+
+def test_single_strong_hit_keeps_its_raw_score(service):
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.6, 0.5, 0.4], "b": [0.95]})
+
+    results = _search(service, ["a", "b"], "question")
+
+    assert _ids(results)[0] == "b-0"
+
+
+def test_feedback_is_looked_up_per_collection_and_blended_with_position(service):
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.9, 0.7, 0.5, 0.3], "b": [0.8, 0.6, 0.4, 0.2]})
+    service.feedback_repo = FakeFeedbackRepository({"b-0": 1.0, "a-0": 0.0})
+
+    results = _search(service, ["a", "b"], "question")
+
+    assert sorted(service.feedback_repo.calls) == [
+        ("a", ["a-0", "a-1", "a-2", "a-3"]), ("b", ["b-0", "b-1", "b-2", "b-3"])
+    ]
+    # Feedback reorders neighbours in the merged list but does not override it wholesale
+    assert _ids(results) == ["b-0", "a-0", "a-1", "b-1", "a-2", "b-2", "a-3", "b-3"]
+
+
+def test_no_feedback_keeps_the_merged_order(service):
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.9, 0.5], "b": [0.8, 0.4]})
+
+    results = _search(service, ["a", "b"], "question")
+
+    assert _ids(results) == ["a-0", "b-0", "a-1", "b-1"]
+    assert not any("feedback_score" in result for result in results)
+
+
+def test_federated_ticket_serves_feedback_for_each_contributing_collection(service, tickets):
+    service.qdrant_repo = FakeQdrantRepository({"a": [0.9, 0.5], "b": [0.8, 0.4]})
+
+    response = service.search_federated(["a", "b"], "question")
+
+    assert response.query_ticket is not None
+    feedback = FeedbackService.__new__(FeedbackService)
+    feedback.embedding_client = FailingEmbeddingClient()
+    feedback.ticket_repo = tickets
+    expected = np.ones(4, dtype=np.float32)
+    assert np.array_equal(feedback._resolve_query_vector("question", "a", ["a-0", "a-1"], response.query_ticket), expected)
+    assert np.array_equal(feedback._resolve_query_vector("question", "b", ["b-0"], response.query_ticket), expected)
+    # b-1 was not among the chunks the answer was built from
+    assert tickets.resolve_vector(response.query_ticket, "question", "b", ["b-1"]) is None
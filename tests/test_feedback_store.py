@@ -0,0 +1,138 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from repositories.feedback_store import BinaryFeedbackStore, JsonlFeedbackStore, convert_jsonl_to_binary
+
+
+def _entries(count: int, dim: int = 4, start: int = 0):
+    return [({"query": f"q{i}", "doc_id": f"d{i}"}, np.full(dim, i, dtype=np.float32)) for i in range(start, start + count)]
+
+
+def _queries(entries):
+    return [record["query"] for record, _ in entries]
+
+
+def test_binary_read_new_returns_each_entry_once(tmp_path):
+    writer = BinaryFeedbackStore(str(tmp_path / "store"), fsync=False)
+    reader = BinaryFeedbackStore(str(tmp_path / "store"))
+
+    assert reader.read_new() == ([], False)
+    writer.append(_entries(2))
+    first, reset = reader.read_new()
+    writer.append(_entries(1, start=2))
+    second, _ = reader.read_new()
+
+    assert not reset
+    assert _queries(first) == ["q0", "q1"]
+    assert _queries(second) == ["q2"]
+    assert np.array_equal(second[0][1], np.full(4, 2, dtype=np.float32))
+    assert "row" not in second[0][0]
+    assert reader.read_new() == ([], False)
+
+
+def test_binary_append_rejects_wrong_dimension(tmp_path):
+    store = BinaryFeedbackStore(str(tmp_path / "store"), fsync=False)
+    store.append(_entries(1))
+
+    with pytest.raises(ValueError):
+        store.append(_entries(1, dim=8))
+
+
+def test_binary_rewrite_starts_a_generation_readers_see_as_reset(tmp_path):
+    store = BinaryFeedbackStore(str(tmp_path / "store"), fsync=False)
+    reader = BinaryFeedbackStore(str(tmp_path / "store"))
+    store.append(_entries(5))
+    reader.read_new()
+
+    before, after = store.rewrite(lambda entries: [entry for entry in entries if entry[0]["query"] != "q3"])
+    entries, reset = reader.read_new()
+
+    assert (before, after) == (5, 4)
+    assert reset
+    assert _queries(entries) == ["q0", "q1", "q2", "q4"]
+    assert np.array_equal(entries[3][1], np.full(4, 4, dtype=np.float32))
+    assert sorted(os.listdir(store.directory)) == [".lock", "meta.json", "records-1.jsonl", "vectors-1.bin"]
+
+
+def test_binary_skips_partial_record_and_trims_it_on_next_append(tmp_path):
+    store = BinaryFeedbackStore(str(tmp_path / "store"), fsync=False)
+    store.append(_entries(1))
+    records_path = store._records_path(0)
+    vectors_path = store._vectors_path(0)
+    # Simulate a crash part-way through the next append
+    with open(vectors_path, "ab") as f:
+        f.write(b"\x00" * 6)
+    with open(records_path, "ab") as f:
+        f.write(b'{"query": "torn", "ro')
+
+    reader = BinaryFeedbackStore(store.directory)
+    assert _queries(reader.read_new()[0]) == ["q0"]
+
+    store.append(_entries(1, start=1))
+    entries, _ = reader.read_new()
+
+    assert _queries(entries) == ["q1"]
+    assert np.array_equal(entries[0][1], np.full(4, 1, dtype=np.float32))
+    assert os.path.getsize(vectors_path) == 2 * 4 * 4
+    assert [record["query"] for record in store.iter_records()] == ["q0", "q1"]
+
+
+def test_binary_reader_waits_for_vector_a_record_points_past(tmp_path):
+    store = BinaryFeedbackStore(str(tmp_path / "store"), fsync=False)
+    store.append(_entries(1))
+    with open(store._records_path(0), "a") as f:
+        f.write(json.dumps({"query": "early", "row": 1}) + "\n")
+
+    reader = BinaryFeedbackStore(store.directory)
+    assert _queries(reader.read_new()[0]) == ["q0"]
+
+    with open(store._vectors_path(0), "ab") as f:
+        f.write(np.full(4, 9, dtype=np.float32).tobytes())
+    entries, _ = reader.read_new()
+
+    assert _queries(entries) == ["early"]
+
+
+def test_jsonl_read_new_and_rewrite(tmp_path):
+    path = str(tmp_path / "feedback.jsonl")
+    store = JsonlFeedbackStore(path)
+    reader = JsonlFeedbackStore(path)
+    store.append(_entries(3))
+    with open(path, "a") as f:
+        f.write('{"query": "torn"')
+
+    assert _queries(reader.read_new()[0]) == ["q0", "q1", "q2"]
+
+    store.append(_entries(1, start=3))
+    assert _queries(reader.read_new()[0]) == ["q3"]
+
+    assert store.rewrite(lambda entries: entries[2:]) == (4, 2)
+    entries, reset = reader.read_new()
+    assert reset
+    assert _queries(entries) == ["q2", "q3"]
+
+
+def test_convert_jsonl_to_binary(tmp_path):
+    jsonl_path = str(tmp_path / "feedback.jsonl")
+    directory = str(tmp_path / "store")
+    JsonlFeedbackStore(jsonl_path).append(_entries(3))
+
+    assert convert_jsonl_to_binary(jsonl_path, directory, batch_size=2) == 3
+
+    entries, _ = BinaryFeedbackStore(directory).read_new()
+    assert _queries(entries) == ["q0", "q1", "q2"]
+    assert not [name for name in os.listdir(tmp_path) if ".tmp-" in name]
+    with pytest.raises(ValueError):
+        convert_jsonl_to_binary(jsonl_path, directory)
+
+
+def test_convert_empty_jsonl_creates_no_store(tmp_path):
+    jsonl_path = tmp_path / "feedback.jsonl"
+    jsonl_path.write_text("")
+    directory = str(tmp_path / "store")
+
+    assert convert_jsonl_to_binary(str(jsonl_path), directory) == 0
+    assert not BinaryFeedbackStore(directory).exists()
@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+
+from config import Config
+from repositories.feedback_writer import FeedbackWriter
+
+
+class BlockingStore:
+    def __init__(self):
+        self.release = threading.Event()
+        self.entries = []
+
+    def append(self, entries, fsync=False):
+        self.release.wait(5)
+        self.entries.extend(entries)
+
+
+def test_concurrent_rejections_are_all_counted(monkeypatch):
+    monkeypatch.setattr(Config.feedback, "FEEDBACK_WRITER_QUEUE_SIZE", 4)
+    monkeypatch.setattr(Config.feedback, "FEEDBACK_WRITER_MAX_BATCH", 1)
+    store = BlockingStore()
+    writer = FeedbackWriter(store)
+    futures = []
+
+    def submit_many():
+        for i in range(200):
+            futures.append(writer.submit({"i": i}, np.ones(2, dtype=np.float32)))
+
+    threads = [threading.Thread(target=submit_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    store.release.set()
+    accepted = [future for future in futures if future is not None]
+    for future in accepted:
+        future.result(5)
+    writer.close()
+
+    stats = writer.get_stats()
+    assert stats["rejected"] == 1600 - len(accepted)
+    assert stats["entries"] == len(store.entries) == len(accepted)
+    assert stats["batches"] == len(accepted)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from repositories.feedback_repository import IvfIndex, VectorMatrix
+
+
+def _clustered_vectors(count: int, dim: int = 32, clusters: int = 40, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _build(vectors: np.ndarray, **kwargs) -> IvfIndex:
+    matrix = VectorMatrix()
+    index = IvfIndex(matrix, **kwargs)
+    for vector in vectors:
+        index.add(matrix.append(vector))
+    return index
+
+
+def _wait_for_training(index: IvfIndex) -> None:
+    if index._training is not None:
+        index._training.join(30)
+    index._install_trained()
+
+
+def test_small_index_uses_exact_scan():
+    vectors = _clustered_vectors(100)
+    index = _build(vectors, min_train_size=1000)
+
+    rows, similarities = index.search(vectors[0], 0.5)
+
+    assert index.centroids is None
+    exact_rows, exact_similarities = index.matrix.search(vectors[0], 0.5)
+    assert np.array_equal(rows, exact_rows)
+    assert np.array_equal(similarities, exact_similarities)
+
+
+def test_every_row_is_bucketed_once_across_background_training():
+    vectors = _clustered_vectors(3000)
+    index = _build(vectors[:2000], nlist=32, min_train_size=1000)
+    _wait_for_training(index)
+    for vector in vectors[2000:]:
+        index.add(index.matrix.append(vector))
+    _wait_for_training(index)
+
+    bucketed = sorted(row for rows in index.list_rows for row in rows)
+    assert bucketed == list(range(3000))
+    for bucket, rows in enumerate(index.list_rows):
+        if rows:
+            assert np.array_equal(index.lists[bucket].vectors[:len(rows)], index.matrix.vectors[rows])
+
+
+def test_ivf_recall_against_exact_scan():
+    vectors = _clustered_vectors(4000)
+    # Held-out points drawn from the same clusters as the indexed ones
+    queries = _clustered_vectors(4050)[4000:]
+    index = _build(vectors, nlist=64, nprobe=8, min_train_size=1000)
+    _wait_for_training(index)
+    assert index.centroids is not None
+
+    found = expected = 0
+    for query in queries:
+        exact_rows, _ = index.matrix.search(query, 0.8)
+        rows, similarities = index.search(query, 0.8)
+        assert set(rows) <= set(exact_rows)
+        assert np.all(np.diff(similarities) <= 0)
+        found += len(set(rows) & set(exact_rows))
+        expected += len(exact_rows)
+
+    assert expected > 0
+    assert found / expected >= 0.95
+
+    index.nprobe = len(index.centroids)
+    for query in queries[:5]:
+        assert set(index.search(query, 0.8)[0]) == set(index.matrix.search(query, 0.8)[0])
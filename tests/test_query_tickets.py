@@ -0,0 +1,62 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from config import Config
+from repositories.query_ticket_repository import QueryTicketRepository
+
+
+@pytest.fixture
+def tickets(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config.query, "QUERY_TICKET_PATH", str(tmp_path / "tickets.sqlite3"))
+    monkeypatch.setattr(QueryTicketRepository, "_instance", None)
+    return QueryTicketRepository()
+
+
+def _resolve_in_child(ticket_id: str, results) -> None:
+    # A forked worker reopens its own connection to the shared table
+    vector = QueryTicketRepository().resolve_vector(ticket_id, "question", "docs", ["d1"])
+    results.put(None if vector is None else vector.tolist())
+
+
+def test_ticket_resolves_in_another_worker_process(tickets):
+    ticket_id = tickets.create_ticket("question", np.array([0.5, 0.25], dtype=np.float32), {"docs": ["d1", "d2"]})
+    # The parent's connection is already open when the child is forked
+    tickets.get_ticket(ticket_id)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_resolve_in_child, args=(ticket_id, results))
+    child.start()
+    child.join(10)
+
+    assert results.get(timeout=5) == [0.5, 0.25]
+
+
+def test_resolve_vector_counts_hits_misses_and_mismatches(tickets):
+    ticket_id = tickets.create_ticket("question", np.ones(3), {"a": ["d1", "d2"], "b": ["d3"]})
+
+    assert np.array_equal(tickets.resolve_vector(ticket_id, "question", "a", ["d2"]), np.ones(3))
+    assert tickets.resolve_vector(ticket_id, "question", "b", ["d3"]) is not None
+    assert tickets.resolve_vector(ticket_id, "question", "b", ["d1"]) is None
+    assert tickets.resolve_vector(ticket_id, "other question", "a", ["d1"]) is None
+    assert tickets.resolve_vector("unknown", "question", "a", ["d1"]) is None
+
+    stats = tickets.get_stats()
+    assert (stats["created"], stats["hits"], stats["mismatched"], stats["misses"]) == (1, 2, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(0.4)
+
+
+def test_expired_tickets_are_not_returned(tickets):
+    tickets.ttl_seconds = -1
+    ticket_id = tickets.create_ticket("question", np.ones(3), {"a": ["d1"]})
+
+    assert tickets.get_ticket(ticket_id) is None
+
+
+def test_oldest_tickets_are_evicted_past_the_cap(tickets):
+    tickets.max_entries = 3
+    ticket_ids = [tickets.create_ticket(f"q{i}", np.ones(3), {"a": ["d1"]}) for i in range(5)]
+
+    assert [tickets.get_ticket(ticket_id) is not None for ticket_id in ticket_ids] == [False, False, True, True, True]
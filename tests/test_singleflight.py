@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def _run_concurrently(flight: SingleFlight, key, fn, callers: int):
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(index: int) -> None:
+        try:
+            results[index] = flight.do(key, fn)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_followers(flight: SingleFlight, count: int) -> None:
+    # Followers are counted before they block, so this only proves they joined the call
+    for _ in range(1000):
+        if flight.get_stats()["coalesced"] == count:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError("followers did not join the in-flight call")
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    result = object()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return result
+
+    threads, results, errors = _run_concurrently(flight, "key", work, 5)
+    started.wait(5)
+    _wait_for_followers(flight, 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert all(r is result for r in results)
+    assert errors == [None] * 5
+    assert flight.get_stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    threads, results, errors = _run_concurrently(flight, "key", work, 3)
+    started.wait(5)
+    _wait_for_followers(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_completed_calls_are_not_cached_and_keys_are_independent():
+    flight = SingleFlight()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        return value
+
+    assert flight.do("a", lambda: work(1)) == 1
+    assert flight.do("a", lambda: work(2)) == 2
+    assert flight.do("b", lambda: work(3)) == 3
+    with pytest.raises(KeyError):
+        flight.do("c", lambda: {}["missing"])
+
+    assert calls == [1, 2, 3]
+    assert flight.get_stats() == {"executed": 4, "coalesced": 0, "in_flight": 0}